@@ -3,8 +3,8 @@ import sys
 from .old_core.types import *
 from .old_core.api import *
 from .old_core import log, types
-from .old_core.connection import get_authorization
+from .api_clients.connection import get_authorization
 from .old_core.client import Intents, Client
 from .ext.cog_yaml import read
 from .old_core.log import get_logger
-from .old_core.webhook_server import WebHookServer
\ No newline at end of file
+from .core.server import WebHookServer
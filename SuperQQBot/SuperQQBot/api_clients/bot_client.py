@@ -1,10 +1,15 @@
 import warnings
+from contextlib import nullcontext
 from typing import List
 
-from .connection import PostConnect, GetConnect, DeleteRequests, PutRequests
+from .connection import PostConnect, GetConnect, DeleteRequests, PutRequests, SessionManager, get_session
 from .exceptions import *
 from .types import *
 from .. import Member
+from ..middleware.quota import ActiveMessageQuota
+from ..middleware.rate_limiter import RateLimiter, get_rate_limiter
+from ..middleware.reply_window import ReplyWindow
+from ..utils.decoder import decoder_for
 from ..logger.logger import WebHookLogger
 
 _log = WebHookLogger()
@@ -14,40 +19,53 @@ _log = WebHookLogger()
 class BaseBotApi:
     """API基类"""
 
-    def __init__(self, access_token: str, is_sandbox: bool = False):
+    def __init__(self, access_token: str, is_sandbox: bool = False, session: SessionManager | None = None):
         self.access_token = access_token
         self.public_url = "https://sandbox.api.sgroup.qq.com" \
             if is_sandbox else "https://api.sgroup.qq.com/"
+        # 未指定时使用进程级共享连接池
+        self.session = session or get_session()
 
 
 # WebSocket相关API
 class WebSocketAPI(BaseBotApi):
     """WebSocket相关API"""
 
-    def __init__(self, access_token: str, is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+    def __init__(self, access_token: str, is_sandbox: bool = False, session: SessionManager | None = None):
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
 
     async def get_wss_url(self) -> str:
-        get_connect = GetConnect("/gateway", self.access_token, self.public_url)
+        get_connect = GetConnect("/gateway", self.access_token, self.public_url, session=self.session)
         await get_connect.apply()
         return get_connect.json()["url"]
 
+    async def get_gateway_bot(self) -> GatewayBot:
+        """获取带分片信息的WebSocket接入点
+        :rtype: GatewayBot
+        :return: 接入地址、建议的分片数以及创建Session的限制"""
+        get_connect = GetConnect("/gateway/bot", self.access_token, self.public_url, session=self.session)
+        await get_connect.apply()
+        response = get_connect.json()
+        return GatewayBot(url=response["url"],
+                          shards=response["shards"],
+                          session_start_limit=SessionStartLimit(**response["session_start_limit"]))
+
 
 # 频道模块API
 class GuildManagementApi(BaseBotApi):
     """频道管理相关API"""
 
-    def __init__(self, access_token: str, is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+    def __init__(self, access_token: str, is_sandbox: bool = False, session: SessionManager | None = None):
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
 
     async def get_guild(self, guild_id: str | int) -> Guild:
         """获取频道详情
         :param guild_id: 频道ID
         :rtype: Guild
         :return: guild_id 指定的频道的详情。"""
-        get_connect = GetConnect(f"/guilds/{guild_id}", self.access_token, self.public_url)
+        get_connect = GetConnect(f"/guilds/{guild_id}", self.access_token, self.public_url, session=self.session)
         await get_connect.apply()
-        return Guild(**get_connect.json())
+        return decoder_for(Guild)(get_connect.json())
 
     async def get_channels(self, guild_id: str | int) -> List[Channel]:
         """获取子频道列表
@@ -55,29 +73,30 @@ class GuildManagementApi(BaseBotApi):
         :rtype: List[Channel]
         :return: guild_id 指定的频道下的子频道列表。"""
         output = []
-        get_connect = GetConnect(f"/guilds/{guild_id}/channels", self.access_token, self.public_url)
+        get_connect = GetConnect(f"/guilds/{guild_id}/channels", self.access_token, self.public_url,
+                                 session=self.session)
         await get_connect.apply()
         for i in get_connect.json():
-            output.append(Channel(**i))
+            output.append(decoder_for(Channel)(i))
         return output
 
     async def me(self) -> User:
         """获取用户详情。
         :rtype: User
         :return: 当前用户（机器人）详细"""
-        get_connect = GetConnect("/users/@me", self.access_token, self.public_url)
+        get_connect = GetConnect("/users/@me", self.access_token, self.public_url, session=self.session)
         await get_connect.apply()
-        return User(**get_connect.json())
+        return decoder_for(User)(get_connect.json())
 
     async def me_guilds(self) -> List[Guild]:
         """获取用户频道列表
         :return: 当前用户（机器人）所加入的频道列表
         :rtype: List[Guild}"""
         output = []
-        get_connect = GetConnect("/users/@me/guilds", self.access_token, self.public_url)
+        get_connect = GetConnect("/users/@me/guilds", self.access_token, self.public_url, session=self.session)
         await get_connect.apply()
         for i in get_connect.json():
-            output.append(Guild(**i))
+            output.append(decoder_for(Guild)(i))
         return output
 
     async def get_channel(self, channel_id: str | int | Channel) -> Channel:
@@ -85,9 +104,9 @@ class GuildManagementApi(BaseBotApi):
         :param channel_id: 子频道ID
         :rtype: Channel
         :return: channel_id 指定的子频道的详情。"""
-        get_connect = GetConnect(f"/channels/{channel_id}", self.access_token, self.public_url)
+        get_connect = GetConnect(f"/channels/{channel_id}", self.access_token, self.public_url, session=self.session)
         await get_connect.apply()
-        return Channel(**get_connect.json())
+        return decoder_for(Channel)(get_connect.json())
 
     async def create_channel(self,
                              guild_id: str | int | Guild,
@@ -128,9 +147,10 @@ class GuildManagementApi(BaseBotApi):
             "speak_permission": speak_permission,
             "application_id": application_id
         }
-        post_connect = PostConnect(f"/guilds/{guild_id}/channels", self.access_token, data, self.public_url)
+        post_connect = PostConnect(f"/guilds/{guild_id}/channels", self.access_token, data, self.public_url,
+                                   session=self.session)
         await post_connect.apply()
-        return Channel(**post_connect.json())
+        return decoder_for(Channel)(post_connect.json())
 
     async def update_channel(self,
                              channel_id: str | int | Channel,
@@ -164,17 +184,16 @@ class GuildManagementApi(BaseBotApi):
         get_connect = PostConnect(
             f"/channels/{channel_id}",
             self.access_token, data,
-            self.public_url)
+            self.public_url, session=self.session)
         await get_connect.apply()
-        return Channel(
-            **get_connect
-            .json())
+        return decoder_for(Channel)(get_connect.json())
 
     async def delete_channel(self,
                              channel_id: str | int | Channel) -> None:
         """删除子频道
         :param channel_id: 子频道ID"""
-        delete_requests = DeleteRequests(f"/channels/{channel_id}", self.access_token, self.public_url)
+        delete_requests = DeleteRequests(f"/channels/{channel_id}", self.access_token, self.public_url,
+                                         session=self.session)
         await delete_requests.apply()
         delete_requests.verify_data()
         return
@@ -183,8 +202,9 @@ class GuildManagementApi(BaseBotApi):
 class GuildMemberApi(BaseBotApi):
     def __init__(self,
                  access_token: str,
-                 is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+                 is_sandbox: bool = False,
+                 session: SessionManager | None = None):
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
 
     async def get_online_num(self,
                              channel_id: str | int | Channel) -> Optional[int]:
@@ -192,7 +212,7 @@ class GuildMemberApi(BaseBotApi):
         :param channel_id: 子频道ID"""
         try:
             get_connect = GetConnect(f"/channels/{channel_id}/online_num",
-                                     self.access_token, self.public_url)
+                                     self.access_token, self.public_url, session=self.session)
             await get_connect.apply()
             return int(get_connect.json()["online_nums"])
         except TypeError:
@@ -215,9 +235,9 @@ class GuildMemberApi(BaseBotApi):
 
         每次返回的member数量与limit不一定完全相等。翻页请使用最后一个member的user id作为下一次请求的after参数，直到回包为空，拉取结束。"""
         get_connect = GetConnect(f"/guilds/{guild_id}/members", self.access_token,
-                                 self.public_url, query={"after": after, "limit": limit})
+                                 self.public_url, query={"after": after, "limit": limit}, session=self.session)
         await get_connect.apply()
-        return [Member(**i) for i in get_connect.json()]
+        return [decoder_for(Member)(i) for i in get_connect.json()]
 
     async def get_role_member_list(self,
                                    guild_id: str | int | Guild,
@@ -238,9 +258,9 @@ class GuildMemberApi(BaseBotApi):
         get_connect = GetConnect(f"/guilds/{guild_id}/roles/{role_id}/members",
                                  self.access_token,
                                  self.public_url,
-                                 query={"start_index": start_index, "limit": limit})
+                                 query={"start_index": start_index, "limit": limit}, session=self.session)
         await get_connect.apply()
-        return {"data": [Member(**i) for i in get_connect.json()["data"]],
+        return {"data": [decoder_for(Member)(i) for i in get_connect.json()["data"]],
                 "next": get_connect.json()["next"]}
 
     async def get_channel_members_details(self,
@@ -252,9 +272,9 @@ class GuildMemberApi(BaseBotApi):
         :return: Member类型的guild_id 指定的频道中 user_id 对应成员的详细信息"""
         get_connect = GetConnect(f"/guilds/{guild_id}/members/{user_id}",
                                  self.access_token,
-                                 self.public_url)
+                                 self.public_url, session=self.session)
         await get_connect.apply()
-        return Member(**get_connect.json())
+        return decoder_for(Member)(get_connect.json())
 
     async def delete_channel_member(self,
                                     guild_id: str | int | Guild,
@@ -278,8 +298,7 @@ class GuildMemberApi(BaseBotApi):
             raise UnknownKwargs("delete_history_msg_days", [3, 7, 15, 30, -1, 0], delete_history_msg_days)
         delete_requests = DeleteRequests(f"/guilds/{guild_id}/members/{user_id}",
                                          self.access_token,
-                                         self.public_url,
-                                         )
+                                         self.public_url, session=self.session)
         await delete_requests.apply()
         delete_requests.verify_data()
         return
@@ -287,10 +306,23 @@ class GuildMemberApi(BaseBotApi):
 
 # 消息相关API
 class MessageSendReceiveAPI(BaseBotApi):
+    """消息发送相关API
+    :param rate_limiter: 发送限频器，不填则使用进程级共享限频器，超出频率的发送会在本地排队等待
+    :param quota: 子频道主动消息每日额度，不填则不在本地检查
+    :param reply_window: 被动回复窗口，用于自动分配 msg_seq 并处理过期的 msg_id，不填则原样发送；
+        fallback 为 "drop" 时回复已过期的 msg_id 会抛出 ReplyWindowExpired"""
+
     def __init__(self,
                  access_token: str,
-                 is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+                 is_sandbox: bool = False,
+                 session: SessionManager | None = None,
+                 rate_limiter: RateLimiter | None = None,
+                 quota: ActiveMessageQuota | None = None,
+                 reply_window: ReplyWindow | None = None):
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.quota = quota
+        self.reply_window = reply_window
 
     async def post_dms(self,
                        openid: str,
@@ -317,12 +349,20 @@ class MessageSendReceiveAPI(BaseBotApi):
         :param message_reference: 【暂未支持】消息引用
         :param event_id: 前置收到的事件 ID，用于发送被动消息，支持事件："INTERACTION_CREATE"、"C2C_MSG_RECEIVE"、"FRIEND_ADD"
         :param msg_seq: 前置收到的用户发送过来的消息 ID，用于发送被动（回复）消息
+        :raise ReplyWindowExpired: 配置了 fallback 为 "drop" 的 reply_window 且 msg_id 的被动回复已过期
         """
+        if msg_id is not None and self.reply_window is not None:
+            reply = self.reply_window.resolve(msg_id, msg_seq)
+            if reply is None:
+                raise ReplyWindowExpired(msg_id)
+            msg_id, msg_seq = reply
         data = {
             "content": content,
             "msg_id": msg_id,
             "msg_type": msg_type.type
         }
+        if msg_seq is not None:
+            data["msg_seq"] = msg_seq
         if message_reference is not None:
             raise (
                 UnSupposeUsage("message_reference"))
@@ -347,7 +387,9 @@ class MessageSendReceiveAPI(BaseBotApi):
                 data["ark"] = ark.to_dict()
             elif msg_type == 4:
                 data["media"] = media.to_dict()
-        post_connect = PostConnect(f"/v2/users/{openid}/messages", self.access_token, data, self.public_url)
+        await self.rate_limiter.acquire("c2c", openid)
+        post_connect = PostConnect(f"/v2/users/{openid}/messages", self.access_token, data, self.public_url,
+                                   session=self.session)
         await post_connect.apply()
         return C2CMessageInfo(
             **post_connect.json())
@@ -363,7 +405,8 @@ class MessageSendReceiveAPI(BaseBotApi):
                                     image: Optional[str] = None,
                                     msg_id: Optional[str] = None,
                                     mention: Optional[str] = None,
-                                    mention_everyone: bool = False
+                                    mention_everyone: bool = False,
+                                    guild_id: str | None = None
                                     ) -> ChannelMessageInfo:
         """功能描述
     用于向 channel_id 指定的子频道发送消息。
@@ -387,7 +430,15 @@ class MessageSendReceiveAPI(BaseBotApi):
     :param makedown: 选填，markdown 消息
     :param mention: 要@的人的ID
     :param mention_everyone: 是否@所有人
+    :param guild_id: 选填，子频道所属的频道ID，配置了 quota 时用于检查每个频道每天 2 个子频道的主动消息限制
+    :raise ReplyWindowExpired: 配置了 fallback 为 "drop" 的 reply_window 且 msg_id 的被动回复已过期
 """
+        if msg_id is not None and self.reply_window is not None:
+            # 子频道消息没有 msg_seq，只检查有效期，不分配序号
+            reply = self.reply_window.resolve(msg_id, allocate=False)
+            if reply is None:
+                raise ReplyWindowExpired(msg_id)
+            msg_id = reply[0]
         if content is None and makedown is None and ark is None and embed is None:
             raise (
                 WrongArgs("content, embed, ark, image/file_image, markdown 至少需要有一个字段，否则无法下发消息。"))
@@ -431,9 +482,14 @@ class MessageSendReceiveAPI(BaseBotApi):
                 data = {
                     "content": "<qqbot-at-everyone /> " + content
                 }
-        post_connect = PostConnect(f"/channels/{channel_id}/messages", self.access_token, data, self.public_url)
-        await post_connect.apply()
-        response = post_connect.json()
+        # 既没有 msg_id 也没有 event_id 的是主动消息，需要占用每日额度
+        active = self.quota is not None and msg_id is None and event_id is None
+        async with self.quota.reserve(channel_id, guild_id) if active else nullcontext():
+            await self.rate_limiter.acquire("channel", channel_id)
+            post_connect = PostConnect(f"/channels/{channel_id}/messages", self.access_token, data, self.public_url,
+                                       session=self.session)
+            await post_connect.apply()
+            response = post_connect.json()
         return ChannelMessageInfo(
             id=response["id"],
             channel_id=response["channel_id"],
@@ -482,8 +538,13 @@ class MessageSendReceiveAPI(BaseBotApi):
         :param msg_id: 前置收到的用户发送过来的消息 ID，用于发送被动消息（回复）
         :param msg_seq: 回复消息的序号，与 msg_id 联合使用，避免相同消息id回复重复发送，不填默认是 1。相同的 msg_id + msg_seq 重复发送会失败。
         :param mention: 要@的人的ID
+        :raise ReplyWindowExpired: 配置了 fallback 为 "drop" 的 reply_window 且 msg_id 的被动回复已过期
         """
-
+        if msg_id is not None and self.reply_window is not None:
+            reply = self.reply_window.resolve(msg_id, msg_seq)
+            if reply is None:
+                raise ReplyWindowExpired(msg_id)
+            msg_id, msg_seq = reply
         data = {
             "content": content,
             "msg_type": msg_type
@@ -527,8 +588,9 @@ class MessageSendReceiveAPI(BaseBotApi):
             data["msg_id"] = msg_id
         if msg_seq is not None:
             data["msg_seq"] = msg_seq
+        await self.rate_limiter.acquire("group", group_openid)
         post_connect = PostConnect(f"/v2/groups/{group_openid}/messages", self.access_token, data,
-                                   self.public_url)
+                                   self.public_url, session=self.session)
         await post_connect.apply()
         return GroupMessageInfo(id=post_connect.json()["id"], timestamp=post_connect.json()["timestamp"])
 
@@ -552,7 +614,11 @@ class MessageSendReceiveAPI(BaseBotApi):
             "srv_send_msg": srv_send_msg
         }
 
-        post_connect = PostConnect(f"/v2/users/{openid}/files", self.access_token, data, self.public_url)
+        if srv_send_msg:
+            # 直接发送到目标端时与普通消息共用频率
+            await self.rate_limiter.acquire("c2c", openid)
+        post_connect = PostConnect(f"/v2/users/{openid}/files", self.access_token, data, self.public_url,
+                                   session=self.session)
         await post_connect.apply()
         return MediaInfo(**post_connect.json())
 
@@ -580,7 +646,11 @@ class MessageSendReceiveAPI(BaseBotApi):
             "srv_send_msg": srv_send_msg
         }
 
-        post_connect = PostConnect(f"/v2/groups/{group_openid}/files", self.access_token, data, self.public_url)
+        if srv_send_msg:
+            # 直接发送到目标端时与普通消息共用频率
+            await self.rate_limiter.acquire("group", group_openid)
+        post_connect = PostConnect(f"/v2/groups/{group_openid}/files", self.access_token, data, self.public_url,
+                                   session=self.session)
         await post_connect.apply()
         return MediaInfo(**post_connect.json())
 
@@ -591,7 +661,7 @@ class MessageSendReceiveAPI(BaseBotApi):
         :param openid: QQ 用户的 openid
         :param message_id: 消息ID"""
         delete_requests = DeleteRequests(f"/v2/users/{openid}/messages/{message_id}", self.access_token,
-                                         self.public_url)
+                                         self.public_url, session=self.session)
         await delete_requests.apply()
         delete_requests.verify_data()
         return
@@ -603,7 +673,7 @@ class MessageSendReceiveAPI(BaseBotApi):
         :param group_openid: 群聊的额 openid
         :param message_id: 消息ID"""
         delete_requrests = DeleteRequests(f"/v2/groups/{group_openid}/messages/{message_id}", self.access_token,
-                                          self.public_url)
+                                          self.public_url, session=self.session)
         await delete_requrests.apply()
         delete_requrests.verify_data()
         return
@@ -623,7 +693,7 @@ class MessageSendReceiveAPI(BaseBotApi):
         :param message_id: 消息ID
         :param hidetip: 选填，是否隐藏提示小灰条，true 为隐藏，false 为显示。默认为false"""
         delete_requests = DeleteRequests(f"/channels/{channel_id}/messages/{message_id}?hidetip={hidetip}",
-                                         self.access_token, self.public_url)
+                                         self.access_token, self.public_url, session=self.session)
         await delete_requests.apply()
         delete_requests.verify_data()
         return
@@ -643,15 +713,15 @@ class MessageSendReceiveAPI(BaseBotApi):
                 :param message_id: 消息ID
                 :param hidetip: 选填，是否隐藏提示小灰条，true 为隐藏，false 为显示。默认为false"""
         delete_requests = DeleteRequests(f"/dms/{guild_id}/messages/{message_id}?hidetip={hidetip}",
-                                         self.access_token, self.public_url)
+                                         self.access_token, self.public_url, session=self.session)
         await delete_requests.apply()
         delete_requests.verify_data()
         return
 
 
 class MessageExpressionInteraction(BaseBotApi):
-    def __init__(self, access_token: str, is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+    def __init__(self, access_token: str, is_sandbox: bool = False, session: SessionManager | None = None):
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
 
     async def send_reaction_expression(self,
                                        channel_id: str,
@@ -664,7 +734,7 @@ class MessageExpressionInteraction(BaseBotApi):
         :param emoji: 包含type（表情类型）和id（表情ID）的Emoji对象
         """
         put_requests = PutRequests(f"/channels/{channel_id}/messages/{message_id}/reactions/{emoji.type}/{emoji.id}",
-                                   self.access_token, self.public_url)
+                                   self.access_token, self.public_url, session=self.session)
         await put_requests.apply()
         return
 
@@ -678,7 +748,7 @@ class MessageExpressionInteraction(BaseBotApi):
         :param emoji: Emoji类型，包含了type和id"""
         delete_requests = DeleteRequests(
             f"/channels/{channel_id}/messages/{message_id}/reactions/{emoji.type}/{emoji.id}",
-            self.access_token, self.public_url)
+            self.access_token, self.public_url, session=self.session)
         await delete_requests.apply()
         return
 
@@ -698,7 +768,8 @@ class MessageExpressionInteraction(BaseBotApi):
         if limit > 50 or limit < 1:
             raise UnknownKwargs("limit", "20和50间", limit)
         get_connect = GetConnect(f"/channels/{channel_id}/messages/{message_id}/reactions/{emoji.type}/{emoji.id}",
-                                 self.access_token, self.public_url, query={"cookie": cookie, "limit": limit})
+                                 self.access_token, self.public_url, query={"cookie": cookie, "limit": limit},
+                                 session=self.session)
         await get_connect.apply()
         response = get_connect.json()
         return Reaction(
@@ -711,9 +782,25 @@ class BotAPI(WebSocketAPI,
              MessageSendReceiveAPI,
              MessageExpressionInteraction,
              GuildMemberApi):
-    """便于用户快速调用所有API，这是一个通用接口"""
+    """便于用户快速调用所有API，这是一个通用接口
+    :param session: 自定义连接池，不填则使用进程级共享连接池
+    :param http2: 是否启用 HTTP/2 多路复用，大量并发发送消息时可显著减少连接数，需要安装 h2
+    :param rate_limiter: 发送限频器，不填则使用进程级共享限频器
+    :param quota: 子频道主动消息每日额度，不填则不在本地检查
+    :param reply_window: 被动回复窗口，用于自动分配 msg_seq 并处理过期的 msg_id，不填则原样发送；
+        fallback 为 "drop" 时回复已过期的 msg_id 会抛出 ReplyWindowExpired"""
 
     def __init__(self,
                  access_token: str,
-                 is_sandbox: bool = False):
-        super().__init__(access_token=access_token, is_sandbox=is_sandbox)
+                 is_sandbox: bool = False,
+                 session: SessionManager | None = None,
+                 http2: bool = False,
+                 rate_limiter: RateLimiter | None = None,
+                 quota: ActiveMessageQuota | None = None,
+                 reply_window: ReplyWindow | None = None):
+        if session is None:
+            session = get_session(http2=http2)
+        super().__init__(access_token=access_token, is_sandbox=is_sandbox, session=session)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.quota = quota
+        self.reply_window = reply_window
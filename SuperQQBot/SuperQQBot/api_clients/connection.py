@@ -1,12 +1,16 @@
+import asyncio
 from abc import ABC
-from datetime import datetime
-from json import dumps, JSONDecodeError
 from typing import Optional
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from .exceptions import *
+from ..logger.logger import WebHookLogger
+from ..utils import codec
+from ..utils.timestamp import parse_timestamp
+
+_log = WebHookLogger()
 
 Authorization_TYPES = "QQBot"
 
@@ -23,65 +27,241 @@ def my_ipaddress() -> str:
         return "未知"
 
 
+class SessionManager:
+    """HTTP连接池管理器
+
+    每个 base_url 只持有一个长连接的 httpx.AsyncClient，所有请求类共享，
+    避免每次调用都重新进行 TCP+TLS 握手。可以通过 aclose() 或 async with 显式释放。
+    开启 http2 后并发请求会在少量连接上多路复用，需要安装 h2（pip install httpx[http2]）。
+    transport 会原样传给 httpx.AsyncClient，可用于自定义传输层（如测试时使用 httpx.MockTransport）。"""
+
+    def __init__(self,
+                 limits: httpx.Limits | None = None,
+                 timeout: httpx.Timeout | None = None,
+                 http2: bool = False,
+                 transport: httpx.AsyncBaseTransport | None = None):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise MissingDependency("h2", "httpx[http2]") from None
+        self.http2 = http2
+        self.limits = limits or httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        self.timeout = timeout or httpx.Timeout(10.0, connect=5.0, read=10.0)
+        self.transport = transport
+        # base_url -> (创建时所在的事件循环, 客户端)
+        self._clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        # base_url -> [已发出的请求数, 已收到的响应数]，由 httpx 的事件钩子计数
+        self._counters: dict[str, list[int]] = {}
+        self._created = 0
+
+    def _client_options(self, base_url: str) -> dict:
+        """创建 base_url 对应客户端时传给 httpx.AsyncClient 的参数，子类可以在此基础上修改"""
+        counter = self._counters.setdefault(base_url, [0, 0])
+
+        async def on_request(request: httpx.Request) -> None:
+            counter[0] += 1
+
+        async def on_response(response: httpx.Response) -> None:
+            counter[1] += 1
+
+        return {"limits": self.limits, "timeout": self.timeout, "http2": self.http2, "transport": self.transport,
+                "event_hooks": {"request": [on_request], "response": [on_response]}}
+
+    def _build_client(self, base_url: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self._client_options(base_url))
+
+    @staticmethod
+    def _discard(base_url: str, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+        """丢弃在其他事件循环上创建的客户端：该循环仍在运行时交给它关闭，否则只能等待垃圾回收释放连接"""
+        if client.is_closed:
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            _log.warning(f"[QQBot]{base_url} 的连接池创建于已停止的事件循环，无法关闭，连接将在垃圾回收时释放")
+
+    def get_client(self, base_url: str) -> httpx.AsyncClient:
+        """获取 base_url 对应的共享客户端，不存在时创建
+
+        httpx 的连接绑定在创建它的事件循环上，若事件循环已更换（例如多次 asyncio.run）则重新创建。"""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(base_url)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            if entry is not None and entry[0] is not loop:
+                self._discard(base_url, *entry)
+            entry = (loop, self._build_client(base_url))
+            self._clients[base_url] = entry
+            self._created += 1
+        return entry[1]
+
+    def stats(self) -> dict[str, dict[str, int | bool]]:
+        """连接池统计信息，以 base_url 为键
+
+        http2 为是否启用 HTTP/2，requests 为已发出的请求数，responses 为已收到的响应数，
+        两者之差是进行中或失败的请求数。"""
+        return {
+            base_url: {"http2": self.http2, "requests": requests, "responses": responses}
+            for base_url, (requests, responses) in self._counters.items()
+        }
+
+    @property
+    def clients_created(self) -> int:
+        return self._created
+
+    async def aclose(self) -> None:
+        """关闭所有客户端并释放连接
+
+        在其他事件循环上创建的客户端不能在当前循环中关闭：该循环仍在运行时交给它关闭，
+        已停止时记录警告并丢弃，连接在垃圾回收时释放。"""
+        clients, self._clients = self._clients, {}
+        current = asyncio.get_running_loop()
+        for base_url, (loop, client) in clients.items():
+            if loop is current:
+                await client.aclose()
+            else:
+                self._discard(base_url, loop, client)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+_default_session = SessionManager()
+_default_http2_session: SessionManager | None = None
+
+
+def get_session(http2: bool = False) -> SessionManager:
+    """获取进程级共享的连接池管理器
+    :param http2: 是否获取 HTTP/2 多路复用的连接池"""
+    global _default_http2_session
+    if not http2:
+        return _default_session
+    if _default_http2_session is None:
+        _default_http2_session = SessionManager(http2=True)
+    return _default_http2_session
+
+
+_UNSET = object()
+
+
+class ApiResponse:
+    """接口响应
+
+    响应体只解析一次，解析结果、错误状态均会缓存；timestamp 字段仅在调用 json() 时才转换为 datetime，且只转换一次"""
+
+    __slots__ = ("raw", "_data", "_json", "_is_error")
+
+    def __init__(self, response: httpx.Response):
+        self.raw = response
+        self._data = _UNSET
+        self._json = _UNSET
+        self._is_error = None
+
+    @property
+    def status_code(self) -> int:
+        return self.raw.status_code
+
+    @property
+    def text(self) -> str:
+        return self.raw.text
+
+    @property
+    def data(self) -> dict | list | None:
+        """解析后的原始数据，响应体不是合法 JSON 时为 None"""
+        if self._data is _UNSET:
+            try:
+                self._data = codec.loads(self.raw.content) if self.raw.content else None
+            except codec.DecodeError:
+                self._data = None
+        return self._data
+
+    @property
+    def is_error(self) -> bool:
+        if self._is_error is None:
+            data = self.data
+            self._is_error = not self.raw.is_success or (isinstance(data, dict) and "err_code" in data)
+        return self._is_error
+
+    @property
+    def error_code(self) -> int | None:
+        if self.is_error and isinstance(self.data, dict):
+            return self.data.get("code")
+        return None
+
+    @property
+    def error_reason(self) -> str | None:
+        if self.is_error and isinstance(self.data, dict):
+            return self.data.get("message")
+        return None
+
+    def json(self) -> dict | list | None:
+        """返回 timestamp 已转换为 datetime 的数据"""
+        if self._json is _UNSET:
+            data = self.data
+            if isinstance(data, list):
+                for i in data:
+                    if isinstance(i, dict) and isinstance(i.get("timestamp"), str):
+                        i["timestamp"] = parse_timestamp(i["timestamp"])
+            elif isinstance(data, dict) and isinstance(data.get("timestamp"), str):
+                data["timestamp"] = parse_timestamp(data["timestamp"])
+            self._json = data
+        return self._json
+
+
 class BaseConnect(ABC):
-    def __init__(self, function: str, access_token: str, url: str | bool = False):
+    def __init__(self, function: str, access_token: str, url: str | bool = False,
+                 session: SessionManager | None = None):
         self.response = None
         if not isinstance(url, str):
             url = "https://sandbox.api.sgroup.qq.com" if url else "https://api.sgroup.qq.com/"
-        self.url = url.rstrip("/") + function
+        self.base_url = url.rstrip("/")
+        self.url = self.base_url + function
         self.access_token = access_token
+        self.session = session or _default_session
         self.client = None
+        self._result = None
 
     async def create_client(self):
         if self.client is None:
-            self.client = httpx.AsyncClient(
-                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
-                timeout=httpx.Timeout(10.0, connect=5.0, read=10.0)
-            )
+            self.client = self.session.get_client(self.base_url)
         return self.client
 
+    @property
+    def result(self) -> ApiResponse:
+        """当前响应的包装对象，重试后 response 变化时自动更新"""
+        if self._result is None or self._result.raw is not self.response:
+            self._result = ApiResponse(self.response)
+        return self._result
+
     def is_error(self) -> bool:
-        return self.response.status_code != 200 or "err_code" in self.response.json()
+        return self.result.is_error
 
     def error_reason(self) -> str | None:
-        if self.is_error():
-            return self.response.json()["message"]
-        else:
-            return None
+        return self.result.error_reason
 
     def error_code(self) -> int | None:
-        if self.is_error():
-            return self.response.json()["code"]
-        else:
-            return None
+        return self.result.error_code
 
     def verify_data(self) -> None:
-        if self.error_code() is None:
+        result = self.result
+        if not result.is_error:
             return
-        elif self.error_code() == 11298:
+        elif result.error_code == 11298:
             raise (
                 IPNotInWhiteList(my_ipaddress()))
-        elif self.error_code() == 100007 and self.error_reason() == 'appid invalid':
+        elif result.error_code == 100007 and result.error_reason == 'appid invalid':
             return
         else:
             raise (
                 UnknownException(
-                    f"\nt={self.response.text};c={self.response};r={self.response.request.body};u={self.response.request.url};m={self.response.request.method};r={self.response.reason}"))
+                    f"\nt={self.response.text};c={self.response};r={self.response.request.content};u={self.response.request.url};m={self.response.request.method};r={self.response.reason_phrase}"))
 
-    def json(self) -> dict | None:
+    def json(self) -> dict | list | None:
         self.verify_data()
-        try:
-            json_result = self.response.json()
-            if isinstance(json_result, list):
-                for i in json_result:
-                    if "timestamp" in i.keys():
-                        i["timestamp"] = datetime.fromisoformat(i["timestamp"])
-            else:
-                if "timestamp" in json_result.keys():
-                    json_result["timestamp"] = datetime.fromisoformat(json_result["timestamp"])
-            return json_result
-        except JSONDecodeError:
-            return None
+        return self.result.json()
 
     async def apply(self):
         raise NotImplementedError("子类必须实现 apply() 方法")
@@ -92,19 +272,21 @@ class BaseConnect(ABC):
 
 
 class PostConnect(BaseConnect):
-    def __init__(self, function: str, access_token: str, json: dict | str, url: str | bool = False):
-        super().__init__(function, access_token, url)
+    def __init__(self, function: str, access_token: str, json: dict | str | bytes, url: str | bool = False,
+                 session: SessionManager | None = None):
+        super().__init__(function, access_token, url, session)
         self.response = None
         self.text = None
-        self.json = json
+        # 不能命名为 self.json，否则会覆盖 json() 方法
+        self.payload = json
 
     async def apply(self):
         client = await self.create_client()
         try:
-            if isinstance(self.json, dict):
-                payload = dumps(self.json)
-            elif isinstance(self.json, str):
-                payload = self.json
+            if isinstance(self.payload, dict):
+                payload = codec.dumps(self.payload)
+            elif isinstance(self.payload, (str, bytes)):
+                payload = self.payload
             else:
                 raise ValueError("Invalid JSON payload")
 
@@ -121,8 +303,9 @@ class PostConnect(BaseConnect):
 
 
 class GetConnect(BaseConnect):
-    def __init__(self, function: str, access_token: str, url: str | bool = False, query: Optional[dict] = None):
-        super().__init__(function, access_token, url)
+    def __init__(self, function: str, access_token: str, url: str | bool = False, query: Optional[dict] = None,
+                 session: SessionManager | None = None):
+        super().__init__(function, access_token, url, session)
         self.query = query
 
     async def apply(self):
@@ -147,8 +330,9 @@ class DeleteRequests(BaseConnect):
                  access_token: str,
                  url: str | bool = False,
                  headers: Optional[dict] = None,
-                 json_data: Optional[dict] = None):  # 新增 json_data 参数
-        super().__init__(function, access_token, url)
+                 json_data: Optional[dict] = None,  # 新增 json_data 参数
+                 session: SessionManager | None = None):
+        super().__init__(function, access_token, url, session)
         self.headers = headers
         self.json_data = json_data  # 存储 JSON 数据
         self.response = None
@@ -174,8 +358,9 @@ class DeleteRequests(BaseConnect):
 
 
 class PutRequests(BaseConnect):
-    def __init__(self, function: str, access_token: str, url: str | bool = False):
-        super().__init__(function, access_token, url)
+    def __init__(self, function: str, access_token: str, url: str | bool = False,
+                 session: SessionManager | None = None):
+        super().__init__(function, access_token, url, session)
         self.response = None
         self.text = None
 
@@ -161,10 +161,42 @@ class NetworkError(Exception):
         return f"网络出现问题：{self.err}"
 
 
+class MissingDependency(Exception):
+    def __init__(self, module, install_name):
+        super().__init__(module, install_name)
+        self.module = module
+        self.install_name = install_name
+
+    def __str__(self):
+        return f"缺少可选依赖{self.module}，请执行 pip install {self.install_name} 后重试"
+
+
 class UnknownError(Exception):
     def __init__(self, err):
         super().__init__(err)
         self.err = err
 
     def __str__(self):
-        return f"未知的错误：{self.err}"
\ No newline at end of file
+        return f"未知的错误：{self.err}"
+
+
+class ActiveQuotaExceeded(Exception):
+    def __init__(self, channel_id, guild_id=None, reason="channel"):
+        super().__init__(channel_id, guild_id, reason)
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.reason = reason
+
+    def __str__(self):
+        if self.reason == "guild":
+            return f"频道{self.guild_id}今日可主动推送的子频道数已用完，无法向子频道{self.channel_id}推送主动消息"
+        return f"子频道{self.channel_id}今日的主动消息额度已用完"
+
+
+class ReplyWindowExpired(Exception):
+    def __init__(self, msg_id):
+        super().__init__(msg_id)
+        self.msg_id = msg_id
+
+    def __str__(self):
+        return f"消息{self.msg_id}的被动回复已过期，已放弃发送"
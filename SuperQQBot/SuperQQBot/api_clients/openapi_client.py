@@ -1,5 +1,8 @@
+import asyncio
 from time import time
+from typing import Callable
 from .connection import PostConnect, my_ipaddress
+from .token_cache import TokenCache
 from . import exceptions
 from ..logger.logger import WebHookLogger
 
@@ -7,30 +10,142 @@ logger = WebHookLogger()
 
 # AccessToken类
 class Token:
-    def __init__(self, appId: str, client_secret: str):
+    """AccessToken管理器
+
+    官方允许在过期前 60 秒内获取新的 AccessToken（旧的依然有效），因此在剩余时间小于 refresh_ahead 时
+    会在后台提前刷新，发送消息的路径不会因为刷新而阻塞；并发刷新只会发出一次请求。
+    :param refresh_ahead: 提前刷新的秒数，需要小于 60 才能拿到新的 AccessToken
+    :param cache: 可选的 AccessToken 文件缓存，多进程部署时可避免每个进程启动都请求一次
+
+    可通过 add_hook() 注册回调，AccessToken 变化后以新的 AccessToken 为参数调用。"""
+
+    def __init__(self, appId: str, client_secret: str, refresh_ahead: float = 50,
+                 cache: TokenCache | None = None):
         self.appId = appId
         self.client_secret = client_secret
         self.access_token = None
         self.active_time = None
         self.start = float()
-        self.renew_access_token()
+        self.refresh_ahead = refresh_ahead
+        self.cache = cache
+        self._refresh_task: asyncio.Task | None = None
+        self._auto_refresh_task: asyncio.Task | None = None
+        self._hooks: list[Callable[[str], None]] = []
+
+    def add_hook(self, hook: Callable[[str], None]) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str], None]) -> None:
+        self._hooks.remove(hook)
 
     def validate_access_token(self) -> bool:
         return self.access_token is not None and self.active_time is not None
 
     async def get_access_token(self) -> str:
-        if not self.validate_access_token():
-            raise exceptions.UnknownAccessToken()
-        elif not self.is_access_token_activity():
+        if not self.validate_access_token() or not self.is_access_token_activity():
+            # 没有可用的 AccessToken，只能等待刷新完成
             return await self.renew_access_token()
-        else:
-            return self.access_token
+        if self.remaining_time() < self.refresh_ahead:
+            self.refresh_in_background()
+        return self.access_token
 
     def is_access_token_activity(self) -> bool:
         return time() - self.start < self.active_time
 
-    async def renew_access_token(self):
-        self.start = time()
+    def remaining_time(self) -> float:
+        """AccessToken剩余有效秒数"""
+        if not self.validate_access_token():
+            return 0.0
+        return max(0.0, self.start + self.active_time - time())
+
+    async def renew_access_token(self) -> str:
+        """刷新AccessToken，并发调用共享同一个请求"""
+        if (self._refresh_task is None or self._refresh_task.done()
+                or self._refresh_task.get_loop() is not asyncio.get_running_loop()):
+            self._refresh_task = asyncio.create_task(self._refresh())
+        # shield 防止某个调用方被取消时连带取消其他调用方共享的请求
+        return await asyncio.shield(self._refresh_task)
+
+    def refresh_in_background(self) -> None:
+        """在后台刷新AccessToken，不等待结果"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        task = asyncio.ensure_future(self.renew_access_token())
+        task.add_done_callback(self._log_background_error)
+
+    @staticmethod
+    def _log_background_error(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"[QQBot]后台刷新AccessToken失败：{task.exception()}")
+
+    def start_auto_refresh(self, retry_interval: float = 5) -> asyncio.Task:
+        """启动后台定时刷新，在过期前 refresh_ahead 秒自动刷新
+        :param retry_interval: 刷新失败后的重试间隔（秒）"""
+        if self._auto_refresh_task is None or self._auto_refresh_task.done():
+            self._auto_refresh_task = asyncio.create_task(self._auto_refresh(retry_interval))
+        return self._auto_refresh_task
+
+    async def _auto_refresh(self, retry_interval: float) -> None:
+        while True:
+            # 至少间隔 1 秒，避免服务端返回旧 AccessToken 时空转
+            await asyncio.sleep(max(1.0, self.remaining_time() - self.refresh_ahead))
+            try:
+                await self.renew_access_token()
+            except Exception as e:
+                logger.error(f"[QQBot]定时刷新AccessToken失败，{retry_interval}秒后重试：{e}")
+                await asyncio.sleep(retry_interval)
+
+    async def close(self) -> None:
+        """停止后台刷新"""
+        for task in (self._auto_refresh_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._auto_refresh_task = None
+        self._refresh_task = None
+
+    async def _refresh(self) -> str:
+        previous = self.access_token
+        access_token = await self._fetch_access_token()
+        if access_token != previous:
+            for hook in self._hooks:
+                try:
+                    hook(access_token)
+                except Exception as e:
+                    logger.error(f"[QQBot]AccessToken更新回调出错：{e!r}")
+        return access_token
+
+    def _use_cached(self) -> bool:
+        """尝试使用缓存中的 AccessToken，剩余时间不足 refresh_ahead 的视为不可用"""
+        cached = self.cache.load(self.appId)
+        if cached is None:
+            return False
+        access_token, expires_at = cached
+        start = time()
+        if expires_at - start <= self.refresh_ahead or access_token == self.access_token:
+            return False
+        self.access_token, self.active_time, self.start = access_token, expires_at - start, start
+        logger.info(f"[QQBot]使用缓存的AccessToken，剩余存活时间：{int(self.active_time)}")
+        return True
+
+    async def _fetch_access_token(self) -> str:
+        if self.cache is None:
+            return await self._request_access_token()
+        if self._use_cached():
+            return self.access_token
+        async with self.cache.lock():
+            # 等锁期间其他进程可能已经刷新过了
+            if self._use_cached():
+                return self.access_token
+            access_token = await self._request_access_token()
+            self.cache.save(self.appId, access_token, self.start + self.active_time)
+            return access_token
+
+    async def _request_access_token(self) -> str:
+        start = time()
         post_connect = PostConnect(
             url="https://bots.qq.com",
             function="/app/getAppAccessToken",
@@ -42,7 +157,7 @@ class Token:
             if post_connect.error_code() == 100007:
                 raise exceptions.UnknownAppId(self.appId)
             elif post_connect.error_reason() == "internal err":
-                raise exceptions.IPNotInWhiteList(ipaddress=await my_ipaddress())
+                raise exceptions.IPNotInWhiteList(ipaddress=my_ipaddress())
             elif post_connect.error_reason() == 'invalid appid or secret':
                 raise exceptions.AppIdAndSecretDoNotMatch()
             else:
@@ -51,9 +166,11 @@ class Token:
         else:
             response = post_connect.json()
             try:
-                self.access_token = response["access_token"]
-                self.active_time = int(response["expires_in"])
+                access_token = response["access_token"]
+                active_time = int(response["expires_in"])
             except KeyError:
                 raise exceptions.UnknownException(response)
+            # 三个字段一起更新，避免其他协程读到不一致的状态
+            self.access_token, self.active_time, self.start = access_token, active_time, start
             logger.info(f"[QQBot]AccessToken存活时间：{self.active_time}")
             return self.access_token
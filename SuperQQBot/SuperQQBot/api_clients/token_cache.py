@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import tempfile
+from time import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class _FileLock:
+    """跨进程文件锁，在线程中阻塞获取，不会卡住事件循环"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def _acquire(self) -> None:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == "nt":
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK 重试 10 次后仍失败会抛出异常，继续等待即可
+                        continue
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    async def __aenter__(self):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # 线程无法被取消，拿到锁后立即释放，否则锁会一直被占用
+            acquiring.add_done_callback(self._release_after_cancel)
+            raise
+        return self
+
+    def _release_after_cancel(self, acquiring: asyncio.Future) -> None:
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            self._release()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._release()
+
+
+class TokenCache:
+    """AccessToken文件缓存
+
+    同一台机器上的多个进程共享 AccessToken，在有效期内重启的进程直接复用，不再请求 /app/getAppAccessToken。
+    写入采用临时文件 + 原子替换，刷新时持有文件锁，同一时刻只有一个进程会真正发起请求。
+    :param path: 缓存文件路径，默认为 ~/.superqqbot/token_cache.json"""
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".superqqbot", "token_cache.json")
+        self.path = os.fspath(path)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, UnicodeDecodeError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _expires_at(record) -> float | None:
+        """记录的过期时间，格式不正确时返回 None"""
+        try:
+            return float(record["expires_at"])
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def load(self, appId: str) -> tuple[str, float] | None:
+        """读取缓存
+        :return: (access_token, 过期的时间戳)，没有缓存或已过期时返回 None"""
+        record = self._read_all().get(str(appId))
+        expires_at = self._expires_at(record)
+        if expires_at is None or expires_at <= time() or not isinstance(record.get("access_token"), str):
+            return None
+        return record["access_token"], expires_at
+
+    def save(self, appId: str, access_token: str, expires_at: float) -> None:
+        """写入缓存，调用方需持有 lock()"""
+        data = self._read_all()
+        now = time()
+        # 顺便清理已经过期与格式不正确的记录
+        data = {key: value for key, value in data.items() if (self._expires_at(value) or 0) > now}
+        data[str(appId)] = {"access_token": access_token, "expires_at": expires_at}
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def lock(self) -> _FileLock:
+        """获取跨进程的刷新锁"""
+        return _FileLock(self.path + ".lock")
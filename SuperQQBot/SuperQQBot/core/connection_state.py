@@ -0,0 +1,112 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from enum import Enum
+from typing import Any, Callable
+
+
+class ConnectionState(str, Enum):
+    """网关连接状态"""
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    IDENTIFYING = "identifying"
+    RESUMING = "resuming"
+    READY = "ready"
+    BACKOFF = "backoff"
+    CLOSED = "closed"
+
+
+_ALLOWED: dict[ConnectionState, set[ConnectionState]] = {
+    ConnectionState.DISCONNECTED: {ConnectionState.CONNECTING},
+    ConnectionState.CONNECTING: {ConnectionState.IDENTIFYING, ConnectionState.RESUMING, ConnectionState.BACKOFF},
+    ConnectionState.IDENTIFYING: {ConnectionState.READY, ConnectionState.BACKOFF},
+    # Resume 失败（op=9）后改为 Identify
+    ConnectionState.RESUMING: {ConnectionState.READY, ConnectionState.IDENTIFYING, ConnectionState.BACKOFF},
+    ConnectionState.READY: {ConnectionState.BACKOFF},
+    ConnectionState.BACKOFF: {ConnectionState.CONNECTING},
+    ConnectionState.CLOSED: {ConnectionState.CONNECTING},
+}
+
+TransitionHook = Callable[[ConnectionState, ConnectionState], Any]
+
+
+class DecorrelatedJitterBackoff:
+    """去相关抖动退避
+
+    每次等待时间在 [base, 上一次等待时间 * 3] 之间随机取值并以 cap 为上限，
+    大量客户端同时断线时重连时间会被打散，不会同时涌向服务端。
+    :param base: 最短等待秒数
+    :param cap: 最长等待秒数"""
+
+    def __init__(self, base: float = 1, cap: float = 60, rng: random.Random | None = None):
+        if base <= 0 or cap < base:
+            raise ValueError("需要满足 0 < base <= cap")
+        self.base = base
+        self.cap = cap
+        self._random = rng or random.Random()
+        self._sleep = base
+
+    def next(self) -> float:
+        """下一次重连前的等待秒数"""
+        self._sleep = min(self.cap, self._random.uniform(self.base, self._sleep * 3))
+        return self._sleep
+
+    def reset(self) -> None:
+        """连接成功后重置"""
+        self._sleep = self.base
+
+
+class ConnectionStateMachine:
+    """连接状态机
+
+    只允许合法的状态转换，并统计每种转换的次数、各状态累计停留时间与重连次数。
+    可通过 add_hook() 注册转换回调，回调参数为 (旧状态, 新状态)，可以是协程函数；
+    任何状态都可以转换到 CLOSED。"""
+
+    def __init__(self):
+        self.state = ConnectionState.DISCONNECTED
+        self.transitions: Counter[str] = Counter()
+        self.time_in_state: Counter[str] = Counter()
+        self.reconnect_attempts = 0
+        self.backoff_time = 0.0
+        self._entered = time.monotonic()
+        self._hooks: list[TransitionHook] = []
+
+    def add_hook(self, hook: TransitionHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: TransitionHook) -> None:
+        self._hooks.remove(hook)
+
+    def can_transition(self, new_state: ConnectionState) -> bool:
+        return new_state is ConnectionState.CLOSED or new_state in _ALLOWED[self.state]
+
+    async def transition(self, new_state: ConnectionState) -> None:
+        """切换状态并调用回调
+        :raise ValueError: 不允许的状态转换"""
+        old_state = self.state
+        if old_state is new_state:
+            return
+        if not self.can_transition(new_state):
+            raise ValueError(f"不允许从 {old_state.value} 转换到 {new_state.value}")
+        now = time.monotonic()
+        self.time_in_state[old_state.value] += now - self._entered
+        self._entered = now
+        self.state = new_state
+        self.transitions[f"{old_state.value}->{new_state.value}"] += 1
+        for hook in self._hooks:
+            result = hook(old_state, new_state)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def stats(self) -> dict[str, Any]:
+        time_in_state = dict(self.time_in_state)
+        time_in_state[self.state.value] = time_in_state.get(self.state.value, 0.0) + time.monotonic() - self._entered
+        return {
+            "state": self.state.value,
+            "transitions": dict(self.transitions),
+            "time_in_state": time_in_state,
+            "reconnect_attempts": self.reconnect_attempts,
+            "backoff_time": self.backoff_time,
+        }
@@ -0,0 +1,347 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple
+
+from ..logger.logger import WebHookLogger
+from ..utils import codec
+
+_log = WebHookLogger()
+
+Decoder = Callable[[dict], Any]
+
+
+class EventRoute(NamedTuple):
+    """事件路由：解码器 + 处理函数名"""
+    decoder: Decoder
+    handler: str
+
+
+class EventDispatcher:
+    """事件分发表
+
+    以事件类型为键做 O(1) 查找，未注册的事件在解析之前就会被丢弃。
+    WebSocket 与 WebHook 两种接入方式共用同一套分发表。"""
+
+    def __init__(self, routes: dict[str, EventRoute] | None = None):
+        self._routes: dict[str, EventRoute] = dict(routes or {})
+
+    def register(self, event_type: str, decoder: Decoder, handler: str) -> None:
+        """注册事件
+        :param event_type: 事件类型，如 AT_MESSAGE_CREATE
+        :param decoder: 将事件的 d 字段转换为事件对象的函数
+        :param handler: 处理函数名，如 on_at_message_create"""
+        self._routes[event_type] = EventRoute(decoder, handler)
+
+    def unregister(self, event_type: str) -> None:
+        self._routes.pop(event_type, None)
+
+    def get(self, event_type: str) -> EventRoute | None:
+        return self._routes.get(event_type)
+
+    def decode(self, event_type: str, payload: dict) -> tuple[str, Any] | None:
+        """解码事件
+        :return: (处理函数名, 事件对象)，未注册的事件返回 None"""
+        route = self._routes.get(event_type)
+        if route is None:
+            return None
+        return route.handler, route.decoder(payload)
+
+    def copy(self) -> "EventDispatcher":
+        return EventDispatcher(self._routes)
+
+    def __contains__(self, event_type: str) -> bool:
+        return event_type in self._routes
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+
+class EventWorkerPool:
+    """有界事件处理池
+
+    事件按 key（一般为 channel_id）固定分配到某个 worker，同一 key 的事件串行处理以保证顺序，
+    不同 key 的事件并发处理。队列满时 submit() 会等待，从而对接收循环形成背压。
+    :param workers: worker 数量
+    :param queue_size: 每个 worker 的队列长度上限"""
+
+    def __init__(self, workers: int = 8, queue_size: int = 1000):
+        if workers < 1:
+            raise ValueError("workers 至少为 1")
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._round_robin = 0
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        # 背压指标：提交时队列已满需要等待的次数与累计等待时间
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.max_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    def _select(self, key: Hashable | None) -> asyncio.Queue:
+        if key is None:
+            self._round_robin = (self._round_robin + 1) % self.workers
+            return self._queues[self._round_robin]
+        return self._queues[hash(key) % self.workers]
+
+    async def submit(self, key: Hashable | None, func: Callable[..., Awaitable], *args) -> None:
+        """提交事件，队列满时等待
+        :param key: 顺序键，相同 key 的事件按提交顺序处理；None 表示无顺序要求
+        :param func: 处理事件的协程函数"""
+        if not self.running:
+            self.start()
+        queue = self._select(key)
+        if queue.full():
+            self.blocked += 1
+            start = time.perf_counter()
+            await queue.put((func, args))
+            self.blocked_time += time.perf_counter() - start
+        else:
+            queue.put_nowait((func, args))
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, queue.qsize())
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            func, args = await queue.get()
+            try:
+                await func(*args)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                _log.error(f"事件处理出错：{e!r}")
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict[str, Any]:
+        depths = [queue.qsize() for queue in self._queues]
+        return {
+            "workers": self.workers,
+            "queue_depths": depths,
+            "pending": sum(depths),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "blocked_time": self.blocked_time,
+        }
+
+    async def join(self) -> None:
+        """等待已提交的事件全部处理完"""
+        for queue in self._queues:
+            await queue.join()
+
+    async def close(self, drain: bool = True, timeout: float | None = None) -> None:
+        """停止所有 worker
+        :param drain: 是否先处理完队列中剩余的事件
+        :param timeout: 等待处理完的最长时间（秒），超时后剩余事件被丢弃"""
+        if drain and self.running:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                _log.warning(f"等待事件处理超时，剩余 {sum(queue.qsize() for queue in self._queues)} 个事件未处理")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+
+class EventQueue:
+    """有界事件队列
+
+    WebHook 立即 ACK 模式使用：请求通过签名校验后事件放入队列即可返回，由 worker 异步处理，处理耗时不影响投递延迟。
+    内存队列满时，设置了 spill_path 则把新事件追加到磁盘文件，内存队列有空位后再按顺序读回；
+    没有设置时 put() 返回 False，由调用方拒绝请求（平台会重试）。
+    spill_path 中未处理完的事件在下次 start() 时会被重新加载。
+    :param handler: 处理事件的协程函数 handler(event_type, data)
+    :param workers: worker 数量，为 1 时严格按接收顺序处理
+    :param maxsize: 内存队列长度上限
+    :param spill_path: 溢出文件路径，不填则不溢出到磁盘"""
+
+    def __init__(self, handler: Callable[[str, dict], Awaitable], workers: int = 4, maxsize: int = 10000,
+                 spill_path: str | None = None):
+        if workers < 1:
+            raise ValueError("workers 至少为 1")
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.spill_path = spill_path
+        # (入队时间, 事件类型, 数据)
+        self._items: deque[tuple[float, str, dict]] = deque()
+        self._spill = None
+        self._spill_offset = 0
+        self._spilled = 0
+        self._not_empty = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._busy = 0
+        self._tasks: list[asyncio.Task] = []
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.spilled = 0
+        self.max_depth = 0
+        self.max_age = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._items) + self._spilled
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._open_spill()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _open_spill(self) -> None:
+        if self.spill_path is None or self._spill is not None:
+            return
+        self._spill = open(self.spill_path, "a+b")
+        self._spill.seek(0)
+        self._spilled = sum(1 for line in self._spill if line.strip())
+        self._spill_offset = 0
+        if self._spilled:
+            _log.info(f"从 {self.spill_path} 恢复了 {self._spilled} 个未处理的事件")
+            self._idle.clear()
+            self._refill()
+
+    def put(self, event_type: str, data: dict) -> bool:
+        """放入事件，不等待
+        :return: 队列已满且不能溢出到磁盘时返回 False"""
+        item = (time.time(), event_type, data)
+        self._open_spill()
+        if not self._spilled and len(self._items) < self.maxsize:
+            self._items.append(item)
+        elif self._spill is not None:
+            # 磁盘上还有事件时新事件也写到磁盘，保证先进先出
+            self._spill.seek(0, 2)
+            self._spill.write(codec.dumps(item) + b"\n")
+            self._spill.flush()
+            self._spilled += 1
+            self.spilled += 1
+        else:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self))
+        self._idle.clear()
+        self._not_empty.set()
+        return True
+
+    def _refill(self) -> None:
+        """从溢出文件读回事件，直到内存队列满或文件读完"""
+        self._spill.seek(self._spill_offset)
+        while self._spilled and len(self._items) < self.maxsize:
+            line = self._spill.readline()
+            if not line:
+                break
+            if line.strip():
+                self._items.append(tuple(codec.loads(line)))
+                self._spilled -= 1
+        self._spill_offset = self._spill.tell()
+        if not self._spilled:
+            self._spill.truncate(0)
+            self._spill_offset = 0
+
+    async def _worker(self) -> None:
+        while True:
+            if not self._items and self._spilled:
+                self._refill()
+            if not self._items:
+                self._not_empty.clear()
+                if not self._busy:
+                    self._idle.set()
+                await self._not_empty.wait()
+                continue
+            enqueued_at, event_type, data = self._items.popleft()
+            self.max_age = max(self.max_age, time.time() - enqueued_at)
+            self._busy += 1
+            try:
+                await self.handler(event_type, data)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                _log.error(f"事件处理出错：{e!r}")
+            finally:
+                self._busy -= 1
+
+    def oldest_age(self) -> float:
+        """队首事件已等待的秒数"""
+        return time.time() - self._items[0][0] if self._items else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "depth": len(self),
+            "memory_depth": len(self._items),
+            "spilled_depth": self._spilled,
+            "oldest_age": self.oldest_age(),
+            "max_age": self.max_age,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "spilled": self.spilled,
+        }
+
+    async def join(self) -> None:
+        """等待队列中的事件全部处理完"""
+        while len(self) or self._busy:
+            self._idle.clear()
+            await self._idle.wait()
+
+    async def close(self, drain: bool = True, timeout: float | None = None) -> None:
+        """停止 worker
+        :param drain: 是否先处理完队列中剩余的事件
+        :param timeout: 等待处理完的最长时间（秒），超时后剩余事件写入溢出文件（如果有）"""
+        if drain and self.running:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                _log.warning(f"等待事件处理超时，剩余 {len(self)} 个事件未处理")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._spill is not None:
+            self._persist()
+            self._spill.close()
+            self._spill = None
+
+    def _persist(self) -> None:
+        """把内存中剩余的事件与尚未读回的溢出事件按顺序重写到溢出文件"""
+        self._spill.seek(self._spill_offset)
+        rest = self._spill.read()
+        self._spill.seek(0)
+        self._spill.truncate(0)
+        for item in self._items:
+            self._spill.write(codec.dumps(item) + b"\n")
+        self._spill.write(rest)
+        self._spill.flush()
+        self._spilled += len(self._items)
+        self._items.clear()
+        self._spill_offset = 0
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+
+class Heartbeat:
+    """心跳调度器
+
+    按单调时钟计算每次心跳的发送时刻（第 n 次心跳在 start + n * interval），不会因为发送耗时或事件循环繁忙而累积漂移；
+    收到 op=11 时调用 ack() 记录往返时间。发送下一次心跳时上一次仍未被确认，则认为连接已僵死并调用 on_zombie。
+    :param interval: 心跳间隔（秒）
+    :param send: 发送心跳的协程函数
+    :param on_zombie: 连接僵死时调用的协程函数，调用后心跳停止
+    :param samples: 计算平均延迟使用的最近样本数"""
+
+    def __init__(self, interval: float, send: Callable[[], Awaitable[Any]],
+                 on_zombie: Callable[[], Awaitable[Any]], samples: int = 10):
+        self.interval = interval
+        self._send = send
+        self._on_zombie = on_zombie
+        self._rtts: deque[float] = deque(maxlen=samples)
+        self._sent_at: float | None = None
+        self._acked = True
+        self.latency: float | None = None
+        self.sent = 0
+        self.acked = 0
+        self.missed = 0
+
+    def ack(self) -> None:
+        """收到心跳确认（op=11）"""
+        if self._acked or self._sent_at is None:
+            return
+        self._acked = True
+        self.acked += 1
+        self.latency = time.monotonic() - self._sent_at
+        self._rtts.append(self.latency)
+
+    @property
+    def average_latency(self) -> float | None:
+        return sum(self._rtts) / len(self._rtts) if self._rtts else None
+
+    async def beat(self) -> None:
+        """立即发送一次心跳（服务端 op=1 要求时也会调用）"""
+        self._sent_at = time.monotonic()
+        self._acked = False
+        self.sent += 1
+        await self._send()
+
+    async def run(self) -> None:
+        next_beat = time.monotonic() + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, next_beat - time.monotonic()))
+            if not self._acked:
+                self.missed += 1
+                await self._on_zombie()
+                return
+            await self.beat()
+            next_beat += self.interval
+            now = time.monotonic()
+            if next_beat < now:
+                # 事件循环被阻塞超过一个周期时不补发，直接对齐到下一个周期
+                next_beat = now + self.interval
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "latency": self.latency,
+            "average_latency": self.average_latency,
+            "sent": self.sent,
+            "acked": self.acked,
+            "missed": self.missed,
+        }
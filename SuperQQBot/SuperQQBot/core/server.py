@@ -0,0 +1,326 @@
+import asyncio
+import warnings
+from typing import Any, Protocol
+
+from ..api_clients import exceptions
+from ..api_clients.openapi_client import Token
+from ..interfaces.validator import Ed25519Validator
+from ..logger.logger import WebHookLogger
+from ..middleware.dedup import EventDeduplicator, event_key
+from .event import EventQueue
+from ..utils import codec
+
+_log = WebHookLogger()
+
+# 平台回调地址支持的端口，其余端口需要经过反向代理
+SUPPORTED_PORTS = (80, 443, 8080, 8443)
+
+OP_DISPATCH = 0
+OP_HTTP_CALLBACK_ACK = 12
+OP_CALLBACK_VALIDATION = 13
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+            501: "Not Implemented", 503: "Service Unavailable"}
+
+_ACK = codec.dumps({"op": OP_HTTP_CALLBACK_ACK})
+
+
+class Validator(Protocol):
+    """回调签名校验，默认实现见 interfaces.validator.Ed25519Validator"""
+
+    async def verify(self, headers: dict[str, str], body: bytes) -> bool:
+        """校验请求签名"""
+
+    def sign_challenge(self, headers: dict[str, str], data: dict) -> dict:
+        """对回调地址验证（op=13）的 d 字段签名，返回响应体"""
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+class WebHookServer:
+    """WebHook 事件接收服务
+
+    基于 asyncio 的精简 HTTP/1.1 服务（支持 keep-alive，只处理带 Content-Length 的 POST），
+    收到的事件交给 client 的分发表处理，与 WebSocket 接入共用同一套 on_xxx 处理函数、worker 池与 message.reply()。
+    client 配置了 workers 时事件进入 worker 池后立即返回 ACK，否则处理完再返回。
+    immediate_ack=True 时事件通过签名校验后放入有界队列即返回 ACK，由队列的 worker 处理，
+    处理函数再慢也不会让平台的投递超时；队列满且没有设置 spill_path 时返回 503，由平台重试。
+    设置 dedup（默认使用 client.dedup）后，平台重试的重复事件直接返回 ACK 不再处理；处理失败的事件会删除去重记录，重试时可以再次处理。
+
+        client = MyClient(Intents.none(), workers=8)
+        WebHookServer(client, port=8080).run(appid, secret)
+
+    :param client: 提供 dispatcher 与 dispatch_event() 的客户端，一般为 old_core.client.Client 的子类
+    :param host: 监听地址
+    :param port: 监听端口，平台只支持 80、443、8080、8443，其余端口会给出警告
+    :param path: 回调路径
+    :param token: AccessToken 管理器，设置后自动刷新并同步到 client.token，供 message.reply() 使用
+    :param validator: 签名校验，不设置时不校验签名，也无法完成回调地址验证
+    :param max_body: 请求体大小上限（字节）
+    :param keep_alive_timeout: 空闲连接的超时时间（秒）
+    :param immediate_ack: 是否入队后立即返回 ACK
+    :param queue_size: 立即 ACK 模式下内存队列的长度上限
+    :param queue_workers: 立即 ACK 模式下处理事件的 worker 数量，为 1 时按接收顺序处理
+    :param spill_path: 立即 ACK 模式下内存队列满时的溢出文件，重启后会继续处理其中的事件
+    :param dedup: 事件去重，不填时使用 client.dedup"""
+
+    def __init__(self, client, host: str = "0.0.0.0", port: int = 8080, path: str = "/",
+                 token: Token | None = None, validator: Validator | None = None,
+                 max_body: int = 1 << 20, keep_alive_timeout: float = 75, immediate_ack: bool = False,
+                 queue_size: int = 10000, queue_workers: int = 4, spill_path: str | None = None,
+                 dedup: EventDeduplicator | None = None):
+        if port not in SUPPORTED_PORTS:
+            warnings.warn(exceptions.UsingPortUnAvailable(port))
+        self.client = client
+        self.host = host
+        self.port = port
+        self.path = path
+        self.token = token
+        self.validator = validator
+        self.dedup = dedup if dedup is not None else getattr(client, "dedup", None)
+        self.max_body = max_body
+        self.keep_alive_timeout = keep_alive_timeout
+        self.server: asyncio.Server | None = None
+        self.queue = EventQueue(self.process_event, queue_workers, queue_size, spill_path) if immediate_ack else None
+        # 连接处理任务 -> 是否正在处理请求
+        self._connections: dict[asyncio.Task, bool] = {}
+        self._closing = False
+        self.requests = 0
+        self.events = 0
+        self.ignored = 0
+        self.rejected = 0
+        self.invalid = 0
+        self.errors = 0
+        self.duplicates = 0
+
+    @property
+    def sockets(self) -> list:
+        return list(self.server.sockets) if self.server is not None else []
+
+    async def start(self) -> None:
+        self._closing = False
+        if self.token is not None:
+            self.client.token = await self.token.get_access_token()
+            self.token.start_auto_refresh()
+        if self.queue is not None:
+            self.queue.start()
+        try:
+            self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        except OSError as e:
+            raise exceptions.NetworkError(f"无法监听 {self.host}:{self.port}：{e}") from e
+        _log.info(f"[QQBot]WebHook 服务已启动，监听 {self.host}:{self.sockets[0].getsockname()[1]}{self.path}")
+
+    async def serve_forever(self) -> None:
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self, drain: bool = True, drain_timeout: float | None = None) -> None:
+        """停止服务
+        :param drain: 是否先处理完已接收的事件（立即 ACK 模式的队列与 client 的 worker 池），
+            否则队列中剩余事件写入溢出文件（如果有）后丢弃
+        :param drain_timeout: 等待事件处理完的最长时间（秒），队列与 worker 池共用"""
+        # 此后正在处理的请求响应后即断开连接，不再等待下一个 keep-alive 请求
+        self._closing = True
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        # 空闲的 keep-alive 连接直接断开，正在处理的请求等它处理完
+        for task, busy in list(self._connections.items()):
+            if not busy:
+                task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        deadline = None if drain_timeout is None else loop.time() + drain_timeout
+        if self.queue is not None:
+            await self.queue.close(drain, drain_timeout)
+        # 事件提交到 worker 池即视为处理完，还要等 worker 池中的事件处理完
+        worker_pool = getattr(self.client, "worker_pool", None)
+        if worker_pool is not None:
+            await worker_pool.close(drain, None if deadline is None else max(deadline - loop.time(), 0))
+        if self.token is not None:
+            await self.token.close()
+
+    def run(self, appid: str, secret: str) -> None:
+        """获取 AccessToken 并阻塞运行，没有设置 validator 时用 secret 创建 Ed25519Validator 校验签名"""
+        self.token = Token(appid, secret)
+        if self.validator is None:
+            self.validator = Ed25519Validator(secret, app_id=appid)
+        asyncio.run(self.serve_forever())
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = False
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError,
+                        ConnectionError):
+                    return
+                self._connections[task] = True
+                keep_alive = True
+                try:
+                    method, path, version, headers = self._parse_head(head)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    length = self._content_length(headers)
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.handle_request(method, path, headers, body)
+                except _BadRequest as e:
+                    self.invalid += 1
+                    status, response, keep_alive = e.status, b"", False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as e:
+                    self.errors += 1
+                    _log.error(f"[QQBot]WebHook 请求处理出错：{e!r}")
+                    status, response, keep_alive = 500, b"", False
+                if self._closing:
+                    keep_alive = False
+                writer.write(self._response_head(status, len(response), keep_alive) + response)
+                await writer.drain()
+                if not keep_alive:
+                    return
+                self._connections[task] = False
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple[str, str, str, dict[str, str]]:
+        try:
+            lines = head[:-4].decode("latin-1").split("\r\n")
+            method, path, version = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise _BadRequest(400)
+        return method, path, version, headers
+
+    def _content_length(self, headers: dict[str, str]) -> int:
+        if "transfer-encoding" in headers:
+            raise _BadRequest(501)
+        value = headers.get("content-length")
+        if value is None:
+            return 0
+        if not value.isdigit():
+            raise _BadRequest(400)
+        length = int(value)
+        if length > self.max_body:
+            raise _BadRequest(413)
+        return length
+
+    @staticmethod
+    def _response_head(status: int, length: int, keep_alive: bool) -> bytes:
+        return (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {length}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+
+    async def handle_request(self, method: str, path: str, headers: dict[str, str], body: bytes) -> tuple[int, bytes]:
+        """处理一个 HTTP 请求
+        :param headers: 小写的请求头
+        :return: (状态码, 响应体)"""
+        self.requests += 1
+        if path.split("?", 1)[0] != self.path:
+            return 404, b""
+        if method != "POST":
+            return 405, b""
+        if self.validator is not None and not await self.validator.verify(headers, body):
+            self.rejected += 1
+            return 401, b""
+        try:
+            payload = codec.loads(body)
+        except codec.DecodeError:
+            self.invalid += 1
+            return 400, b""
+        if not isinstance(payload, dict):
+            self.invalid += 1
+            return 400, b""
+        op = payload.get("op")
+        if op == OP_CALLBACK_VALIDATION:
+            if self.validator is None:
+                _log.error("[QQBot]收到回调地址验证请求，但没有配置 validator，无法完成验证")
+                return 501, b""
+            return 200, codec.dumps(self.validator.sign_challenge(headers, payload.get("d") or {}))
+        if op != OP_DISPATCH:
+            _log.debug(f"[QQBot]收到未知的回调 op={op}，忽略")
+            return 200, _ACK
+        key = None
+        if self.dedup is not None and payload.get("t") in self.client.dispatcher:
+            key = event_key(payload)
+            if await self.dedup.is_duplicate(key):
+                self.duplicates += 1
+                _log.debug(f"[QQBot]重复的 WebHook 事件 {key}，忽略")
+                return 200, _ACK
+        if self.queue is not None:
+            if not self.enqueue_event(payload.get("t"), payload.get("d") or {}):
+                _log.warning("[QQBot]WebHook 事件队列已满，拒绝请求")
+                if self.dedup is not None:
+                    await self.dedup.forget(key)
+                return 503, b""
+            return 200, _ACK
+        try:
+            await self.handle_event(payload.get("t"), payload.get("d") or {})
+        except Exception as e:
+            self.errors += 1
+            _log.error(f"[QQBot]WebHook 事件处理出错：{e!r}")
+            if self.dedup is not None:
+                await self.dedup.forget(key)
+            return 500, b""
+        return 200, _ACK
+
+    def _accept(self, event_type: str) -> bool:
+        if event_type not in self.client.dispatcher:
+            self.ignored += 1
+            _log.debug(f"接收到未注册的事件类型 {event_type}，忽略...")
+            return False
+        self.events += 1
+        return True
+
+    def enqueue_event(self, event_type: str, data: dict) -> bool:
+        """立即 ACK 模式：把事件放入队列
+        :return: 队列已满时返回 False"""
+        if not self._accept(event_type):
+            return True
+        return self.queue.put(event_type, data)
+
+    async def handle_event(self, event_type: str, data: dict) -> None:
+        """把事件交给 client 分发，client 有 worker 池时只入队"""
+        if self._accept(event_type):
+            await self.process_event(event_type, data)
+
+    async def process_event(self, event_type: str, data: dict) -> None:
+        client = self.client
+        if self.token is not None:
+            client.token = self.token.access_token
+        worker_pool = getattr(client, "worker_pool", None)
+        if worker_pool is not None:
+            await worker_pool.submit(client.event_order_key(data), client.dispatch_event, event_type, data)
+        else:
+            await client.dispatch_event(event_type, data)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "events": self.events,
+            "ignored": self.ignored,
+            "rejected": self.rejected,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "duplicates": self.duplicates,
+            "queue": self.queue.stats() if self.queue is not None else None,
+        }
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any
+
+from ..api_clients.exceptions import MissingDependency
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+except ImportError:
+    # 未安装时在创建校验器时报错
+    Ed25519PrivateKey = Ed25519PublicKey = InvalidSignature = None
+
+SIGNATURE_HEADER = "x-signature-ed25519"
+TIMESTAMP_HEADER = "x-signature-timestamp"
+APPID_HEADER = "x-bot-appid"
+
+
+def derive_seed(secret: str) -> bytes:
+    """由机器人密钥生成 Ed25519 种子：密钥重复拼接到至少 32 字节后取前 32 字节"""
+    seed = secret.encode("utf-8")
+    if not seed:
+        raise ValueError("secret 不能为空")
+    while len(seed) < 32:
+        seed *= 2
+    return seed[:32]
+
+
+class Ed25519Validator:
+    """WebHook 回调签名校验
+
+    平台用机器人密钥派生的 Ed25519 私钥对 X-Signature-Timestamp + 请求体签名，放在 X-Signature-Ed25519 请求头中；
+    回调地址验证（op=13）时需要用同一把私钥对 event_ts + plain_token 签名并返回。
+    密钥按 appId 只派生一次并缓存，之后每次校验只做一次验签。单次验签平均耗时超过 offload_threshold 时
+    （请求体很大或机器繁忙），后续验签转到线程池执行，不再阻塞事件循环。需要安装 cryptography。
+    :param secret: 机器人密钥（AppSecret）
+    :param app_id: 机器人 AppID，同一个服务接收多个机器人的回调时用 add_bot() 添加其余机器人
+    :param executor: 验签使用的线程池，不填使用事件循环的默认线程池
+    :param offload_threshold: 转到线程池执行的平均耗时阈值（秒），None 表示始终在事件循环中执行
+    :param max_age: X-Signature-Timestamp 与本机时间相差超过多少秒时拒绝请求，防止截获的请求被重放，None 表示不检查"""
+
+    def __init__(self, secret: str | None = None, app_id: str | None = None, executor: Executor | None = None,
+                 offload_threshold: float | None = 0.0005, max_age: float | None = 300):
+        if Ed25519PrivateKey is None:
+            raise MissingDependency("cryptography", "cryptography")
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+        self.max_age = max_age
+        self._secrets: dict[str, str] = {}
+        # appId -> (私钥, 公钥)
+        self._keys: dict[str, tuple[Ed25519PrivateKey, Ed25519PublicKey]] = {}
+        self._default: str | None = None
+        # 验签耗时的指数滑动平均
+        self._cost = 0.0
+        self.verified = 0
+        self.failed = 0
+        self.offloaded = 0
+        self.expired = 0
+        if secret is not None:
+            self.add_bot(app_id or "", secret)
+
+    def add_bot(self, app_id: str, secret: str) -> None:
+        """添加机器人，第一个添加的机器人作为请求头中没有 AppID 时的默认值"""
+        self._secrets[app_id] = secret
+        self._keys.pop(app_id, None)
+        if self._default is None:
+            self._default = app_id
+
+    def keys(self, app_id: str | None = None) -> tuple[Ed25519PrivateKey, Ed25519PublicKey]:
+        """获取 app_id 的密钥对，每个 app_id 只派生一次
+        :raise KeyError: 未添加该机器人"""
+        if app_id not in self._secrets:
+            # 只有添加过不带 AppID 的机器人时，未知的 AppID 才使用默认密钥
+            if app_id and "" not in self._secrets:
+                raise KeyError(app_id)
+            if self._default is None:
+                raise KeyError("没有添加任何机器人")
+            app_id = self._default
+        keys = self._keys.get(app_id)
+        if keys is None:
+            private_key = Ed25519PrivateKey.from_private_bytes(derive_seed(self._secrets[app_id]))
+            keys = self._keys[app_id] = (private_key, private_key.public_key())
+        return keys
+
+    def sign(self, message: bytes, app_id: str | None = None) -> str:
+        """签名，返回十六进制字符串"""
+        return self.keys(app_id)[0].sign(message).hex()
+
+    def verify_signature(self, signature: str, timestamp: str, body: bytes, app_id: str | None = None) -> bool:
+        """校验 timestamp + body 的签名"""
+        try:
+            raw = bytes.fromhex(signature)
+            public_key = self.keys(app_id)[1]
+        except (ValueError, KeyError):
+            return False
+        # 合法签名的最后一个字节高 3 位必为 0
+        if len(raw) != 64 or raw[63] & 224:
+            return False
+        try:
+            public_key.verify(raw, timestamp.encode("utf-8") + body)
+        except InvalidSignature:
+            return False
+        return True
+
+    def is_fresh(self, timestamp: str) -> bool:
+        """时间戳与本机时间相差不超过 max_age"""
+        try:
+            return abs(time.time() - int(timestamp)) <= self.max_age
+        except ValueError:
+            return False
+
+    def _timed_verify(self, signature: str, timestamp: str, body: bytes, app_id: str | None) -> bool:
+        start = time.perf_counter()
+        valid = self.verify_signature(signature, timestamp, body, app_id)
+        self._cost = self._cost * 0.9 + (time.perf_counter() - start) * 0.1
+        return valid
+
+    async def verify(self, headers: dict[str, str], body: bytes) -> bool:
+        """校验请求签名
+        :param headers: 小写的请求头"""
+        signature = headers.get(SIGNATURE_HEADER)
+        timestamp = headers.get(TIMESTAMP_HEADER)
+        if not signature or not timestamp:
+            self.failed += 1
+            return False
+        if self.max_age is not None and not self.is_fresh(timestamp):
+            self.failed += 1
+            self.expired += 1
+            return False
+        app_id = headers.get(APPID_HEADER)
+        if self.offload_threshold is not None and self._cost > self.offload_threshold:
+            self.offloaded += 1
+            valid = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._timed_verify, signature, timestamp, body, app_id)
+        else:
+            valid = self._timed_verify(signature, timestamp, body, app_id)
+        if valid:
+            self.verified += 1
+        else:
+            self.failed += 1
+        return valid
+
+    def sign_challenge(self, headers: dict[str, str], data: dict) -> dict:
+        """回调地址验证（op=13）：对 event_ts + plain_token 签名"""
+        plain_token = data.get("plain_token", "")
+        event_ts = data.get("event_ts", "")
+        return {"plain_token": plain_token,
+                "signature": self.sign(f"{event_ts}{plain_token}".encode("utf-8"), headers.get(APPID_HEADER))}
+
+    def stats(self) -> dict[str, Any]:
+        return {"verified": self.verified, "failed": self.failed, "expired": self.expired,
+                "offloaded": self.offloaded, "average_cost": self._cost}
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Protocol
+
+# 去重窗口（秒），覆盖网关 Resume 补发与 WebHook 重试的时间范围
+DEDUP_WINDOW = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_events (
+    key TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+)"""
+
+
+def event_key(payload: dict) -> str | None:
+    """事件的去重键：优先使用载荷中的事件ID（id），没有时用事件类型 + 消息ID，两者都没有时返回 None（不去重）"""
+    key = payload.get("id")
+    if key:
+        return str(key)
+    data = payload.get("d")
+    if isinstance(data, dict) and data.get("id"):
+        return f"{payload.get('t')}:{data['id']}"
+    return None
+
+
+class DedupBackend(Protocol):
+    """多进程共享的去重存储，默认实现见 SQLiteDedupBackend"""
+
+    async def add(self, key: str, window: float) -> bool:
+        """记录 key，window 秒内已记录过时返回 False"""
+
+    async def discard(self, key: str) -> None:
+        """删除 key 的记录"""
+
+
+class EventDeduplicator:
+    """事件去重
+
+    网关断线 Resume 后会补发事件，WebHook 没有及时收到 ACK 时会重试，同一个事件可能被收到多次。
+    去重窗口平分为 slots 个时间片，每个时间片对应一个集合，组成环形缓冲区：新的键写入当前时间片，
+    查询时检查全部时间片，时间片轮转时整片丢弃最旧的集合，不需要逐条清理过期记录。
+    当前时间片的记录数达到 max_entries / slots 时提前轮转（有效窗口随之变短），内存占用有固定上限。
+    多进程部署时设置 backend，本地集合未命中的键再到共享存储中检查。
+    :param window: 去重窗口（秒）
+    :param slots: 时间片数量
+    :param max_entries: 窗口内最多记录的键数
+    :param backend: 多进程共享的去重存储"""
+
+    def __init__(self, window: float = DEDUP_WINDOW, slots: int = 10, max_entries: int = 100000,
+                 backend: DedupBackend | None = None):
+        if slots < 1:
+            raise ValueError("slots 至少为 1")
+        self.window = window
+        self.slot_length = window / slots
+        self.slot_capacity = max(1, max_entries // slots)
+        self.backend = backend
+        self._slots: list[set[str]] = [set() for _ in range(slots)]
+        self._current = 0
+        self._slot_started = time.monotonic()
+        self.checked = 0
+        self.duplicates = 0
+        self.shared_duplicates = 0
+        self.early_rotations = 0
+
+    def _advance(self, steps: int) -> None:
+        for _ in range(min(steps, len(self._slots))):
+            self._current = (self._current + 1) % len(self._slots)
+            # 换成新集合，旧集合的哈希表一并释放
+            self._slots[self._current] = set()
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self._slot_started
+        if elapsed < self.slot_length:
+            return
+        steps = int(elapsed // self.slot_length)
+        self._advance(steps)
+        self._slot_started = now if steps >= len(self._slots) else self._slot_started + steps * self.slot_length
+
+    def __contains__(self, key: str) -> bool:
+        self._rotate(time.monotonic())
+        return any(key in slot for slot in self._slots)
+
+    def check(self, key: str) -> bool:
+        """在本地检查并记录 key
+        :return: 窗口内已经见过时返回 True"""
+        now = time.monotonic()
+        self._rotate(now)
+        self.checked += 1
+        for slot in self._slots:
+            if key in slot:
+                self.duplicates += 1
+                return True
+        if len(self._slots[self._current]) >= self.slot_capacity:
+            self.early_rotations += 1
+            self._advance(1)
+            self._slot_started = now
+        self._slots[self._current].add(key)
+        return False
+
+    async def is_duplicate(self, key: str | None) -> bool:
+        """检查并记录 key，key 为 None 时不去重"""
+        if key is None:
+            return False
+        if self.check(key):
+            return True
+        if self.backend is not None and not await self.backend.add(key, self.window):
+            self.duplicates += 1
+            self.shared_duplicates += 1
+            return True
+        return False
+
+    async def forget(self, key: str | None) -> None:
+        """删除 key 的记录，事件处理失败后平台重发时可以再次处理"""
+        if key is None:
+            return
+        for slot in self._slots:
+            slot.discard(key)
+        if self.backend is not None:
+            await self.backend.discard(key)
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self._slots)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "tracked": len(self),
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "shared_duplicates": self.shared_duplicates,
+            "early_rotations": self.early_rotations,
+        }
+
+
+class SQLiteDedupBackend:
+    """基于 SQLite 的共享去重存储，同一台机器上的多个进程（如 ShardLauncher 启动的分片进程、
+    多个 WebHook worker）共用同一个文件即可互相去重。记录与过期判断都由单条语句完成，多进程并发写入也不会重复放行。
+    :param path: 数据库路径，默认为 ~/.superqqbot/dedup.db
+    :param purge_interval: 每写入多少条记录清理一次过期记录"""
+
+    def __init__(self, path: str | os.PathLike | None = None, purge_interval: int = 1000):
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".superqqbot", "dedup.db")
+        self.path = os.fspath(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._db.execute(_SCHEMA)
+
+    def _add(self, key: str, window: float) -> bool:
+        now = time.time()
+        with self._lock:
+            added = self._db.execute("INSERT OR IGNORE INTO seen_events (key, seen_at) VALUES (?, ?)",
+                                     (key, now)).rowcount
+            if not added:
+                # 已有记录但超出窗口，视为新事件
+                added = self._db.execute("UPDATE seen_events SET seen_at = ? WHERE key = ? AND seen_at < ?",
+                                         (now, key, now - window)).rowcount
+            if added:
+                self._writes += 1
+                if self._writes % self.purge_interval == 0:
+                    self._db.execute("DELETE FROM seen_events WHERE seen_at < ?", (now - window,))
+        return bool(added)
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM seen_events WHERE key = ?", (key,))
+
+    async def add(self, key: str, window: float) -> bool:
+        return await asyncio.to_thread(self._add, key, window)
+
+    async def discard(self, key: str) -> None:
+        await asyncio.to_thread(self._discard, key)
+
+    def close(self) -> None:
+        self._db.close()
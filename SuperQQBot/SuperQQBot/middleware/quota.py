@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from ..api_clients.exceptions import ActiveQuotaExceeded
+
+# 平台按北京时间计算每日额度
+PLATFORM_TZ = timezone(timedelta(hours=8))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS active_sends (
+    day TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, guild_id, channel_id)
+)"""
+
+
+class ActiveMessageQuota:
+    """子频道主动消息每日额度
+
+    平台默认每个子频道每天最多 20 条主动消息，每个频道每天最多向 2 个子频道推送主动消息，超出后请求必然失败。
+    发送前在本地预占额度，额度不足时直接拒绝（或等到第二天），不再白白发出请求；发送失败时归还预占的额度。
+    计数保存在 SQLite 中，重启后继续累计，多个进程共用同一个文件时也不会超发。
+    :param path: 数据库路径，默认为 ~/.superqqbot/active_quota.db，":memory:" 表示不持久化
+    :param per_channel: 每个子频道每天的主动消息条数
+    :param channels_per_guild: 每个频道每天可推送主动消息的子频道数
+    :param defer: 额度不足时等到第二天再发送，而不是抛出 ActiveQuotaExceeded"""
+
+    def __init__(self, path: str | os.PathLike | None = None, per_channel: int = 20, channels_per_guild: int = 2,
+                 defer: bool = False):
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".superqqbot", "active_quota.db")
+        self.path = os.fspath(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.per_channel = per_channel
+        self.channels_per_guild = channels_per_guild
+        self.defer = defer
+        self._lock = threading.Lock()
+        # 自动提交模式，由 BEGIN IMMEDIATE 显式开启写事务，多进程之间串行化预占操作
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._db.execute(_SCHEMA)
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(PLATFORM_TZ).date().isoformat()
+
+    @staticmethod
+    def seconds_until_reset() -> float:
+        now = datetime.now(PLATFORM_TZ)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), PLATFORM_TZ)
+        return (tomorrow - now).total_seconds()
+
+    def _used(self, day: str, channel_id: str) -> int:
+        row = self._db.execute("SELECT SUM(count) FROM active_sends WHERE day = ? AND channel_id = ?",
+                               (day, channel_id)).fetchone()
+        return row[0] or 0
+
+    def _guild_channels(self, day: str, guild_id: str) -> set[str]:
+        rows = self._db.execute("SELECT channel_id FROM active_sends WHERE day = ? AND guild_id = ? AND count > 0",
+                                (day, guild_id))
+        return {row[0] for row in rows}
+
+    def _try_reserve(self, channel_id: str, guild_id: str | None) -> str:
+        """预占一条额度，额度不足时抛出 ActiveQuotaExceeded
+        :return: 额度所属的日期"""
+        day = self.today()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._used(day, channel_id) >= self.per_channel:
+                    raise ActiveQuotaExceeded(channel_id, guild_id)
+                if guild_id and channel_id not in (channels := self._guild_channels(day, guild_id)) \
+                        and len(channels) >= self.channels_per_guild:
+                    raise ActiveQuotaExceeded(channel_id, guild_id, reason="guild")
+                self._db.execute(
+                    "INSERT INTO active_sends (day, guild_id, channel_id, count) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (day, guild_id, channel_id) DO UPDATE SET count = count + 1",
+                    (day, guild_id or "", channel_id))
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return day
+
+    def _release(self, day: str, channel_id: str, guild_id: str | None) -> None:
+        with self._lock:
+            self._db.execute("UPDATE active_sends SET count = count - 1 "
+                             "WHERE day = ? AND guild_id = ? AND channel_id = ? AND count > 0",
+                             (day, guild_id or "", channel_id))
+
+    async def acquire(self, channel_id: str | int, guild_id: str | int | None = None) -> str:
+        """预占一条主动消息额度，defer 为 True 时额度不足会等到第二天
+        :param guild_id: 子频道所属的频道ID，不填时只检查子频道自身的额度
+        :return: 额度所属的日期，用于 release()
+        :raise ActiveQuotaExceeded: 额度不足且 defer 为 False"""
+        channel_id, guild_id = str(channel_id), None if guild_id is None else str(guild_id)
+        while True:
+            try:
+                return await asyncio.to_thread(self._try_reserve, channel_id, guild_id)
+            except ActiveQuotaExceeded:
+                if not self.defer:
+                    raise
+            await asyncio.sleep(self.seconds_until_reset() + 1)
+
+    async def release(self, day: str, channel_id: str | int, guild_id: str | int | None = None) -> None:
+        """归还 acquire() 预占的额度"""
+        await asyncio.to_thread(self._release, day, str(channel_id), None if guild_id is None else str(guild_id))
+
+    @asynccontextmanager
+    async def reserve(self, channel_id: str | int, guild_id: str | int | None = None):
+        """预占额度，代码块抛出异常（发送失败）时归还
+
+            async with quota.reserve(channel_id, guild_id):
+                await send()
+        """
+        day = await self.acquire(channel_id, guild_id)
+        try:
+            yield
+        except BaseException:
+            await self.release(day, channel_id, guild_id)
+            raise
+
+    def _remaining(self, channel_id: str, guild_id: str | None) -> int:
+        day = self.today()
+        with self._lock:
+            remaining = max(self.per_channel - self._used(day, channel_id), 0)
+            if guild_id is not None:
+                channels = self._guild_channels(day, guild_id)
+                if channel_id not in channels and len(channels) >= self.channels_per_guild:
+                    return 0
+        return remaining
+
+    def _stats(self, day: str) -> dict[str, dict[str, int]]:
+        result: dict[str, dict[str, int]] = {}
+        with self._lock:
+            rows = self._db.execute("SELECT guild_id, channel_id, count FROM active_sends WHERE day = ?",
+                                    (day,)).fetchall()
+        for guild_id, channel_id, count in rows:
+            result.setdefault(guild_id, {})[channel_id] = count
+        return result
+
+    def _purge(self, cutoff: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM active_sends WHERE day < ?", (cutoff,))
+
+    async def remaining(self, channel_id: str | int, guild_id: str | int | None = None) -> int:
+        """子频道今天还能发送的主动消息条数，guild_id 不为空时同时考虑频道的子频道数限制"""
+        return await asyncio.to_thread(self._remaining, str(channel_id), None if guild_id is None else str(guild_id))
+
+    async def stats(self, day: str | None = None) -> dict[str, dict[str, int]]:
+        """某一天（默认今天）各子频道已使用的主动消息条数，按频道分组"""
+        return await asyncio.to_thread(self._stats, day or self.today())
+
+    async def purge(self, keep_days: int = 2) -> None:
+        """删除 keep_days 天之前的记录"""
+        cutoff = (datetime.now(PLATFORM_TZ).date() - timedelta(days=keep_days)).isoformat()
+        await asyncio.to_thread(self._purge, cutoff)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Any
+
+# 每个发送目标的默认限制：(每秒补充的令牌数, 桶容量)
+# 只包含平台文档明确的限制：子频道每 1s 最多 5 条
+DEFAULT_RULES: dict[str, tuple[float, int]] = {
+    "channel": (5, 5),
+}
+
+# 群聊与单聊没有公开的频率限制，需要时显式启用：RateLimiter({**DEFAULT_RULES, **CONSERVATIVE_RULES})
+CONSERVATIVE_RULES: dict[str, tuple[float, int]] = {
+    "group": (5, 5),
+    "c2c": (5, 5),
+}
+
+
+class TokenBucket:
+    """令牌桶
+
+    令牌按 rate 个/秒补充，最多攒 capacity 个。令牌不足时调用方按到达顺序排队等待，
+    每个等待者预先扣除一个令牌（余量可以为负），睡到自己的令牌补充出来为止，不需要额外的锁和唤醒。
+    :param rate: 每秒补充的令牌数
+    :param capacity: 桶容量，即允许的突发数量"""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate 必须大于 0，capacity 至少为 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.wait_time = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def headroom(self) -> float:
+        """当前无需等待即可发送的数量"""
+        self._refill()
+        return max(self._tokens, 0.0)
+
+    @property
+    def idle(self) -> bool:
+        """桶已回满且没有等待者，与新建的桶等价"""
+        return self.waiting == 0 and self.headroom >= self.capacity
+
+    async def acquire(self) -> float:
+        """取得一个令牌，必要时等待
+        :return: 等待的秒数"""
+        self._refill()
+        self._tokens -= 1
+        self.acquired += 1
+        if self._tokens >= 0:
+            return 0.0
+        delay = -self._tokens / self.rate
+        self.waiting += 1
+        self.delayed += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # 放弃发送时归还令牌，排在后面的等待者不受影响（只是少等一会）
+            self._tokens += 1
+            self.acquired -= 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.wait_time += delay
+        return delay
+
+
+class RateLimiter:
+    """按路由分桶的发送限频器
+
+    配置了规则的路由（channel、group、c2c）下每个发送目标各有一个令牌桶，超出频率的发送在本地排队，
+    而不是发出去再被服务端拒绝。没有配置规则的路由不做限制。
+    :param rules: 路由 -> (每秒令牌数, 桶容量)，默认 DEFAULT_RULES（只限制子频道）
+    :param max_buckets: 桶数量超过该值时清理已回满的空闲桶"""
+
+    def __init__(self, rules: dict[str, tuple[float, int]] | None = None, max_buckets: int = 4096):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.max_buckets = max_buckets
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        # 已清理的桶的累计数据，保证 stats() 中的累计值不会因清理而回退
+        self._retired: dict[str, dict[str, Any]] = {}
+
+    def bucket(self, route: str, key: Any) -> TokenBucket | None:
+        """获取 route 下 key 对应的令牌桶，路由没有规则时返回 None"""
+        rule = self.rules.get(route)
+        if rule is None:
+            return None
+        bucket_key = (route, str(key))
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._evict()
+            bucket = self._buckets[bucket_key] = TokenBucket(*rule)
+        return bucket
+
+    def _evict(self) -> None:
+        for bucket_key in [k for k, bucket in self._buckets.items() if bucket.idle]:
+            bucket = self._buckets.pop(bucket_key)
+            retired = self._retired.setdefault(bucket_key[0], {"acquired": 0, "delayed": 0, "wait_time": 0.0})
+            retired["acquired"] += bucket.acquired
+            retired["delayed"] += bucket.delayed
+            retired["wait_time"] += bucket.wait_time
+
+    async def acquire(self, route: str, key: Any) -> float:
+        """发送前调用，等待 route 下 key 的发送额度
+        :return: 等待的秒数"""
+        bucket = self.bucket(route, key)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire()
+
+    def headroom(self, route: str, key: Any) -> float | None:
+        """route 下 key 当前无需等待即可发送的数量，没有规则时返回 None"""
+        rule = self.rules.get(route)
+        if rule is None:
+            return None
+        bucket = self._buckets.get((route, str(key)))
+        return bucket.headroom if bucket is not None else float(rule[1])
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """按路由汇总：桶数量、当前排队数、累计发送数、累计等待次数与时长"""
+        result = {}
+        for route in {*self.rules, *self._retired}:
+            result[route] = {"buckets": 0, "waiting": 0, "acquired": 0, "delayed": 0, "wait_time": 0.0}
+            result[route].update(self._retired.get(route, {}))
+        for (route, _), bucket in self._buckets.items():
+            stats = result.setdefault(route, {"buckets": 0, "waiting": 0, "acquired": 0, "delayed": 0,
+                                              "wait_time": 0.0})
+            stats["buckets"] += 1
+            stats["waiting"] += bucket.waiting
+            stats["acquired"] += bucket.acquired
+            stats["delayed"] += bucket.delayed
+            stats["wait_time"] += bucket.wait_time
+        return result
+
+
+_default_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程级共享的限频器，未指定 rate_limiter 的消息 API 都使用它"""
+    return _default_rate_limiter
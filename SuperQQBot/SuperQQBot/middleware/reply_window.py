@@ -0,0 +1,101 @@
+import time
+from collections import OrderedDict
+
+from ..logger.logger import WebHookLogger
+
+_log = WebHookLogger()
+
+# 被动回复的有效期（秒）
+REPLY_TTL = 300
+
+
+class ReplyWindow:
+    """被动回复窗口
+
+    记录收到的每条消息的到达时间，为针对同一 msg_id 的多次回复分配递增的 msg_seq
+    （相同的 msg_id + msg_seq 重复发送会失败）。分配过程中没有 await，同一事件循环内并发回复也不会拿到相同的序号。
+    超过有效期的 msg_id 不再作为被动回复发出：fallback 为 "active" 时去掉 msg_id 改为主动消息，
+    为 "drop" 时直接放弃发送（发送接口抛出 ReplyWindowExpired），都不会产生注定失败的请求。
+    :param ttl: 被动回复有效期（秒）
+    :param margin: 提前多少秒视为过期，抵消网络延迟与时钟误差
+    :param fallback: 过期后的处理方式，"active" 或 "drop"
+    :param max_entries: 最多记录的消息数，超过后丢弃最早的记录"""
+
+    def __init__(self, ttl: float = REPLY_TTL, margin: float = 5, fallback: str = "active",
+                 max_entries: int = 100000):
+        if fallback not in ("active", "drop"):
+            raise ValueError("fallback 只能是 \"active\" 或 \"drop\"")
+        self.ttl = ttl
+        self.margin = margin
+        self.fallback = fallback
+        self.max_entries = max_entries
+        # msg_id -> [到达时间, 已分配的最大 msg_seq]，按到达顺序排列
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self.allocated = 0
+        self.expired = 0
+
+    def _purge(self, now: float) -> None:
+        deadline = now - self.ttl
+        entries = self._entries
+        while entries:
+            entry = next(iter(entries.values()))
+            if entry[0] > deadline and len(entries) <= self.max_entries:
+                break
+            entries.popitem(last=False)
+
+    def track(self, msg_id: str) -> None:
+        """记录收到的消息，重复记录不会重置到达时间"""
+        if msg_id in self._entries:
+            return
+        now = time.monotonic()
+        self._entries[msg_id] = [now, 0]
+        self._purge(now)
+
+    def expires_in(self, msg_id: str) -> float | None:
+        """msg_id 距离过期还有多少秒，没有记录时返回 None"""
+        entry = self._entries.get(msg_id)
+        if entry is None:
+            return None
+        return entry[0] + self.ttl - self.margin - time.monotonic()
+
+    def next_seq(self, msg_id: str) -> int | None:
+        """为 msg_id 分配下一个 msg_seq，已过期时返回 None
+
+        没有记录的 msg_id（例如来自其他进程的消息）按现在收到处理。"""
+        now = time.monotonic()
+        entry = self._entries.get(msg_id)
+        if entry is None:
+            entry = self._entries[msg_id] = [now, 0]
+            self._purge(now)
+        elif now - entry[0] >= self.ttl - self.margin:
+            return None
+        entry[1] += 1
+        self.allocated += 1
+        return entry[1]
+
+    def resolve(self, msg_id: str, msg_seq: int | None = None,
+                allocate: bool = True) -> tuple[str | None, int | None] | None:
+        """确定一次回复实际使用的 msg_id 与 msg_seq
+        :param msg_seq: 调用方指定的序号，指定时不再分配，只检查有效期
+        :param allocate: 是否分配 msg_seq，不携带 msg_seq 的接口（如子频道消息）传 False
+        :return: (msg_id, msg_seq)；已过期时 fallback 为 "active" 返回 (None, None)，为 "drop" 返回 None"""
+        if msg_seq is None and allocate:
+            msg_seq = self.next_seq(msg_id)
+            valid = msg_seq is not None
+        else:
+            remaining = self.expires_in(msg_id)
+            valid = remaining is None or remaining > 0
+        if valid:
+            return msg_id, msg_seq
+        self.expired += 1
+        if self.fallback == "drop":
+            _log.warning(f"消息 {msg_id} 的被动回复已过期，放弃发送")
+            return None
+        _log.debug(f"消息 {msg_id} 的被动回复已过期，改为发送主动消息")
+        return None, None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked": len(self._entries), "allocated": self.allocated, "expired": self.expired}
@@ -142,4 +142,13 @@ class UsingPortUnAvailable(Warning):
         return f"正在使用不受官方支持的端口{self.port}"
 class UnAuthenticated(Exception):
     def __str__(self):
-        return "未认证的模组调用"
\ No newline at end of file
+        return "未认证的模组调用"
+
+
+class ReconnectFailedError(Exception):
+    def __init__(self, attempts):
+        super().__init__(attempts)
+        self.attempts = attempts
+
+    def __str__(self):
+        return f"连续重连{self.attempts}次仍未能恢复连接，已停止重连"
@@ -1,20 +1,27 @@
-import json
 import warnings
-from functools import partial
 
 import asyncio
 import websockets
-from dateutil import parser
 
-from .api import MessageSendReceiveAPI
-from .Error import InvalidIntentsError, ExecutionSequenceError
-from .api import WebSocketAPI, Token, GuildManagementApi, BotAPI
-from .connection import get_authorization
+from .Error import InvalidIntentsError, ExecutionSequenceError, ReconnectFailedError
+from .api import WebSocketAPI, GuildManagementApi, BotAPI
+from ..api_clients.connection import SessionManager, get_authorization, get_session
+from ..api_clients.openapi_client import Token
+from .decoders import default_dispatcher
+from ..core.connection_state import ConnectionState, ConnectionStateMachine, DecorrelatedJitterBackoff
+from ..core.event import EventWorkerPool
+from ..core.heartbeat import Heartbeat
+from ..middleware.dedup import EventDeduplicator, event_key
+from ..middleware.reply_window import ReplyWindow
 from .log import get_logger
 from .types import *
+from ..utils import codec
 
 _log = get_logger()
 
+# 这些关闭码表示 Session 已失效，只能重新 Identify
+CANNOT_RESUME_CLOSE_CODES = {4006, 4007, *range(4900, 4914)}
+
 
 class Intents:
     VALID_FLAGS = {
@@ -100,22 +107,68 @@ class Intents:
 
 
 class Client:
-    def __init__(self, intents, is_sandbox=False):
+    def __init__(self, intents, is_sandbox=False, workers: int = 0, queue_size: int = 1000,
+                 shard: tuple[int, int] = (0, 1), max_reconnect_attempts: int | None = None,
+                 reconnect_backoff: DecorrelatedJitterBackoff | None = None, lazy_events: bool = False,
+                 reply_window: ReplyWindow | None = None, dedup: EventDeduplicator | None = None,
+                 session: SessionManager | None = None, http2: bool = False):
+        """
+        :param intents: 订阅的事件
+        :param is_sandbox: 是否使用沙箱环境
+        :param shard: (分片ID, 分片总数)，多分片请使用 ShardedClient
+        :param workers: 事件处理并发数，为 0 时在接收循环中直接处理事件；
+            大于 0 时事件交给 worker 池处理，同一子频道/群的事件仍按顺序处理，慢处理函数不会阻塞接收与心跳
+        :param queue_size: 每个 worker 的待处理事件上限，超过后接收循环会等待（背压）
+        :param max_reconnect_attempts: 连续重连多少次仍未就绪后放弃并抛出 ReconnectFailedError，None 为不限
+        :param reconnect_backoff: 重连退避策略，默认 1~60 秒的去相关抖动退避
+        :param lazy_events: 消息事件延迟解码，每个事件的内存分配约减少一半；只访问 content、author.id 等少数字段时
+            耗时与立即解码相当，访问全部字段时约为立即解码的 2~3 倍，内存不紧张时不建议开启
+        :param reply_window: 被动回复窗口，设置后会记录收到的消息，回复时自动分配 msg_seq 并处理超过 5 分钟的 msg_id
+        :param dedup: 事件去重，设置后 Resume 补发等重复收到的事件不会再次分发
+        :param session: API 请求使用的连接池，不填则使用进程级共享连接池
+        :param http2: API 请求是否启用 HTTP/2 多路复用，需要安装 h2，设置了 session 时忽略
+        """
         warnings.warn("WebSocket即将被官方抛弃，不建议继续使用")
         if not isinstance(intents, Intents):
             raise ValueError("intents 必须是 Intents 类型的对象。")
         self.intents = intents
         self.is_sandbox = is_sandbox
+        self.shard = shard
         self.websocket_api = None
         self.ws = None
         self.wss_url = None
         self.session_id = None
         self.heartbeat_interval = None
         self.heartbeat_task = None
+        self.heartbeat: Heartbeat | None = None
+        # 因心跳未被确认而断开重连的次数
+        self.heartbeat_timeouts = 0
         self.ready = False
+        # 最近一次收到的消息序号 s，心跳与 Resume 时携带
         self.d = None
+        # identify：首次鉴权；resume：发送的Resume；resumed：成功恢复；reidentify：恢复失败后重新鉴权
+        self.session_stats = {"identify": 0, "resume": 0, "resumed": 0, "reidentify": 0}
         self.token = None
         self.tasks = list()
+        # 连接状态机，状态变化时调用 on_state_change
+        self.state = ConnectionStateMachine()
+        self.state.add_hook(self.on_state_change)
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.reconnect_backoff = reconnect_backoff or DecorrelatedJitterBackoff()
+        # 距离上次就绪以来的重连次数
+        self.failed_attempts = 0
+        # 服务端通过 op=7 要求重连，下次重连不需要退避
+        self.reconnect_requested = False
+        # 事件类型 -> (解码器, 处理函数名)，可通过 self.dispatcher.register() 注册自定义事件
+        self.dispatcher = default_dispatcher(lazy=lazy_events)
+        self.worker_pool = EventWorkerPool(workers, queue_size) if workers > 0 else None
+        self.reply_window = reply_window
+        self.dedup = dedup
+        self.session = session
+        self.http2 = http2
+        self._api: BotAPI | None = None
+        # run() 时创建的AccessToken管理器
+        self.token_manager: Token | None = None
 
     @property
     def robot(self):
@@ -125,13 +178,47 @@ class Client:
             return GuildManagementApi(self.token, self.is_sandbox).me()
 
     @property
-    def api(self):
-        return BotAPI(self.token, self.is_sandbox)
+    def api(self) -> BotAPI:
+        """ 共享的 API 对象，所有事件的 message.reply() 都通过它发送，AccessToken 更新后自动使用新的 AccessToken """
+        api = self._api
+        if api is None:
+            api = self._api = BotAPI(self.token, self.is_sandbox, session=self.session, http2=self.http2,
+                                     reply_window=self.reply_window)
+        elif api.access_token != self.token:
+            api.access_token = self.token
+        return api
+
+    def update_token(self, token: str):
+        """ 替换AccessToken，之后的鉴权与API调用都使用新的AccessToken """
+        self.token = token
+        if self.websocket_api is not None:
+            self.websocket_api.access_token = token
+        if self._api is not None:
+            self._api.access_token = token
+
+    async def use_token(self, token: Token):
+        """ 获取AccessToken并在后台提前刷新，刷新后自动同步到 client.token、websocket_api 与 api """
+        self.token_manager = token
+        token.add_hook(self.update_token)
+        self.update_token(await token.get_access_token())
+        token.start_auto_refresh()
 
     def run(self, appid, secret):
-        self.token = asyncio.run(Token(appid, secret).get_access_token())
-        self.websocket_api = WebSocketAPI(self.token, is_sandbox=self.is_sandbox)
-        asyncio.run(self.main())
+        asyncio.run(self._run(Token(appid, secret)))
+
+    async def _run(self, token: Token):
+        try:
+            await self.use_token(token)
+            self.websocket_api = WebSocketAPI(self.token, is_sandbox=self.is_sandbox, session=self.session)
+            await self.main()
+        finally:
+            await token.close()
+            # 事件循环结束后连接池中的连接无法再使用，一并关闭
+            sessions = {get_session()}
+            if self._api is not None:
+                sessions.add(self._api.session)
+            for session in sessions:
+                await session.aclose()
 
     async def main(self):
         task = asyncio.create_task(self.connect())
@@ -152,17 +239,26 @@ class Client:
             await self.close()
 
     async def connect(self):
-        """ 连接到WebSocket服务器 """
+        """ 连接到WebSocket服务器并开始处理消息 """
         if self.ws is not None and not self.ws.closed:
             _log.info("已经连接到WebSocket服务器。")
             return
 
+        await self.open_websocket()
+        await self.handle_messages()
+
+    @property
+    def resuming(self) -> bool:
+        return self.state.state is ConnectionState.RESUMING
+
+    async def open_websocket(self):
+        """ 建立WebSocket连接，收到Hello后再决定Identify还是Resume """
+        await self.state.transition(ConnectionState.CONNECTING)
         if self.wss_url is None:
             self.wss_url = await self.websocket_api.get_wss_url()
 
         self.ws = await websockets.connect(self.wss_url)
         _log.info(f"已连接到WebSocket服务器: {self.wss_url}")
-        await self.handle_messages()
 
     async def identify(self):
         """ 发送Identify消息进行鉴权 """
@@ -171,7 +267,7 @@ class Client:
             "d": {
                 "token": get_authorization(self.token),  # 使用 get_authorization 函数
                 "intents": self.intents.value,
-                "shard": [0, 1],
+                "shard": list(self.shard),
                 "properties": {
                     "$os": "linux",
                     "$browser": "my_library",
@@ -179,16 +275,41 @@ class Client:
                 }
             }
         }
-        await self.ws.send(json.dumps(identify_payload))
+        await self.state.transition(ConnectionState.IDENTIFYING)
+        await self.ws.send(codec.dumps(identify_payload).decode())
+        self.session_stats["identify"] += 1
         _log.debug(f"已发送Identify消息，内容：{identify_payload}")
 
+    def can_resume(self) -> bool:
+        return self.session_id is not None and self.d is not None
+
+    async def resume(self):
+        """ 发送Resume消息，恢复断线期间的事件 """
+        resume_payload = {
+            "op": 6,
+            "d": {
+                "token": get_authorization(self.token),
+                "session_id": self.session_id,
+                "seq": self.d
+            }
+        }
+        await self.state.transition(ConnectionState.RESUMING)
+        await self.ws.send(codec.dumps(resume_payload).decode())
+        self.session_stats["resume"] += 1
+        _log.info(f"已发送Resume消息，session_id: {self.session_id}，seq: {self.d}")
+
+    def invalidate_session(self):
+        """ 丢弃当前Session，下次连接时重新Identify """
+        self.session_id = None
+        self.d = None
+
     async def handle_ready_event(self, data):
         """ 处理Ready Event """
         if data["t"] == "READY":
             self.session_id = data["d"]["session_id"]
             self.d = data["s"]
             _log.info(f"收到Ready事件，session_id: {self.session_id}")
-            self.ready = True
+            await self.mark_ready()
             await self.on_ready()
 
     async def send_message(self, message):
@@ -209,36 +330,72 @@ class Client:
         try:
             msg = await self.ws.recv()
             _log.debug(f"收到原始消息: {msg}")
-            data = json.loads(msg)
+            data = codec.loads(msg)
 
             # 检查是否为Hello消息 (op=10)
             if data.get("op") == 10:
                 self.heartbeat_interval = data["d"]["heartbeat_interval"]
                 _log.debug(f"收到Hello消息，心跳间隔: {self.heartbeat_interval} ms")
                 await self.start_heartbeat()
-                await self.identify()  # 立即发送Identify消息
+                if self.can_resume():
+                    await self.resume()
+                else:
+                    await self.identify()  # 立即发送Identify消息
                 return None
 
-            # 检查是否为Invalid Intents消息 (op=9)
+            # op=9：Resume时表示Session已失效，改为重新Identify；Identify时表示intents无效
             if data.get("op") == 9:
-                raise InvalidIntentsError(data)
+                if not self.resuming:
+                    raise InvalidIntentsError(data)
+                _log.warning("Session已失效，无法恢复，重新Identify")
+                self.invalidate_session()
+                self.session_stats["reidentify"] += 1
+                await self.identify()
+                return None
+            # op=7：服务端要求重连，断开后立即重连并Resume
+            if data.get("op") == 7:
+                _log.info("服务端要求重新连接")
+                self.reconnect_requested = True
+                # 关闭码 1000 会使Session失效，使用 4000 保留Session供Resume
+                await self.close_websocket(code=4000, reason="reconnect requested")
+                return None
             if data.get("op") == 11:
+                if self.heartbeat is not None:
+                    self.heartbeat.ack()
                 return None
+            # op=1：服务端要求立即发送心跳
+            if data.get("op") == 1:
+                if self.heartbeat is not None:
+                    await self.heartbeat.beat()
+                else:
+                    await self.send_heartbeat()
+                return None
+            if data.get("s") is not None:
+                self.d = data["s"]
 
             _log.info(f"解析后的消息: {data}")
             return data
-        except websockets.exceptions.ConnectionClosedError as e:
+        except websockets.exceptions.ConnectionClosed as e:
             # 捕获连接关闭异常
             _log.error(f"WebSocket连接已关闭: {e}")
+            if e.rcvd is not None and e.rcvd.code in CANNOT_RESUME_CLOSE_CODES:
+                _log.warning(f"关闭码{e.rcvd.code}表示Session已失效，重连后将重新Identify")
+                if self.session_id is not None:
+                    self.session_stats["reidentify"] += 1
+                self.invalidate_session()
 
             # 尝试从关闭原因中提取数据
             if self.ws.close_reason:
-                close_data = json.loads(self.ws.close_reason)
-                if close_data.get("op") == 9:
+                try:
+                    close_data = codec.loads(self.ws.close_reason)
+                except codec.DecodeError:
+                    # 关闭原因多为纯文本，如 "session timed out"
+                    close_data = {}
+                if isinstance(close_data, dict) and close_data.get("op") == 9:
                     raise InvalidIntentsError(close_data)
 
             return None
-        except json.JSONDecodeError as e:
+        except codec.DecodeError as e:
             _log.error(f"JSON解析错误: {msg} - {e}")
             return None
 
@@ -247,12 +404,20 @@ class Client:
         if self.heartbeat_task is not None:
             self.heartbeat_task.cancel()
 
-        async def send_heartbeat():
-            while True:
-                await asyncio.sleep(self.heartbeat_interval / 1000)
-                await self.send_heartbeat()
+        self.heartbeat = Heartbeat(self.heartbeat_interval / 1000, self.send_heartbeat, self.on_heartbeat_timeout)
+        self.heartbeat_task = asyncio.create_task(self.heartbeat.run())
+
+    @property
+    def latency(self) -> float | None:
+        """ 最近一次心跳的往返时间（秒），还没有收到心跳确认时为 None """
+        return self.heartbeat.latency if self.heartbeat is not None else None
 
-        self.heartbeat_task = asyncio.create_task(send_heartbeat())
+    async def on_heartbeat_timeout(self):
+        """ 上一次心跳没有被确认，连接已僵死：断开后由接收循环重连并Resume """
+        self.heartbeat_timeouts += 1
+        _log.warning(f"{self.heartbeat.interval}秒内未收到心跳确认，断开并尝试恢复连接")
+        # 使用非 1000 的关闭码，服务端会保留Session供Resume
+        await self.ws.close(code=4000, reason="heartbeat timeout")
 
     async def send_heartbeat(self):
         """ 发送心跳消息 """
@@ -260,35 +425,71 @@ class Client:
             "op": 1,
             "d": self.d
         }
-        await self.send_message(json.dumps(heartbeat_payload))
+        await self.send_message(codec.dumps(heartbeat_payload).decode())
 
     async def close(self):
         """ 关闭WebSocket连接 """
+        await self.state.transition(ConnectionState.CLOSED)
+        if self.worker_pool is not None:
+            await self.worker_pool.close()
+        await self.close_websocket()
+
+    async def close_websocket(self, code: int = 1000, reason: str = ""):
+        """ 只关闭WebSocket连接与心跳，code 不为 1000 时服务端会保留Session """
         if self.ws is not None and not self.ws.closed:
             if self.heartbeat_task is not None:
                 self.heartbeat_task.cancel()
-            await self.ws.close()
+            await self.ws.close(code=code, reason=reason)
             _log.info("WebSocket连接已关闭。")
         else:
             _log.info("没有活动的WebSocket连接可关闭。")
 
-    async def reconnect(self):
-        """ 自动重连逻辑 """
+    async def mark_ready(self):
+        """ 收到READY或RESUMED，重置退避 """
+        await self.state.transition(ConnectionState.READY)
+        self.ready = True
+        self.failed_attempts = 0
+        self.reconnect_backoff.reset()
+
+    async def reconnect(self, immediate: bool = False):
+        """ 自动重连逻辑：每次重连前按退避策略等待，已有Session时在Hello之后发送Resume
+        :param immediate: 服务端要求的重连，第一次重连不等待，也不计入失败次数
+        :raise ReconnectFailedError: 连续重连 max_reconnect_attempts 次仍未就绪"""
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
         while True:
+            if immediate:
+                immediate = False
+                await self.state.transition(ConnectionState.BACKOFF)
+                _log.info("立即重新连接")
+            else:
+                if self.max_reconnect_attempts is not None \
+                        and self.failed_attempts >= self.max_reconnect_attempts:
+                    await self.state.transition(ConnectionState.CLOSED)
+                    raise ReconnectFailedError(self.failed_attempts)
+                self.failed_attempts += 1
+                self.state.reconnect_attempts += 1
+                delay = self.reconnect_backoff.next()
+                await self.state.transition(ConnectionState.BACKOFF)
+                _log.warning(f"{delay:.2f}秒后进行第{self.failed_attempts}次重连")
+                await asyncio.sleep(delay)
+                self.state.backoff_time += delay
             try:
-                await self.connect()
+                await self.open_websocket()
                 break
             except Exception as e:
-                _log.error(f"重连失败，等待5秒后重试: {e}")
-                await asyncio.sleep(5)
+                _log.error(f"重连失败: {e}")
 
     async def handle_messages(self):
         """ 处理WebSocket消息 """
         while True:
+            if self.state.state is ConnectionState.CLOSED:
+                return
             # 确保WebSocket连接正常
             if self.ws is None or self.ws.closed:
                 _log.warning("WebSocket连接不存在或已关闭，尝试重新连接...")
-                await self.reconnect()
+                immediate, self.reconnect_requested = self.reconnect_requested, False
+                await self.reconnect(immediate)
                 continue
 
             data = await self.receive_message()
@@ -303,254 +504,53 @@ class Client:
             # 处理Resumed事件
             if data.get("t") == "RESUMED":
                 _log.info("收到RESUMED事件，重连成功！")
-                self.ready = True
+                await self.mark_ready()
+                self.session_stats["resumed"] += 1
                 continue
 
             # 处理其他事件
             event_type = data.get("t")
-            about_event = data.get("d", "")
-            if event_type == "AT_MESSAGE_CREATE":
-                message = Message(
-                    id=about_event.get("id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    guild_id=about_event.get("guild_id", ""),
-                    content=about_event.get("content", ""),
-                    timestamp=parser.isoparse(about_event.get("timestamp", "")),
-                    author=User(
-                        id=about_event.get("author", {}).get("id", ""),
-                        username=about_event.get("author", {}).get("username", ""),
-                        avatar=about_event.get("author", {}).get("avatar", ""),
-                        bot=about_event.get("author", {}).get("bot", False),
-                        union_openid=about_event.get("author", {}).get("union_openid"),
-                        union_user_account=about_event.get("author", {}).get("union_user_account"),
-                        share_url=about_event.get("author", {}).get("share_url"),
-                        welcome_msg=about_event.get("author", {}).get("welcome_msg")
-                    ),
-                    edited_timestamp=parser.isoparse(about_event.get("edited_timestamp", "")) if about_event.get(
-                        "edited_timestamp") else None,
-                    mention_roles=about_event.get("mention_roles", []),
-                    mentions=[
-                        User(
-                            id=mention.get("id", ""),
-                            username=mention.get("username", ""),
-                            avatar=mention.get("avatar", ""),
-                            bot=mention.get("bot", False),
-                            union_openid=mention.get("union_openid"),
-                            union_user_account=mention.get("union_user_account"),
-                            share_url=mention.get("share_url"),
-                            welcome_msg=mention.get("welcome_msg")
-                        ) for mention in about_event.get("mentions", [])
-                    ],
-                    attachments=[
-                        MessageAttachment(
-                            id=attachment.get("id", ""),
-                            filename=attachment.get("filename", ""),
-                            size=attachment.get("size", 0),
-                            url=attachment.get("url", ""),
-                            proxy_url=attachment.get("proxy_url", ""),
-                            height=attachment.get("height"),
-                            width=attachment.get("width"),
-                            description=attachment.get("description"),
-                            content_type=attachment.get("content_type")
-                        ) for attachment in about_event.get("attachments", [])
-                    ],
-                    embeds=about_event.get("embeds", []),
-                    reactions=[
-                        Reaction(
-                            count=reaction.get("count", 0),
-                            me=reaction.get("me", False),
-                            emoji=reaction.get("emoji", {})
-                        ) for reaction in about_event.get("reactions", [])
-                    ]
-                )
-                message_api = MessageSendReceiveAPI(self.token, self.is_sandbox)
-                message.api = message_api
-                message.reply = partial(message_api.post_channel_messages, channel_id=message.channel_id, msg_id = message.id)
-                await self.on_at_message_create(message)
-            elif event_type == "AT_MESSAGE_UPDATE":
-                message = Message(
-                    id=about_event.get("id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    guild_id=about_event.get("guild_id", ""),
-                    content=about_event.get("content", ""),
-                    timestamp=parser.isoparse(about_event.get("timestamp", "")),
-                    author=User(
-                        id=about_event.get("author", {}).get("id", ""),
-                        username=about_event.get("author", {}).get("username", ""),
-                        avatar=about_event.get("author", {}).get("avatar", ""),
-                        bot=about_event.get("author", {}).get("bot", False),
-                        union_openid=about_event.get("author", {}).get("union_openid"),
-                        union_user_account=about_event.get("author", {}).get("union_user_account"),
-                        share_url=about_event.get("author", {}).get("share_url"),
-                        welcome_msg=about_event.get("author", {}).get("welcome_msg")
-                    ),
-                    edited_timestamp=parser.isoparse(about_event.get("edited_timestamp", "")) if about_event.get(
-                        "edited_timestamp") else None,
-                    mention_roles=about_event.get("mention_roles", []),
-                    mentions=[
-                        User(
-                            id=mention.get("id", ""),
-                            username=mention.get("username", ""),
-                            avatar=mention.get("avatar", ""),
-                            bot=mention.get("bot", False),
-                            union_openid=mention.get("union_openid"),
-                            union_user_account=mention.get("union_user_account"),
-                            share_url=mention.get("share_url"),
-                            welcome_msg=mention.get("welcome_msg")
-                        ) for mention in about_event.get("mentions", [])
-                    ],
-                    attachments=[
-                        MessageAttachment(
-                            id=attachment.get("id", ""),
-                            filename=attachment.get("filename", ""),
-                            size=attachment.get("size", 0),
-                            url=attachment.get("url", ""),
-                            proxy_url=attachment.get("proxy_url", ""),
-                            height=attachment.get("height"),
-                            width=attachment.get("width"),
-                            description=attachment.get("description"),
-                            content_type=attachment.get("content_type")
-                        ) for attachment in about_event.get("attachments", [])
-                    ],
-                    embeds=about_event.get("embeds", []),
-                    reactions=[
-                        Reaction(
-                            count=reaction.get("count", 0),
-                            me=reaction.get("me", False),
-                            emoji=reaction.get("emoji", {})
-                        ) for reaction in about_event.get("reactions", [])
-                    ]
-                )
-                await self.on_message_update(message)
-            elif event_type == "GROUP_AT_MESSAGE_CREATE":
-                message = GroupMessage(
-                    id=about_event.get("id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    guild_id=about_event.get("guild_id", ""),
-                    content=about_event.get("content", ""),
-                    timestamp=parser.isoparse(about_event.get("timestamp", "")),
-                    author=User(
-                        id=about_event.get("author", {}).get("id", ""),
-                        username="群聊暂不支持获取用户名",
-                        avatar="群聊暂不支持获取头像",
-                        union_openid=about_event.get("author", {}).get("union_openid"),
-                        union_user_account=about_event.get("author", {}).get("union_user_account"),
-                        share_url="群聊暂不支持获取分享链接"
-                    ),
-                    attachments=[
-                        MessageAttachment(
-                            url=attachment["url"],
-                            content_type=attachment["content_type"],
-                            filename=attachment["filename"],
-                            height=attachment["height"],
-                            size=attachment["size"],
-                            width=attachment["width"],
-                            id=attachment.get("id", ""),
-                            proxy_url=attachment.get("proxy_url", "")
-                        )
-                        for attachment in about_event.get("attachments", [])
-                    ])
-                message_api = MessageSendReceiveAPI(self.token, self.is_sandbox)
-                message.api = message_api
-                message.reply = partial(message_api.post_channel_messages, channel_id=message.channel_id,
-                                        msg_id=message.id)
-                await self.on_group_at_message_create(message)
-            elif event_type == "FORUM_THREAD_CREATE":
-                message = Thread(
-                    guild_id=about_event.get("guild_id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    author_id=about_event.get("author_id", ""),
-                    thread_info=ThreadInfo(
-                        content=[Paragraphs(
-                            elems=[
-                                Elems(text=elem.get("text", {}).get("text", ""),
-                                      type=elem.get("type", "")
-                                      ) for elem in paragraph.get("elems", [])
-                            ],
-                            props=paragraph.get("props", {})
-                        ) for paragraph in
-                            json.loads(about_event.get("thread_info", {}).get("content", [])).get("paragraphs", [{}])
-                        ],
-                        date_time=parser.isoparse(about_event.get("thread_info", {}).get("date_time", "")),
-                        thread_id=about_event.get("thread_info", {}).get("thread_id", ""),
-                        title=[Paragraphs(
-                            elems=[
-                                Elems(text=elem.get("text", {}).get("text", ""),
-                                      type=elem.get("type", "")
-                                      ) for elem in paragraph.get("elems", [{}])
-                            ],
-                            props=paragraph.get("props", {})
-                        ) for paragraph in
-                            json.loads(about_event.get("thread_info", {}).get("title", {})).get("paragraphs", [{}])]
-                    )
-                )
-                await self.on_forum_thread_create(message)
-            elif event_type == "FORUM_THREAD_UPDATE":
-                message = Thread(
-                    guild_id=about_event.get("guild_id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    author_id=about_event.get("author_id", ""),
-                    thread_info=ThreadInfo(
-                        content=[Paragraphs(
-                            elems=[
-                                Elems(text=elem.get("text", {}).get("text", ""),
-                                      type=elem.get("type", "")
-                                      ) for elem in paragraph.get("elems", [])
-                            ],
-                            props=paragraph.get("props", {})
-                        ) for paragraph in
-                            json.loads(about_event.get("thread_info", {}).get("content", [])).get("paragraphs", [{}])
-                        ],
-                        date_time=parser.isoparse(about_event.get("thread_info", {}).get("date_time", "")),
-                        thread_id=about_event.get("thread_info", {}).get("thread_id", ""),
-                        title=[Paragraphs(
-                            elems=[
-                                Elems(text=elem.get("text", {}).get("text", ""),
-                                      type=elem.get("type", "")
-                                      ) for elem in paragraph.get("elems", [{}])
-                            ],
-                            props=paragraph.get("props", {})
-                        ) for paragraph in
-                            json.loads(about_event.get("thread_info", {}).get("title", {})).get("paragraphs", [{}])]
-                    )
-                )
-                await self.on_forum_thread_update(message)
-            elif event_type == "MESSAGE_CREATE":
-                message = Message(
-                    id=about_event.get("id", ""),
-                    channel_id=about_event.get("channel_id", ""),
-                    guild_id=about_event.get("guild_id", ""),
-                    content=about_event.get("content", ""),
-                    timestamp=parser.isoparse(about_event.get("timestamp", "")),
-                    author=User(
-                        id=about_event.get("author", {}).get("id", ""),
-                        username=about_event.get("author", {}).get("username", ""),
-                        avatar=about_event.get("author", {}).get("avatar", ""),
-                        bot=about_event.get("author", {}).get("bot", False),
-                        union_openid=about_event.get("author", {}).get("union_openid"),
-                        union_user_account=about_event.get("author", {}).get("union_user_account"),
-                        share_url=about_event.get("author", {}).get("share_url"),
-                    )
-                )
-                message_api = MessageSendReceiveAPI(self.token, self.is_sandbox)
-                message.api = message_api
-                message.reply = partial(message_api.post_channel_messages, channel_id=message.channel_id,
-                                        msg_id=message.id)
-                await self.on_message_create(message)
-            elif event_type == "GROUP_ADD_ROBOT":
-                message = GroupManageEvent(
-                    group_openid=about_event.get("group_openid", ""),
-                    op_member_openid=about_event.get("op_member_openid", ""),
-                    timestamp=parser.isoparse(about_event.get("timestamp", ""))
-                )
-                await self.on_group_add_robot(message)
+            about_event = data.get("d", {})
+            if self.dedup is not None and event_type in self.dispatcher \
+                    and await self.dedup.is_duplicate(event_key(data)):
+                _log.debug(f"重复的事件 {event_key(data)}，忽略...")
+                continue
+            if self.worker_pool is None:
+                await self.dispatch_event(event_type, about_event)
+            elif event_type in self.dispatcher:
+                await self.worker_pool.submit(self.event_order_key(about_event), self.dispatch_event,
+                                              event_type, about_event)
             else:
-                _log.info(f"接收到未知事件类型 {event_type}，忽略...")
+                _log.debug(f"接收到未注册的事件类型 {event_type}，忽略...")
+
+    @staticmethod
+    def event_order_key(about_event: dict) -> str | None:
+        """ 事件的顺序键，同一子频道/群/用户的事件串行处理 """
+        return (about_event.get("channel_id") or about_event.get("group_openid")
+                or about_event.get("group_id") or about_event.get("author", {}).get("id"))
+
+    async def dispatch_event(self, event_type: str, about_event: dict):
+        """ 按分发表解码并调用对应的处理函数 """
+        decoded = self.dispatcher.decode(event_type, about_event)
+        if decoded is None:
+            _log.debug(f"接收到未注册的事件类型 {event_type}，忽略...")
+            return
+        handler, event = decoded
+        if isinstance(event, BaseMessage):
+            if self.reply_window is not None:
+                self.reply_window.track(event.id)
+            # message.reply() 通过绑定的共享 api 回复，不再为每个事件创建 API 对象
+            event.api = self.api
+        await getattr(self, handler)(event)
 
     async def on_ready(self):
         """ 处理Ready事件 """
         _log.info("已准备好接收事件。")
 
+    async def on_state_change(self, old_state: ConnectionState, new_state: ConnectionState):
+        """ 连接状态变化，可用于上报监控 """
+        _log.debug(f"连接状态：{old_state.value} -> {new_state.value}")
+
     # GUILD_MEMBERS 事件
     async def on_guild_member_add(self, member: Member):
         """当成员加入时"""
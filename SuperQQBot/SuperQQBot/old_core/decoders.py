@@ -0,0 +1,50 @@
+"""WebSocket 事件解码器，将事件的 d 字段转换为事件对象
+
+解码函数由 utils.decoder.compile_decoder 根据 types 中的 dataclass 生成，只有格式特殊的字段在这里单独处理。"""
+from .types import *
+from ..core.event import EventDispatcher
+from ..utils import codec
+from ..utils.decoder import compile_decoder
+
+
+def _decode_paragraphs(raw: str | None) -> list[Paragraphs]:
+    """论坛内容是 JSON 字符串"""
+    if not raw:
+        return []
+    return [Paragraphs(
+        elems=[
+            Elems(text=elem.get("text", {}).get("text", ""),
+                  type=elem.get("type", "")
+                  ) for elem in paragraph.get("elems", [])
+        ],
+        props=paragraph.get("props", {})
+    ) for paragraph in codec.loads(raw).get("paragraphs", [{}])]
+
+
+# AT_MESSAGE_CREATE、AT_MESSAGE_UPDATE、MESSAGE_CREATE
+decode_message = compile_decoder(Message)
+# GROUP_AT_MESSAGE_CREATE，群聊只下发 author.id 与 union_openid
+decode_group_message = compile_decoder(GroupMessage, overrides={"author": decode_group_author})
+decode_thread_info = compile_decoder(ThreadInfo, overrides={"content": _decode_paragraphs,
+                                                            "title": _decode_paragraphs})
+# FORUM_THREAD_CREATE、FORUM_THREAD_UPDATE
+decode_thread = compile_decoder(Thread, decoders={ThreadInfo: decode_thread_info})
+# GROUP_ADD_ROBOT
+decode_group_manage_event = compile_decoder(GroupManageEvent)
+
+
+def default_dispatcher(lazy: bool = False) -> EventDispatcher:
+    """内置事件的分发表，每次调用返回新的副本，修改不会影响其他 Client
+    :param lazy: 消息事件使用 LazyMessage / LazyGroupMessage，字段在处理函数访问时才解码，
+        节省内存分配但不节省 CPU，见 benchmarks/bench_lazy.py"""
+    message_decoder = LazyMessage if lazy else decode_message
+    group_message_decoder = LazyGroupMessage if lazy else decode_group_message
+    dispatcher = EventDispatcher()
+    dispatcher.register("AT_MESSAGE_CREATE", message_decoder, "on_at_message_create")
+    dispatcher.register("AT_MESSAGE_UPDATE", message_decoder, "on_message_update")
+    dispatcher.register("MESSAGE_CREATE", message_decoder, "on_message_create")
+    dispatcher.register("GROUP_AT_MESSAGE_CREATE", group_message_decoder, "on_group_at_message_create")
+    dispatcher.register("FORUM_THREAD_CREATE", decode_thread, "on_forum_thread_create")
+    dispatcher.register("FORUM_THREAD_UPDATE", decode_thread, "on_forum_thread_update")
+    dispatcher.register("GROUP_ADD_ROBOT", decode_group_manage_event, "on_group_add_robot")
+    return dispatcher
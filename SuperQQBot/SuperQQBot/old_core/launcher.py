@@ -0,0 +1,264 @@
+import multiprocessing
+import os
+import queue
+import time
+import warnings
+
+import asyncio
+
+from .api import WebSocketAPI
+from .client import Client
+from .log import get_logger
+from .shard import ShardedClient
+from ..core.connection_state import DecorrelatedJitterBackoff
+from ..api_clients.openapi_client import Token
+
+_log = get_logger()
+
+
+def _split_shards(shard_count: int, processes: int) -> list[list[int]]:
+    """ 把分片按连续区间尽量平均地分给各进程 """
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    groups, start = [], 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        groups.append(list(range(start, start + size)))
+        start += size
+    return groups
+
+
+def _worker_main(client_cls, intents, is_sandbox, client_kwargs, shard_ids, shard_count, wss_url,
+                 max_concurrency, identify_interval, start_delay, access_token, control, health,
+                 stop, health_interval):
+    """ 子进程入口：只连接分配给本进程的分片 """
+    if not issubclass(client_cls, ShardedClient):
+        # 普通 Client 子类：处理函数来自 client_cls，分片连接逻辑来自 ShardedClient
+        client_cls = type(client_cls.__name__, (client_cls, ShardedClient), {})
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        client = client_cls(intents, is_sandbox, shard_count=shard_count, identify_interval=identify_interval,
+                            shard_ids=shard_ids, **client_kwargs)
+    client.token = access_token
+    client.websocket_api = WebSocketAPI(access_token, is_sandbox=is_sandbox)
+    client.wss_url = wss_url
+    client.max_concurrency = max_concurrency
+    try:
+        asyncio.run(_worker_loop(client, start_delay, control, health, stop, health_interval))
+    except KeyboardInterrupt:
+        # Ctrl+C 会同时发给所有子进程，由父进程统一协调退出
+        pass
+
+
+async def _worker_loop(client: ShardedClient, start_delay, control, health, stop, health_interval):
+    await asyncio.sleep(start_delay)
+    connect_task = asyncio.create_task(client.connect())
+    stop_task = asyncio.create_task(_wait_stop(stop))
+    tasks = [
+        asyncio.create_task(_receive_tokens(client, control)),
+        asyncio.create_task(_report_health(client, health, health_interval)),
+    ]
+    try:
+        await asyncio.wait([connect_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (connect_task, stop_task, *tasks):
+            task.cancel()
+        await asyncio.gather(connect_task, stop_task, *tasks, return_exceptions=True)
+        await client.close()
+        # 退出前最后上报一次，父进程据此确认事件已经处理完
+        health.put(_health_report(client, stopped=True))
+
+
+async def _wait_stop(stop):
+    # 分段等待，线程里阻塞的 wait() 无法被取消
+    while not await asyncio.to_thread(stop.wait, 1):
+        pass
+
+
+async def _receive_tokens(client: ShardedClient, control):
+    """ 接收父进程广播的新AccessToken """
+    while True:
+        try:
+            access_token = await asyncio.to_thread(control.get, True, 1)
+        except queue.Empty:
+            continue
+        client.update_token(access_token)
+        _log.info(f"进程{os.getpid()}已更新AccessToken")
+
+
+async def _report_health(client: ShardedClient, health, health_interval):
+    while True:
+        health.put(_health_report(client))
+        await asyncio.sleep(health_interval)
+
+
+def _health_report(client: ShardedClient, stopped: bool = False) -> dict:
+    pool = client.worker_pool
+    return {
+        "pid": os.getpid(),
+        "shard_ids": [shard.shard[0] for shard in client.shards] or list(client.shard_ids or []),
+        "ready_shards": sorted(client._ready_shards),
+        "pool": pool.stats() if pool is not None else None,
+        "stopped": stopped,
+        "time": time.time(),
+    }
+
+
+class ShardLauncher:
+    """多进程分片启动器
+
+    在父进程中获取AccessToken与分片信息，再把分片平均分给多个子进程，每个子进程运行一个只负责部分分片的
+    ShardedClient，JSON 解析与事件处理可以利用多个CPU核心。
+    - AccessToken 只由父进程刷新，新值通过队列广播给所有子进程；刷新失败时按退避策略重试，子进程继续使用当前的 AccessToken；
+    - 子进程定期通过健康队列上报 pid、已就绪的分片与 worker 池指标，异常退出的子进程会被重新拉起；
+    - 收到 Ctrl+C 或调用 stop() 后通知所有子进程关闭连接、处理完剩余事件再退出。
+
+    用法与 Client.run() 相同::
+
+        ShardLauncher(MyClient, Intents.default(), processes=4).run(appid, secret)
+
+    :param client_cls: Client 或 ShardedClient 的子类，需要定义在模块顶层以便子进程导入
+    :param processes: 子进程数，默认为 CPU 核心数，不会超过分片数
+    :param shard_count: 分片总数，不填则使用 /gateway/bot 返回的建议值
+    :param identify_interval: 每批分片之间的鉴权间隔（秒）
+    :param health_interval: 子进程上报健康状态的间隔（秒）
+    :param shutdown_timeout: 关闭时等待子进程退出的秒数，超时后强制结束
+    :param client_kwargs: 传给 client_cls 的其他参数，如 workers、queue_size"""
+
+    def __init__(self, client_cls: type[Client], intents, is_sandbox: bool = False, processes: int | None = None,
+                 shard_count: int | None = None, identify_interval: float = 5, health_interval: float = 10,
+                 shutdown_timeout: float = 30, client_kwargs: dict | None = None):
+        self.client_cls = client_cls
+        self.intents = intents
+        self.is_sandbox = is_sandbox
+        self.processes = processes or os.cpu_count() or 1
+        self.shard_count = shard_count
+        self.identify_interval = identify_interval
+        self.health_interval = health_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.client_kwargs = client_kwargs or {}
+        self.wss_url = None
+        self.max_concurrency = 1
+        self.token: Token | None = None
+        # 进程序号 -> 最近一次健康上报
+        self.health: dict[int, dict] = {}
+        self.restarts = 0
+        self.token_failures = 0
+        # 刷新 AccessToken 失败后的重试退避
+        self.token_backoff = DecorrelatedJitterBackoff(1, 60)
+        self._supervise_interval = 1.0
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._health_queue = self._context.Queue()
+        self._groups: list[list[int]] = []
+        self._workers: list[multiprocessing.Process | None] = []
+        self._controls: list[multiprocessing.Queue] = []
+
+    def run(self, appid, secret):
+        """ 启动所有子进程并阻塞到退出 """
+        try:
+            asyncio.run(self.main(appid, secret))
+        except KeyboardInterrupt:
+            _log.info("检测到键盘请求停止，开始善后")
+            self.shutdown()
+
+    def stop(self):
+        """ 通知所有子进程退出，run() 会在子进程全部退出后返回 """
+        self._stop.set()
+
+    async def main(self, appid, secret):
+        self.token = Token(appid, secret)
+        access_token = await self.token.get_access_token()
+        await self.fetch_shard_info(access_token)
+        self._groups = _split_shards(self.shard_count, self.processes)
+        _log.info(f"共{self.shard_count}个分片，分配给{len(self._groups)}个进程：{self._groups}")
+        self._controls = [self._context.Queue() for _ in self._groups]
+        self._workers = [None] * len(self._groups)
+        for index in range(len(self._groups)):
+            self._start_worker(index, access_token)
+        try:
+            await self._supervise(access_token)
+        finally:
+            await self.token.close()
+            self.shutdown()
+
+    async def fetch_shard_info(self, access_token: str):
+        gateway_bot = await WebSocketAPI(access_token, is_sandbox=self.is_sandbox).get_gateway_bot()
+        self.wss_url = gateway_bot.url
+        self.shard_count = self.shard_count or gateway_bot.shards
+        self.max_concurrency = max(1, gateway_bot.session_start_limit.max_concurrency)
+        if gateway_bot.session_start_limit.remaining < self.shard_count:
+            _log.warning(f"今日剩余可创建的Session数为{gateway_bot.session_start_limit.remaining}，"
+                         f"不足以启动全部{self.shard_count}个分片")
+
+    def _start_worker(self, index: int, access_token: str, start_delay: float | None = None):
+        shard_ids = self._groups[index]
+        if start_delay is None:
+            # 进程之间按全局的分片顺序错开鉴权，避免同时超过 max_concurrency
+            start_delay = shard_ids[0] // self.max_concurrency * self.identify_interval
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.client_cls, self.intents, self.is_sandbox, self.client_kwargs, shard_ids, self.shard_count,
+                  self.wss_url, self.max_concurrency, self.identify_interval, start_delay, access_token,
+                  self._controls[index], self._health_queue, self._stop, self.health_interval),
+            name=f"SuperQQBot-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[index] = process
+        _log.info(f"进程{process.pid}已启动，负责分片{shard_ids}")
+
+    async def _supervise(self, access_token: str):
+        """ 刷新并广播AccessToken、收集健康状态、重启异常退出的子进程 """
+        retry_at = 0.0
+        while not self._stop.is_set():
+            await asyncio.sleep(self._supervise_interval)
+            if time.monotonic() >= retry_at:
+                try:
+                    new_token = await self.token.get_access_token()
+                except Exception as e:
+                    # 一次刷新失败不能让所有分片进程退出，旧的 AccessToken 可能仍然有效
+                    self.token_failures += 1
+                    delay = self.token_backoff.next()
+                    retry_at = time.monotonic() + delay
+                    _log.error(f"刷新AccessToken失败，{delay:.1f}秒后重试：{e}")
+                else:
+                    self.token_backoff.reset()
+                    retry_at = 0.0
+                    if new_token != access_token:
+                        access_token = new_token
+                        for control in self._controls:
+                            control.put(access_token)
+                        _log.info("已向所有子进程广播新的AccessToken")
+            self._collect_health()
+            for index, process in enumerate(self._workers):
+                if process is not None and not process.is_alive() and not self._stop.is_set():
+                    _log.error(f"进程{process.pid}异常退出（exitcode={process.exitcode}），重新启动")
+                    self.restarts += 1
+                    self._start_worker(index, access_token, start_delay=0)
+
+    def _collect_health(self):
+        pids = {process.pid: index for index, process in enumerate(self._workers) if process is not None}
+        while True:
+            try:
+                report = self._health_queue.get_nowait()
+            except queue.Empty:
+                return
+            index = pids.get(report["pid"])
+            if index is not None:
+                self.health[index] = report
+
+    def shutdown(self):
+        """ 通知子进程退出并等待，超过 shutdown_timeout 仍未退出的强制结束 """
+        self._stop.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._workers:
+            if process is not None:
+                process.join(max(0.0, deadline - time.monotonic()))
+        for process in self._workers:
+            if process is not None and process.is_alive():
+                _log.warning(f"进程{process.pid}未能在{self.shutdown_timeout}秒内退出，强制结束")
+                process.terminate()
+                process.join()
+        self._collect_health()
+        _log.info("所有分片进程已退出")
@@ -0,0 +1,120 @@
+import warnings
+
+import asyncio
+
+from .client import Client
+from ..core.connection_state import ConnectionState, DecorrelatedJitterBackoff
+from .log import get_logger
+
+_log = get_logger()
+
+
+class _Shard(Client):
+    """ ShardedClient 内部的单个分片连接，收到的事件全部交给所属的 ShardedClient 分发 """
+
+    def __init__(self, parent: "ShardedClient", shard_id: int, shard_count: int):
+        with warnings.catch_warnings():
+            # ShardedClient 创建时已经提醒过一次
+            warnings.simplefilter("ignore")
+            super().__init__(parent.intents, parent.is_sandbox, shard=(shard_id, shard_count),
+                             max_reconnect_attempts=parent.max_reconnect_attempts,
+                             reconnect_backoff=DecorrelatedJitterBackoff(parent.reconnect_backoff.base,
+                                                                         parent.reconnect_backoff.cap))
+        self.parent = parent
+        self.token = parent.token
+        self.websocket_api = parent.websocket_api
+        self.wss_url = parent.wss_url
+        self.dispatcher = parent.dispatcher
+        self.worker_pool = parent.worker_pool
+        self.dedup = parent.dedup
+
+    async def dispatch_event(self, event_type: str, about_event: dict):
+        await self.parent.dispatch_event(event_type, about_event)
+
+    async def on_ready(self):
+        await self.parent.on_shard_ready(self.shard[0])
+
+    async def on_state_change(self, old_state: ConnectionState, new_state: ConnectionState):
+        await self.parent.on_shard_state_change(self.shard[0], old_state, new_state)
+
+    async def close(self):
+        """ 只关闭本分片的连接，worker 池由 ShardedClient 负责 """
+        await self.state.transition(ConnectionState.CLOSED)
+        await self.close_websocket()
+
+
+class ShardedClient(Client):
+    """分片客户端
+
+    通过 /gateway/bot 获取建议的分片数，为每个分片建立一条 WebSocket 连接，
+    所有分片的事件都由本对象的 on_xxx 处理函数统一处理，用法与 Client 相同。"""
+
+    def __init__(self, intents, is_sandbox=False, shard_count: int | None = None, identify_interval: float = 5,
+                 workers: int = 0, queue_size: int = 1000, shard_ids: list[int] | None = None, **kwargs):
+        """
+        :param shard_count: 分片总数，不填则使用 /gateway/bot 返回的建议值
+        :param identify_interval: 每批分片之间的鉴权间隔（秒），每批数量为 session_start_limit.max_concurrency
+        :param shard_ids: 本进程负责的分片ID，不填则连接全部分片，多进程部署见 ShardLauncher
+        :param kwargs: 其余参数同 Client，如 max_reconnect_attempts，每个分片独立重连
+        """
+        super().__init__(intents, is_sandbox, workers=workers, queue_size=queue_size, **kwargs)
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.identify_interval = identify_interval
+        self.max_concurrency = 1
+        self.shards: list[_Shard] = []
+        self._ready_shards = set()
+
+    async def fetch_shard_info(self):
+        """ 获取接入地址与分片数，两者都已指定时不发起请求 """
+        if self.shard_count is not None and self.wss_url is not None:
+            return
+        gateway_bot = await self.websocket_api.get_gateway_bot()
+        self.wss_url = self.wss_url or gateway_bot.url
+        self.shard_count = self.shard_count or gateway_bot.shards
+        self.max_concurrency = max(1, gateway_bot.session_start_limit.max_concurrency)
+        if gateway_bot.session_start_limit.remaining < self.shard_count:
+            _log.warning(f"今日剩余可创建的Session数为{gateway_bot.session_start_limit.remaining}，"
+                         f"不足以启动全部{self.shard_count}个分片")
+
+    async def connect(self):
+        """ 按 max_concurrency 分批连接所有分片，每批之间间隔 identify_interval 秒 """
+        await self.fetch_shard_info()
+        shard_ids = range(self.shard_count) if self.shard_ids is None else self.shard_ids
+        self.shards = [_Shard(self, shard_id, self.shard_count) for shard_id in shard_ids]
+        _log.info(f"共{self.shard_count}个分片，本进程连接{len(self.shards)}个，每批{self.max_concurrency}个")
+        tasks = []
+        try:
+            for index, shard in enumerate(self.shards):
+                if index and index % self.max_concurrency == 0:
+                    await asyncio.sleep(self.identify_interval)
+                tasks.append(asyncio.create_task(shard.connect()))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def on_shard_ready(self, shard_id: int):
+        """ 单个分片收到Ready事件，全部分片就绪后调用 on_ready """
+        _log.info(f"分片{shard_id}已就绪")
+        self._ready_shards.add(shard_id)
+        if len(self._ready_shards) == len(self.shards) and not self.ready:
+            self.ready = True
+            await self.on_ready()
+
+    async def on_shard_state_change(self, shard_id: int, old_state: ConnectionState, new_state: ConnectionState):
+        """ 单个分片的连接状态变化 """
+        _log.debug(f"分片{shard_id}连接状态：{old_state.value} -> {new_state.value}")
+
+    def update_token(self, token: str):
+        """ 替换AccessToken，之后的鉴权与API调用都使用新的AccessToken """
+        super().update_token(token)
+        for shard in self.shards:
+            shard.token = token
+
+    async def close(self):
+        """ 关闭所有分片连接 """
+        await self.state.transition(ConnectionState.CLOSED)
+        if self.worker_pool is not None:
+            await self.worker_pool.close()
+        await asyncio.gather(*(shard.close() for shard in self.shards))
@@ -3,9 +3,10 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 from .Error import UnknownKwargs, UnSupposeUsage, UnknownError
+from ..utils.decoder import LazyFields
 
 # 定义基本的事件对象
-@dataclass
+@dataclass(slots=True)
 class Event:
     id: str
     time: float
@@ -16,14 +17,14 @@ class Event:
 
 
 # 定义 Self 对象
-@dataclass
+@dataclass(slots=True)
 class Self:
     platform: str
     user_id: str
 
 
 # 定义消息事件对象
-@dataclass
+@dataclass(slots=True)
 class MessageEvent:
     message_id: str
     message: List[Dict[str, Any]]
@@ -33,7 +34,7 @@ class MessageEvent:
 
 
 # 定义频道对象
-@dataclass
+@dataclass(slots=True)
 class Channel:
     guild_id: str
     id: str
@@ -54,7 +55,7 @@ class Channel:
 
 
 # 定义用户对象
-@dataclass
+@dataclass(slots=True)
 class User:
     id: str
     username: str
@@ -67,7 +68,7 @@ class User:
 
 
 # 定义频道对象
-@dataclass
+@dataclass(slots=True)
 class Guild:
     id: str
     name: str
@@ -83,7 +84,7 @@ class Guild:
 
 
 # 定义成员对象
-@dataclass
+@dataclass(slots=True)
 class Member:
     user: User
     nick: Optional[str] = None
@@ -98,7 +99,7 @@ class Member:
 
 
 # 定义消息附件对象
-@dataclass
+@dataclass(slots=True)
 class MessageAttachment:
     id: str
     filename: str
@@ -112,7 +113,7 @@ class MessageAttachment:
 
 
 # 定义反应对象
-@dataclass
+@dataclass(slots=True)
 class Reaction:
     count: int
     me: bool
@@ -120,7 +121,7 @@ class Reaction:
 
 
 # 定义消息对象
-@dataclass
+@dataclass(slots=True)
 class BaseMessage:
     id: str
     channel_id: str
@@ -134,17 +135,23 @@ class BaseMessage:
     attachments: List[MessageAttachment] = field(default_factory=list)
     embeds: List[Dict[str, Any]] = field(default_factory=list)
     reactions: List[Reaction] = field(default_factory=list)
+    # 收到事件时由 Client 绑定的消息API，不参与解码、比较与输出
+    api: Any = field(default=None, repr=False, compare=False, metadata={"decode": False})
+
+    def reply(self, **kwargs):
+        """回复这条消息，参数同 post_channel_messages"""
+        if self.api is None:
+            raise UnknownError("R P N C")
+        return self.api.post_channel_messages(channel_id=self.channel_id, msg_id=self.id, **kwargs)
 
 
 # 定义消息对象
-@dataclass
+@dataclass(slots=True)
 class Message(BaseMessage):
-
-    def reply(self, **kwargs):
-        raise UnknownError("R P N C")
+    pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GroupMessageInfo:
     id: str
     timestamp: datetime
@@ -153,7 +160,7 @@ class GroupMessageInfo:
 
 
 # 定义群管理事件
-@dataclass
+@dataclass(slots=True)
 class GroupManageEvent:
     group_openid: str
     op_member_openid: str
@@ -161,31 +168,60 @@ class GroupManageEvent:
 
 
 # 定义群消息对象
-@dataclass
+@dataclass(slots=True)
 class GroupMessage(BaseMessage):
-    pass
+    group_openid: str = ""
+
+    def reply(self, **kwargs):
+        """回复这条群消息，参数同 post_group_message，配置了被动回复窗口时自动分配 msg_seq"""
+        if self.api is None:
+            raise UnknownError("R P N C")
+        return self.api.post_group_message(group_openid=self.group_openid, msg_id=self.id, **kwargs)
 
 
 # 定义私聊消息对象
-@dataclass
+@dataclass(slots=True)
 class C2CMessage(BaseMessage):
     pass
 
 
+def decode_group_author(author: dict | None) -> User:
+    """群聊消息只下发 author.id 与 union_openid"""
+    author = author or {}
+    return User(
+        id=author.get("id", ""),
+        username="群聊暂不支持获取用户名",
+        avatar="群聊暂不支持获取头像",
+        union_openid=author.get("union_openid"),
+        union_user_account=author.get("union_user_account"),
+        share_url="群聊暂不支持获取分享链接"
+    )
+
+
+# 延迟解码的消息对象，用法与 Message / GroupMessage 相同
+class LazyMessage(LazyFields, Message):
+    """保存原始 payload，content、author、timestamp 等字段在第一次访问时才解码"""
+
+
+class LazyGroupMessage(LazyFields, GroupMessage):
+    """保存原始 payload，字段在第一次访问时才解码"""
+    lazy_overrides = {"author": decode_group_author}
+
+
 # 定义论坛主题信息
-@dataclass
+@dataclass(slots=True)
 class Elems:
     text: str
     type: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Paragraphs:
     elems: List[Elems]
     props: Dict[Any, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ThreadInfo:
     content: List[Paragraphs]
     date_time: datetime
@@ -193,7 +229,7 @@ class ThreadInfo:
     title: List[Paragraphs]
 
 
-@dataclass
+@dataclass(slots=True)
 class Thread:
     author_id: str
     channel_id: str
@@ -202,7 +238,7 @@ class Thread:
 
 
 # 定义 DirectMessage 类型
-@dataclass
+@dataclass(slots=True)
 class DirectMessage:
     recipient_id: str
     message: str
@@ -210,7 +246,7 @@ class DirectMessage:
 
 
 # 定义 Group 类型
-@dataclass
+@dataclass(slots=True)
 class Group:
     id: str
     name: str
@@ -223,7 +259,7 @@ class Group:
 
 
 # 定义 Interaction 类型
-@dataclass
+@dataclass(slots=True)
 class Interaction:
     id: str
     application_id: str
@@ -235,7 +271,7 @@ class Interaction:
 
 
 # 定义 MessageAudit 类型
-@dataclass
+@dataclass(slots=True)
 class MessageAudit:
     audit_id: str
     message_id: str
@@ -244,7 +280,7 @@ class MessageAudit:
 
 
 # 定义 ForumThread 类型
-@dataclass
+@dataclass(slots=True)
 class ForumThread:
     id: str
     author_id: str
@@ -254,7 +290,7 @@ class ForumThread:
 
 
 # 定义 ForumPost 类型
-@dataclass
+@dataclass(slots=True)
 class ForumPost:
     id: str
     thread_id: str
@@ -264,7 +300,7 @@ class ForumPost:
 
 
 # 定义 ForumReply 类型
-@dataclass
+@dataclass(slots=True)
 class ForumReply:
     id: str
     post_id: str
@@ -274,7 +310,7 @@ class ForumReply:
 
 
 # 定义 ForumPublishAudit 类型
-@dataclass
+@dataclass(slots=True)
 class ForumPublishAudit:
     audit_id: str
     thread_id: str
@@ -283,25 +319,25 @@ class ForumPublishAudit:
 
 
 # 定义 AudioAction 类型
-@dataclass
+@dataclass(slots=True)
 class AudioAction:
     action: str
     duration: Optional[int] = None
 
 
 # 定义 PublicMessage 类型
-@dataclass
+@dataclass(slots=True)
 class PublicMessage(BaseMessage):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class MakeDownParams:
     key: str
     values: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class MakeDown:
     content: str
     custom_template_id: str
@@ -477,14 +513,14 @@ class PermissionType:
                 UnSupposeUsage(self.type))
 
 
-@dataclass
+@dataclass(slots=True)
 class Permission:
     type: PermissionType
     user_ids: List[str] = field(default_factory=list)
     role_ids: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class RenderData:
     label: str
     visited_label: str
@@ -519,7 +555,7 @@ class Action:
                 UnSupposeUsage("at_bot_show_channel_list"))
 
 
-@dataclass
+@dataclass(slots=True)
 class Button:
     id: Optional[str] = None
     render_data: RenderData = field(default_factory=dict)
@@ -533,7 +569,7 @@ class Button:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Keyboard:
     rows: List[List[Button]] = field(default_factory=list)
 
@@ -543,7 +579,7 @@ class Keyboard:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Ark:
     template_id: int
     kv: dict[str, Any] = field(default_factory=dict)
@@ -588,7 +624,7 @@ class C2CFileSend:
                 UnSupposeUsage("file_data"))
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaC2C:
     file_uuid: str
     file_info: str
@@ -604,13 +640,13 @@ class MediaC2C:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class C2CMessageInfo:
     message_id: str
     timestamp: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageEmbedThumbnail:
     url: str
 
@@ -620,7 +656,7 @@ class MessageEmbedThumbnail:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageEmbedField:
     name: str
 
@@ -630,7 +666,7 @@ class MessageEmbedField:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageEmbed:
     title: str
     prompt: str
@@ -646,7 +682,7 @@ class MessageEmbed:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ChannelMessageInfo:
     id: str
     channel_id: str
@@ -662,7 +698,7 @@ class ChannelMessageInfo:
     seq_in_channel: int
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaInfo:
     file_uuid: str
     file_info: str
@@ -689,15 +725,32 @@ class EmojiType:
                 UnSupposeUsage(self.type))
 
 
-@dataclass
+@dataclass(slots=True)
 class Emoji:
     """详见：https://bot.q.qq.com/wiki/develop/api-v2/openapi/emoji/model.html#emoji%E5%88%97%E8%A1%A8"""
     id: str
     type: EmojiType
 
 
-@dataclass
+@dataclass(slots=True)
 class Reaction:
     users: List[User]
     cookie: str
     is_end: bool
+
+
+@dataclass(slots=True)
+class SessionStartLimit:
+    """创建Session限制信息"""
+    total: int
+    remaining: int
+    reset_after: int
+    max_concurrency: int = 1
+
+
+@dataclass(slots=True)
+class GatewayBot:
+    """带分片信息的WebSocket接入点"""
+    url: str
+    shards: int
+    session_start_limit: SessionStartLimit
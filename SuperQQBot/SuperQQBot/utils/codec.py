@@ -0,0 +1,53 @@
+"""JSON 编解码
+
+自动选择已安装的最快实现：orjson > msgspec > 标准库 json。
+所有实现统一为 bytes 输出、bytes/str 输入，避免 str 与 bytes 之间的反复转换。
+
+请通过模块属性调用（codec.loads / codec.dumps），这样 use() 切换实现后所有调用方都会生效。"""
+import json
+from typing import Any, Callable
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+backend: str = "json"
+loads: Callable[[bytes | str], Any]
+dumps: Callable[[Any], bytes]
+# 标准库 json.loads 遇到非法 UTF-8 字节时抛出 UnicodeDecodeError，一并视为解码失败
+DecodeError: tuple[type[Exception], ...] = (json.JSONDecodeError, UnicodeDecodeError)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def use(name: str) -> None:
+    """切换 JSON 实现
+    :param name: orjson、msgspec 或 json，未安装时抛出 ImportError"""
+    global backend, loads, dumps, DecodeError
+    if name == "orjson":
+        import orjson
+        loads, dumps = orjson.loads, orjson.dumps
+        DecodeError = (orjson.JSONDecodeError,)
+    elif name == "msgspec":
+        import msgspec
+        encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+        loads, dumps = decoder.decode, encoder.encode
+        DecodeError = (msgspec.DecodeError, json.JSONDecodeError)
+    elif name == "json":
+        loads, dumps = json.loads, _stdlib_dumps
+        DecodeError = (json.JSONDecodeError, UnicodeDecodeError)
+    else:
+        raise ValueError(f"未知的JSON实现{name}，可选：{', '.join(BACKENDS)}")
+    backend = name
+
+
+def _auto_select() -> None:
+    for name in BACKENDS:
+        try:
+            use(name)
+            return
+        except ImportError:
+            continue
+
+
+_auto_select()
@@ -0,0 +1,222 @@
+"""根据 dataclass 生成事件/数据解码器
+
+compile_decoder() 读取 dataclass 的字段与类型注解，用 exec 生成一个专用的解码函数：
+每个字段只做一次 dict.get，嵌套的 dataclass、List[dataclass] 与 datetime 字段直接调用各自的解码器，
+没有运行时的类型判断与反射。old_core 与 api_clients 的 types 都通过这里生成解码器。
+
+    decode_message = compile_decoder(Message)
+    message = decode_message(payload)        # payload 可以是 dict，也可以是 JSON 的 bytes/str
+
+缺失的字段按以下规则取值：有默认值的字段使用默认值；必填的 str/int/float/bool 使用对应的零值；
+必填的嵌套对象按空 dict 解码；datetime 为 None。多余的字段会被忽略。"""
+import dataclasses
+import typing
+from datetime import datetime
+from typing import Any, Callable, TypeVar
+
+from . import codec
+from .timestamp import parse_timestamp
+
+T = TypeVar("T")
+
+_ZERO = {str: '""', int: "0", float: "0.0", bool: "False", dict: "{}", list: "[]"}
+_EMPTY: dict = {}
+_MISSING = object()
+_cache: dict[type, Callable[[Any], Any]] = {}
+
+# datetime 字段使用的解析函数，修改后只影响之后生成的解码器
+parse_datetime: Callable[[str], datetime] = parse_timestamp
+
+
+def _unwrap_optional(tp) -> tuple[Any, bool]:
+    if typing.get_origin(tp) is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return tp, False
+
+
+def _list_item(tp) -> Any:
+    if typing.get_origin(tp) in (list, typing.List):
+        args = typing.get_args(tp)
+        return args[0] if args else None
+    return None
+
+
+def _type_hints(cls) -> dict[str, Any]:
+    try:
+        return typing.get_type_hints(cls)
+    except (NameError, TypeError):
+        # 无法解析的前向引用按原始注解处理，只是少了嵌套解码
+        return {f.name: f.type for f in dataclasses.fields(cls)}
+
+
+def decoder_for(cls: type[T]) -> Callable[[Any], T]:
+    """获取 cls 的默认解码器，每个类只生成一次"""
+    decoder = _cache.get(cls)
+    if decoder is None:
+        decoder = _cache[cls] = compile_decoder(cls)
+    return decoder
+
+
+def _field_code(cls, overrides: dict, decoders: dict, namespace: dict) -> list[tuple[str, list[str], str]]:
+    """为每个字段生成解码代码
+    :return: [(字段名, 语句列表, 取值表达式)]，语句与表达式中可以使用局部变量 get（payload 的 get 方法）与 v"""
+    hints = _type_hints(cls)
+    code = []
+
+    def nested_decoder(tp) -> str:
+        name = f"_dec_{len(namespace)}"
+        namespace[name] = decoders.get(tp) or decoder_for(tp)
+        return name
+
+    for index, f in enumerate(dataclasses.fields(cls)):
+        if not f.init:
+            continue
+        key, var = f.name, f"f{index}"
+        tp, optional = _unwrap_optional(hints.get(key, Any))
+        item = _list_item(tp)
+
+        if f.default is not dataclasses.MISSING:
+            namespace[f"_default_{index}"] = f.default
+            missing = f"_default_{index}"
+        elif f.default_factory is not dataclasses.MISSING:
+            namespace[f"_factory_{index}"] = f.default_factory
+            missing = f"_factory_{index}()"
+        elif optional:
+            missing = "None"
+        else:
+            missing = None
+
+        if f.metadata.get("decode") is False:
+            # 运行时绑定的字段，如 BaseMessage.api
+            code.append((key, [], missing or "None"))
+        elif key in overrides:
+            namespace[f"_override_{index}"] = overrides[key]
+            code.append((key, [], f"_override_{index}(get({key!r}))"))
+        elif dataclasses.is_dataclass(tp):
+            dec = nested_decoder(tp)
+            fallback = missing if missing is not None else f"{dec}(_EMPTY)"
+            code.append((key, [f"v = get({key!r})", f"{var} = {dec}(v) if v is not None else {fallback}"], var))
+        elif item is not None and dataclasses.is_dataclass(item):
+            dec = nested_decoder(item)
+            code.append((key, [f"v = get({key!r})", f"{var} = [{dec}(x) for x in v] if v else {missing or '[]'}"],
+                         var))
+        elif tp is datetime:
+            # BaseConnect.json() 已经转换过的 datetime 原样保留
+            code.append((key, [f"v = get({key!r})",
+                               f"{var} = (_parse_datetime(v) if v.__class__ is str else v) if v else "
+                               f"{missing or 'None'}"], var))
+        elif missing is not None and missing.startswith("_factory_"):
+            code.append((key, [f"v = get({key!r})", f"{var} = v if v is not None else {missing}"], var))
+        else:
+            zero = missing or _ZERO.get(typing.get_origin(tp) or tp, "None")
+            code.append((key, [], f"get({key!r}, {zero})"))
+    return code
+
+
+def _namespace() -> dict[str, Any]:
+    return {"_codec": codec, "_EMPTY": _EMPTY, "_parse_datetime": parse_datetime}
+
+
+def compile_decoder(cls: type[T], overrides: dict[str, Callable[[Any], Any]] | None = None,
+                    decoders: dict[type, Callable[[Any], Any]] | None = None) -> Callable[[Any], T]:
+    """生成 cls 的解码函数
+    :param cls: dataclass
+    :param overrides: 字段名 -> 转换函数，参数为 payload 中的原始值（可能为 None），用于特殊格式的字段
+    :param decoders: 嵌套类型 -> 解码函数，替换该类型的默认解码器
+    :return: decode(payload) -> cls 实例"""
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls!r} 不是 dataclass")
+    namespace = _namespace()
+    namespace["_cls"] = cls
+    lines = ["def decode(d):",
+             "    if d.__class__ is not dict:",
+             "        d = _codec.loads(d)",
+             "    get = d.get"]
+    args = []
+    for _, statements, expr in _field_code(cls, overrides or {}, decoders or {}, namespace):
+        lines.extend(f"    {statement}" for statement in statements)
+        args.append(expr)
+    lines.append(f"    return _cls({', '.join(args)})")
+    source = "\n".join(lines)
+    exec(compile(source, f"<decoder {cls.__module__}.{cls.__qualname__}>", "exec"), namespace)
+    decode = namespace["decode"]
+    decode.__qualname__ = f"decode_{cls.__name__}"
+    decode.__doc__ = f"将 payload 解码为 {cls.__qualname__}"
+    decode.__source__ = source
+    return decode
+
+
+def compile_field_getters(cls: type, overrides: dict[str, Callable[[Any], Any]] | None = None,
+                          decoders: dict[type, Callable[[Any], Any]] | None = None
+                          ) -> dict[str, Callable[[dict], Any]]:
+    """为每个字段单独生成取值函数，规则与 compile_decoder 相同，供 LazyFields 按需解码
+    :return: 字段名 -> get_field(payload)"""
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls!r} 不是 dataclass")
+    namespace = _namespace()
+    lines = []
+    names = {}
+    for index, (key, statements, expr) in enumerate(_field_code(cls, overrides or {}, decoders or {}, namespace)):
+        names[key] = f"get_{index}"
+        lines.append(f"def get_{index}(d):")
+        lines.append("    get = d.get")
+        lines.extend(f"    {statement}" for statement in statements)
+        lines.append(f"    return {expr}")
+    exec(compile("\n".join(lines), f"<field getters {cls.__module__}.{cls.__qualname__}>", "exec"), namespace)
+    return {key: namespace[name] for key, name in names.items()}
+
+
+class _LazyField:
+    """LazyFields 的字段描述符：第一次访问时解码，结果缓存在实例的 __dict__ 中"""
+    __slots__ = ("name", "getter")
+
+    def __init__(self, name: str, getter: Callable[[dict], Any]):
+        self.name = name
+        self.getter = getter
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        values = instance.__dict__
+        value = values.get(self.name, _MISSING)
+        if value is _MISSING:
+            value = values[self.name] = self.getter(values["_payload"])
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+class LazyFields:
+    """延迟解码混入类
+
+    与 dataclass 模型一起继承，实例只保存原始 payload，字段在第一次访问时才解码并缓存到实例上，
+    没有访问过的 datetime、嵌套对象与列表不会分配内存。isinstance 判断与原模型一致。
+    每次访问字段都要经过一次 Python 描述符调用，访问字段较多时比 compile_decoder 生成的解码器慢。
+
+        class LazyMessage(LazyFields, Message):
+            pass
+
+    子类可以通过类属性 lazy_overrides 指定特殊字段的转换函数（同 compile_decoder 的 overrides）。"""
+    lazy_overrides: dict[str, Callable[[Any], Any]] = {}
+    _field_getters: dict[str, Callable[[dict], Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if dataclasses.is_dataclass(cls):
+            cls._field_getters = compile_field_getters(cls, cls.lazy_overrides)
+            # 字段改为类属性上的描述符，覆盖 slots 模型的成员描述符：未解码的字段不再经过 AttributeError + __getattr__
+            for name, getter in cls._field_getters.items():
+                setattr(cls, name, _LazyField(name, getter))
+
+    def __init__(self, payload: dict | bytes | str):
+        if payload.__class__ is not dict:
+            payload = codec.loads(payload)
+        self.__dict__["_payload"] = payload
+
+    @property
+    def payload(self) -> dict:
+        """原始 payload"""
+        return self._payload
@@ -0,0 +1,49 @@
+"""数据模型工具"""
+import dataclasses
+import functools
+from typing import Any
+
+_frozen_cache: dict[type, type] = {}
+
+
+def frozen(cls: type) -> type:
+    """返回 cls 的不可变版本（frozen + slots）
+
+    字段、默认值、构造参数与方法都与 cls 相同，实例不可修改且可哈希（字段值均可哈希时），
+    适合放进长期保存的缓存或作为 dict 的键。注意它不是 cls 的子类，isinstance(obj, cls) 为 False；
+    cls 上的 functools.cached_property 在不可变版本中不再缓存，每次访问都会重新计算。
+
+        FrozenMember = frozen(Member)
+        member = FrozenMember(user=user, nick="nick")
+    """
+    variant = _frozen_cache.get(cls)
+    if variant is not None:
+        return variant
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls!r} 不是 dataclass")
+    fields = []
+    for f in dataclasses.fields(cls):
+        kwargs: dict[str, Any] = {"init": f.init, "repr": f.repr, "compare": f.compare, "metadata": f.metadata}
+        if f.default is not dataclasses.MISSING:
+            kwargs["default"] = f.default
+        elif f.default_factory is not dataclasses.MISSING:
+            kwargs["default_factory"] = f.default_factory
+        fields.append((f.name, f.type, dataclasses.field(**kwargs)))
+    # 保留 to_dict、__str__ 等自定义方法，以及 property、classmethod 等描述符
+    field_names = {f.name for f in dataclasses.fields(cls)}
+    namespace = {}
+    for base in reversed(cls.__mro__[:-1]):
+        for name, value in vars(base).items():
+            if name in field_names or name.startswith("__") and name != "__str__":
+                continue
+            if isinstance(value, functools.cached_property):
+                # slots 类没有 __dict__ 存放缓存值，退化为每次计算的 property
+                namespace[name] = property(value.func)
+            elif callable(value) or hasattr(type(value), "__get__"):
+                namespace[name] = value
+    variant = dataclasses.make_dataclass(f"Frozen{cls.__name__}", fields, namespace=namespace,
+                                         frozen=True, slots=True)
+    variant.__module__ = cls.__module__
+    variant.__doc__ = cls.__doc__
+    _frozen_cache[cls] = variant
+    return variant
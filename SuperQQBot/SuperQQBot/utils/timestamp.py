@@ -0,0 +1,34 @@
+"""平台时间戳解析
+
+平台下发的时间戳格式固定为 2024-11-05T12:01:07+08:00，datetime.fromisoformat 可以直接解析（C 实现），
+比 dateutil.parser.isoparse 快一个数量级；遇到 Z 后缀、小数秒位数不规范等 fromisoformat 不支持的写法时再交给 dateutil。
+
+同一批事件的时间戳通常精确到秒且大量重复，解析结果按原字符串缓存，datetime 不可变，可以安全地共享同一个对象。"""
+from datetime import datetime
+
+from dateutil import parser
+
+CACHE_SIZE = 1024
+
+_cache: dict[str, datetime] = {}
+
+
+def parse_timestamp(value: str) -> datetime:
+    """解析 ISO-8601 时间戳
+    :raise ValueError: 无法解析"""
+    result = _cache.get(value)
+    if result is not None:
+        return result
+    try:
+        result = datetime.fromisoformat(value)
+    except ValueError:
+        result = parser.isoparse(value)
+    if len(_cache) >= CACHE_SIZE:
+        # 时间戳基本单调递增，旧的很少再出现，整体清空比维护 LRU 更便宜
+        _cache.clear()
+    _cache[value] = result
+    return result
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""事件解码微基准
+
+对 data/event_mix.jsonl 中的已注册事件，比较手写的逐字段 .get() 解码（改造前的实现，保留在本文件中作为参照）
+与 utils.decoder 生成的解码器的单事件耗时，并给出直接从 JSON bytes 解码的耗时。
+
+用法：python benchmarks/bench_decode.py [--rounds 200]"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+from dateutil.parser import isoparse
+
+from SuperQQBot.old_core.decoders import default_dispatcher
+from SuperQQBot.old_core.types import GroupMessage, Message, MessageAttachment, Reaction, User
+from SuperQQBot.utils import codec
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+
+
+def load_event_mix() -> list[dict]:
+    with open(EVENT_MIX, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _legacy_user(data: dict) -> User:
+    return User(id=data.get("id", ""), username=data.get("username", ""), avatar=data.get("avatar", ""),
+                bot=data.get("bot", False), union_openid=data.get("union_openid"),
+                union_user_account=data.get("union_user_account"), share_url=data.get("share_url"),
+                welcome_msg=data.get("welcome_msg"))
+
+
+def _legacy_attachment(attachment: dict) -> MessageAttachment:
+    return MessageAttachment(id=attachment.get("id", ""), filename=attachment.get("filename", ""),
+                             size=attachment.get("size", 0), url=attachment.get("url", ""),
+                             proxy_url=attachment.get("proxy_url", ""), height=attachment.get("height"),
+                             width=attachment.get("width"), description=attachment.get("description"),
+                             content_type=attachment.get("content_type"))
+
+
+def legacy_message(about_event: dict) -> Message:
+    edited_timestamp = about_event.get("edited_timestamp")
+    return Message(
+        id=about_event.get("id", ""), channel_id=about_event.get("channel_id", ""),
+        guild_id=about_event.get("guild_id", ""), content=about_event.get("content", ""),
+        timestamp=isoparse(about_event.get("timestamp", "")),
+        author=_legacy_user(about_event.get("author", {})),
+        edited_timestamp=isoparse(edited_timestamp) if edited_timestamp else None,
+        mention_roles=about_event.get("mention_roles", []),
+        mentions=[_legacy_user(mention) for mention in about_event.get("mentions", [])],
+        attachments=[_legacy_attachment(attachment) for attachment in about_event.get("attachments", [])],
+        embeds=about_event.get("embeds", []),
+        reactions=[Reaction(count=reaction.get("count", 0), me=reaction.get("me", False),
+                            emoji=reaction.get("emoji", {})) for reaction in about_event.get("reactions", [])])
+
+
+def legacy_group_message(about_event: dict) -> GroupMessage:
+    author = about_event.get("author", {})
+    return GroupMessage(
+        id=about_event.get("id", ""), channel_id=about_event.get("channel_id", ""),
+        guild_id=about_event.get("guild_id", ""), content=about_event.get("content", ""),
+        timestamp=isoparse(about_event.get("timestamp", "")),
+        author=User(id=author.get("id", ""), username="群聊暂不支持获取用户名", avatar="群聊暂不支持获取头像",
+                    union_openid=author.get("union_openid"), union_user_account=author.get("union_user_account"),
+                    share_url="群聊暂不支持获取分享链接"),
+        attachments=[_legacy_attachment(attachment) for attachment in about_event.get("attachments", [])])
+
+
+LEGACY = {
+    "AT_MESSAGE_CREATE": legacy_message,
+    "MESSAGE_CREATE": legacy_message,
+    "GROUP_AT_MESSAGE_CREATE": legacy_group_message,
+}
+
+
+def measure(decode, payloads: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            decode(payload)
+    return (time.perf_counter() - start) / (rounds * len(payloads))
+
+
+def main(rounds: int):
+    dispatcher = default_dispatcher()
+    by_type = defaultdict(list)
+    for frame in load_event_mix():
+        if frame["t"] in dispatcher:
+            by_type[frame["t"]].append(frame["d"])
+
+    print(f"JSON 实现：{codec.backend}")
+    print(f"{'事件类型':<26}{'数量':>6}{'手写':>12}{'生成':>12}{'生成(bytes)':>14}")
+    for event_type, payloads in sorted(by_type.items()):
+        generated = dispatcher.get(event_type).decoder
+        raw = [codec.dumps(payload) for payload in payloads]
+        legacy = LEGACY.get(event_type)
+        legacy_cost = f"{measure(legacy, payloads, rounds) * 1e6:.2f}us" if legacy else "-"
+        print(f"{event_type:<30}{len(payloads):>6}{legacy_cost:>12}"
+              f"{measure(generated, payloads, rounds) * 1e6:>10.2f}us"
+              f"{measure(generated, raw, rounds) * 1e6:>12.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    main(parser.parse_args().rounds)
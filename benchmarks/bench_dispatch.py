@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""事件分发微基准
+
+使用 data/event_mix.jsonl 中录制的事件组合（@消息、群消息、频道消息与未注册事件），
+测量 Client.dispatch_event 的单事件耗时，以及未注册事件被丢弃的耗时。
+
+用法：python benchmarks/bench_dispatch.py [--rounds 50]"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import warnings
+from collections import Counter
+
+from SuperQQBot.old_core.client import Client, Intents
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+
+
+def load_event_mix() -> list[dict]:
+    with open(EVENT_MIX, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class BenchClient(Client):
+    """所有处理函数均为空操作，只测量分发本身"""
+
+    async def on_at_message_create(self, message):
+        pass
+
+    async def on_message_create(self, message):
+        pass
+
+    async def on_group_at_message_create(self, message):
+        pass
+
+
+async def measure(client: Client, frames: list[dict], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            await client.dispatch_event(frame["t"], frame["d"])
+    return (time.perf_counter() - start) / (rounds * len(frames))
+
+
+async def main(rounds: int):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        client = BenchClient(Intents.none())
+    client.token = "bench"
+    frames = load_event_mix()
+    print("事件组合：" + "，".join(f"{t} {n}" for t, n in Counter(f["t"] for f in frames).most_common()))
+
+    known = [f for f in frames if f["t"] in client.dispatcher]
+    unknown = [f for f in frames if f["t"] not in client.dispatcher]
+    print(f"全部事件     {await measure(client, frames, rounds) * 1e6:>8.2f} us/事件")
+    print(f"已注册事件   {await measure(client, known, rounds) * 1e6:>8.2f} us/事件")
+    if unknown:
+        # 未注册事件只做一次字典查找，不会进入解码
+        print(f"未注册事件   {await measure(client, unknown, rounds) * 1e6:>8.2f} us/事件")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    asyncio.run(main(parser.parse_args().rounds))
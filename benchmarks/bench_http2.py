@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""HTTP/1.1 与 HTTP/2 传输吞吐对比
+
+在本地启动一个同时支持 HTTP/1.1 与 HTTP/2（h2c 先验知识模式）的桩服务器，
+模拟 post_channel_messages 的并发发送，比较两种传输方式的吞吐与连接数。
+
+用法：python benchmarks/bench_http2.py [--requests 2000] [--concurrency 200] [--delay 0.02]
+需要安装 h2：pip install httpx[http2]"""
+import argparse
+import asyncio
+import time
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import RequestReceived, StreamEnded, DataReceived
+
+from SuperQQBot.api_clients.connection import SessionManager, PostConnect
+from SuperQQBot.api_clients.exceptions import NetworkError
+
+RESPONSE_BODY = (b'{"id":"08f8a0d0","channel_id":"1","guild_id":"1","content":"bench",'
+                 b'"timestamp":"2024-11-05T12:00:00+08:00"}')
+
+
+class H1StubProtocol(asyncio.Protocol):
+    """极简 HTTP/1.1 keep-alive 桩服务"""
+    connections = 0
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        H1StubProtocol.connections += 1
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            head, rest = self.buffer.split(b"\r\n\r\n", 1)
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if len(rest) < length:
+                return
+            self.buffer = rest[length:]
+            asyncio.get_running_loop().call_later(self.delay, self.respond)
+
+    def respond(self):
+        if not self.transport.is_closing():
+            self.transport.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                                 b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY)
+
+
+class H2StubProtocol(asyncio.Protocol):
+    """极简 HTTP/2（h2c）桩服务"""
+    connections = 0
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.conn = H2Connection(config=H2Configuration(client_side=False))
+
+    def connection_made(self, transport):
+        H2StubProtocol.connections += 1
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, DataReceived):
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, StreamEnded):
+                asyncio.get_running_loop().call_later(self.delay, self.respond, event.stream_id)
+            elif isinstance(event, RequestReceived) and event.stream_ended:
+                asyncio.get_running_loop().call_later(self.delay, self.respond, event.stream_id)
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        if self.transport.is_closing():
+            return
+        self.conn.send_headers(stream_id, [(":status", "200"), ("content-type", "application/json"),
+                                           ("content-length", str(len(RESPONSE_BODY)))])
+        self.conn.send_data(stream_id, RESPONSE_BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+class H2CSessionManager(SessionManager):
+    """本地桩服务没有 TLS/ALPN，只能以先验知识方式直接使用 HTTP/2"""
+
+    def _client_options(self, base_url: str) -> dict:
+        return {**super()._client_options(base_url), "http1": False, "http2": True}
+
+
+async def run_case(name, protocol, session, requests, concurrency, delay):
+    protocol.connections = 0
+    server = await asyncio.get_running_loop().create_server(lambda: protocol(delay), "127.0.0.1", 0)
+    base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def send(i):
+        nonlocal failures
+        async with semaphore:
+            post_connect = PostConnect("/channels/1/messages", "token", {"content": f"bench {i}"}, base_url,
+                                       session=session)
+            try:
+                await post_connect.apply()
+            except NetworkError:
+                # 连接池排队超时等，计入失败数
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stats = session.stats()[base_url]
+    await session.aclose()
+    server.close()
+    await server.wait_closed()
+    print(f"{name:<10} {(requests - failures) / elapsed:>10.1f} req/s  {elapsed * 1000:>9.1f} ms  "
+          f"服务端连接数 {protocol.connections}  失败 {failures}  "
+          f"请求/响应 {stats['requests']}/{stats['responses']}")
+
+
+async def main(args):
+    print(f"请求数 {args.requests}，并发 {args.concurrency}，服务端延迟 {args.delay * 1000:.0f} ms")
+    await run_case("HTTP/1.1", H1StubProtocol, SessionManager(), args.requests, args.concurrency, args.delay)
+    await run_case("HTTP/2", H2StubProtocol, H2CSessionManager(http2=True), args.requests, args.concurrency,
+                   args.delay)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""延迟解码微基准
+
+对 data/event_mix.jsonl 中的消息事件，模拟只读取 content、author.id 与 channel_id 的常见处理函数，
+比较立即解码（Message / GroupMessage）与延迟解码（LazyMessage / LazyGroupMessage）的单事件耗时，
+并用 tracemalloc 统计每个事件的内存分配次数与字节数。最后一列为访问全部字段时延迟解码的耗时。
+
+用法：python benchmarks/bench_lazy.py [--rounds 200]"""
+import argparse
+import dataclasses
+import json
+import os
+import time
+import tracemalloc
+
+from SuperQQBot.old_core.decoders import default_dispatcher
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+MESSAGE_EVENTS = ("AT_MESSAGE_CREATE", "MESSAGE_CREATE", "GROUP_AT_MESSAGE_CREATE")
+
+
+def load_event_mix() -> list[dict]:
+    with open(EVENT_MIX, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def common_handler(message):
+    return message.content, message.author.id, message.channel_id
+
+
+def full_handler(message):
+    return [getattr(message, f.name) for f in dataclasses.fields(message)]
+
+
+def run(dispatcher, frames, handler, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for event_type, payload in frames:
+            handler(dispatcher.decode(event_type, payload)[1])
+    return (time.perf_counter() - start) / (rounds * len(frames))
+
+
+def allocations(dispatcher, frames, handler) -> tuple[float, float]:
+    """每个事件的 (分配次数, 字节数)，事件对象保留到统计结束，避免被释放抵消"""
+    keep = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for event_type, payload in frames:
+        event = dispatcher.decode(event_type, payload)[1]
+        handler(event)
+        keep.append(event)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / len(frames), size / len(frames)
+
+
+def main(rounds: int):
+    frames = [(frame["t"], frame["d"]) for frame in load_event_mix() if frame["t"] in MESSAGE_EVENTS]
+    print(f"消息事件 {len(frames)} 个")
+    print(f"{'模式':<8}{'常见处理':>12}{'分配次数':>10}{'分配字节':>10}{'访问全部字段':>14}")
+    for name, lazy in (("立即解码", False), ("延迟解码", True)):
+        dispatcher = default_dispatcher(lazy=lazy)
+        common = run(dispatcher, frames, common_handler, rounds)
+        blocks, size = allocations(dispatcher, frames, common_handler)
+        full = run(dispatcher, frames, full_handler, rounds)
+        print(f"{name:<8}{common * 1e6:>10.2f}us{blocks:>12.1f}{size:>12.0f}B{full * 1e6:>12.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    main(parser.parse_args().rounds)
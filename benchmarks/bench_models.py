@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""数据模型内存基准
+
+分别创建 N 个 User 与 Member（Member 内嵌 User），用 tracemalloc 统计每个对象占用的字节数，比较：
+- 普通 dataclass（每个实例带 __dict__，即改造前的模型）；
+- 当前的 slots 模型；
+- utils.models.frozen() 生成的不可变版本。
+
+用法：python benchmarks/bench_models.py [-n 100000]"""
+import argparse
+import dataclasses
+import gc
+import time
+import tracemalloc
+
+from SuperQQBot.api_clients.types import Member, User
+from SuperQQBot.utils.models import frozen
+
+
+def with_dict(cls: type) -> type:
+    """与 cls 字段相同、但不使用 slots 的 dataclass"""
+    fields = [(f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+              for f in dataclasses.fields(cls)]
+    return dataclasses.make_dataclass(f"Dict{cls.__name__}", fields)
+
+
+def build(user_cls: type, member_cls: type, n: int) -> list:
+    return [member_cls(user=user_cls(id=str(10 ** 17 + i), username=f"user{i}", avatar=""),
+                       nick=f"nick{i}", roles=["1", "4"]) for i in range(n)]
+
+
+def measure(user_cls: type, member_cls: type, n: int) -> tuple[float, float]:
+    """(每个 Member+User 的字节数, 创建耗时 us)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(user_cls, member_cls, n)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / n, elapsed / n * 1e6
+
+
+def main(n: int):
+    variants = {
+        "__dict__": (with_dict(User), with_dict(Member)),
+        "slots": (User, Member),
+        "frozen+slots": (frozen(User), frozen(Member)),
+    }
+    print(f"{n} 个 Member（各含一个 User、两个字符串与一个 roles 列表）")
+    baseline = None
+    for name, (user_cls, member_cls) in variants.items():
+        per_object, cost = measure(user_cls, member_cls, n)
+        baseline = baseline or per_object
+        print(f"{name:<14}{per_object:>8.0f} B/个  {per_object / baseline:>6.0%}  创建 {cost:.2f} us/个")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100000)
+    main(parser.parse_args().n)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""消息事件绑定 API 的分配基准
+
+对 data/event_mix.jsonl 中的消息事件，比较分发时为 message.reply() 绑定 API 的两种做法：
+- 每个事件新建 MessageSendReceiveAPI 并用 functools.partial 生成 reply（改造前的实现）；
+- Client.api 提供的共享 BotAPI，只给事件设置一个属性。
+
+用 tracemalloc 统计绑定过程中每个事件新增的内存块数与字节数（事件保持存活，与处理函数持有事件时一致），并给出耗时。
+
+用法：python benchmarks/bench_reply_binding.py [--rounds 20]"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+from functools import partial
+
+from SuperQQBot.old_core.api import BotAPI, MessageSendReceiveAPI
+from SuperQQBot.old_core.decoders import default_dispatcher
+from SuperQQBot.old_core.types import BaseMessage
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+TOKEN = "benchmark-access-token"
+
+
+def load_messages() -> list[tuple[str, dict]]:
+    dispatcher = default_dispatcher()
+    frames = []
+    with open(EVENT_MIX, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                frame = json.loads(line)
+                decoded = dispatcher.decode(frame["t"], frame["d"])
+                if decoded is not None and isinstance(decoded[1], BaseMessage):
+                    frames.append((frame["t"], frame["d"]))
+    return frames
+
+
+def bind_legacy(events: list) -> list:
+    replies = []
+    for event in events:
+        api = MessageSendReceiveAPI(TOKEN, False)
+        event.api = api
+        replies.append(partial(api.post_channel_messages, channel_id=event.channel_id, msg_id=event.id))
+    return replies
+
+
+def bind_shared(events: list, api: BotAPI) -> list:
+    for event in events:
+        event.api = api
+    return []
+
+
+def measure(bind, frames: list, rounds: int) -> tuple[float, float, float]:
+    """(每个事件的内存块数, 字节数, 耗时 us)"""
+    dispatcher = default_dispatcher()
+    blocks = size = elapsed = 0.0
+    for _ in range(rounds):
+        events = [dispatcher.decode(event_type, payload)[1] for event_type, payload in frames]
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = bind(events)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "lineno")
+        # 只统计绑定代码本身以及 SuperQQBot 内部的分配，排除 tracemalloc 快照自身的开销
+        stats = [stat for stat in stats if "tracemalloc" not in stat.traceback[0].filename]
+        blocks += sum(stat.count_diff for stat in stats)
+        size += sum(stat.size_diff for stat in stats)
+        del kept
+        start = time.perf_counter()
+        bind(events)
+        elapsed += time.perf_counter() - start
+    n = rounds * len(frames)
+    return blocks / n, size / n, elapsed / n * 1e6
+
+
+def main(rounds: int):
+    frames = load_messages()
+    shared = BotAPI(TOKEN, False)
+    print(f"消息事件 {len(frames)} 个，重复 {rounds} 轮")
+    print(f"{'方式':<22}{'块/事件':>10}{'字节/事件':>12}{'耗时':>12}")
+    for name, bind in (("每事件新建 API+partial", bind_legacy),
+                       ("共享 Client.api", lambda events: bind_shared(events, shared))):
+        blocks, size, cost = measure(bind, frames, rounds)
+        print(f"{name:<22}{blocks:>10.2f}{size:>12.1f}{cost:>10.3f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    main(parser.parse_args().rounds)
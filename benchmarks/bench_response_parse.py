@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""响应解析微基准
+
+对比旧版 BaseConnect.json()（is_error/error_code/verify_data 各自重复调用 response.json()）
+与 ApiResponse 单次解析的单次调用 CPU 耗时。
+
+用法：python benchmarks/bench_response_parse.py [--number 20000]"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+import httpx
+
+from SuperQQBot.api_clients.connection import ApiResponse
+
+BODY = json.dumps({
+    "id": "08f8a0d0a3e8b5a9e1f3011a0f3131353133373332373635383430",
+    "channel_id": "1234567",
+    "guild_id": "7654321",
+    "content": "hello world " * 8,
+    "timestamp": "2024-11-05T12:34:56+08:00",
+    "tts": False,
+    "mention_everyone": False,
+    "author": {"id": "1234567890", "username": "bench-bot", "avatar": "https://example.com/a.png", "bot": True},
+    "pinned": False,
+    "type": 0,
+    "flags": 0,
+    "seq_in_channel": "42",
+}).encode()
+
+
+def make_response() -> httpx.Response:
+    return httpx.Response(200, content=BODY, headers={"Content-Type": "application/json"})
+
+
+def legacy_json(response: httpx.Response):
+    """旧实现的调用链：json() -> verify_data() -> error_code() -> is_error()，每一步都重新解析"""
+
+    def is_error():
+        return response.status_code != 200 or "err_code" in response.json()
+
+    def error_code():
+        return response.json()["code"] if is_error() else None
+
+    def error_reason():
+        return response.json()["message"] if is_error() else None
+
+    if error_code() is not None:
+        error_reason()
+    json_result = response.json()
+    if "timestamp" in json_result.keys():
+        json_result["timestamp"] = datetime.fromisoformat(json_result["timestamp"])
+    return json_result
+
+
+def single_parse_json(response: httpx.Response):
+    result = ApiResponse(response)
+    if result.is_error:
+        return None
+    return result.json()
+
+
+def main(number: int):
+    assert legacy_json(make_response()) == single_parse_json(make_response())
+    for name, func in (("旧实现", legacy_json), ("单次解析", single_parse_json)):
+        # 每次都构造新的 Response，避免 httpx 内部缓存影响结果
+        elapsed = timeit.timeit(lambda: func(make_response()), number=number)
+        baseline = timeit.timeit(make_response, number=number)
+        print(f"{name:<6} {(elapsed - baseline) / number * 1e6:>8.2f} us/次")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    main(parser.parse_args().number)
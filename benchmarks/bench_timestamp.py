@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""时间戳解析微基准
+
+收集 data/event_mix.jsonl 中所有 timestamp/edited_timestamp/joined_at 字段，比较
+dateutil.parser.isoparse（改造前 old_core 的实现）、datetime.fromisoformat（改造前 BaseConnect.json() 的实现）
+与 utils.timestamp.parse_timestamp 冷缓存、热缓存下的单次耗时。
+
+用法：python benchmarks/bench_timestamp.py [--rounds 200]"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from dateutil.parser import isoparse
+
+from SuperQQBot.utils import timestamp
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+KEYS = ("timestamp", "edited_timestamp", "joined_at")
+
+
+def collect(value, out: list[str]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in KEYS and isinstance(item, str) and item:
+                out.append(item)
+            else:
+                collect(item, out)
+    elif isinstance(value, list):
+        for item in value:
+            collect(item, out)
+
+
+def load_timestamps() -> list[str]:
+    values = []
+    with open(EVENT_MIX, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                collect(json.loads(line), values)
+    return values
+
+
+def measure(parse, values: list[str], rounds: int, before_round=None) -> float:
+    elapsed = 0.0
+    for _ in range(rounds):
+        if before_round is not None:
+            before_round()
+        start = time.perf_counter()
+        for value in values:
+            parse(value)
+        elapsed += time.perf_counter() - start
+    return elapsed / (rounds * len(values))
+
+
+def main(rounds: int):
+    values = load_timestamps()
+    for value in values:
+        assert timestamp.parse_timestamp(value) == isoparse(value), value
+    print(f"时间戳 {len(values)} 个，不同取值 {len(set(values))} 个")
+    results = [
+        ("dateutil.isoparse", measure(isoparse, values, rounds)),
+        ("datetime.fromisoformat", measure(datetime.fromisoformat, values, rounds)),
+        ("parse_timestamp（冷缓存）", measure(timestamp.parse_timestamp, values, rounds, timestamp.clear_cache)),
+        ("parse_timestamp（热缓存）", measure(timestamp.parse_timestamp, values, rounds)),
+    ]
+    baseline = results[0][1]
+    for name, cost in results:
+        print(f"{name:<26}{cost * 1e6:>10.3f}us{baseline / cost:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    main(parser.parse_args().rounds)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""WebHook 验签吞吐量基准
+
+用 data/event_mix.jsonl 中的事件作为请求体，比较：
+- 每个请求都由密钥重新派生公钥再验签（没有密钥缓存时的做法）；
+- Ed25519Validator 缓存密钥后在事件循环中直接验签；
+- Ed25519Validator 始终转到线程池验签（offload_threshold=0），并发提交。
+
+用法：python benchmarks/bench_validator.py [--rounds 20] [--threads 4]"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from SuperQQBot.interfaces.validator import Ed25519Validator, derive_seed
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+SECRET = "benchmark-bot-secret"
+TIMESTAMP = str(int(time.time()))
+
+
+def load_requests(validator: Ed25519Validator) -> list[tuple[dict, bytes]]:
+    with open(EVENT_MIX, "rb") as f:
+        bodies = [line.strip() for line in f if line.strip()]
+    return [({"x-signature-timestamp": TIMESTAMP,
+              "x-signature-ed25519": validator.sign(TIMESTAMP.encode() + body)}, body) for body in bodies]
+
+
+def verify_uncached(headers: dict, body: bytes) -> bool:
+    public_key = Ed25519PrivateKey.from_private_bytes(derive_seed(SECRET)).public_key()
+    public_key.verify(bytes.fromhex(headers["x-signature-ed25519"]), TIMESTAMP.encode() + body)
+    return True
+
+
+async def run_inline(validator: Ed25519Validator, requests: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for headers, body in requests:
+            assert await validator.verify(headers, body)
+    return rounds * len(requests) / (time.perf_counter() - start)
+
+
+async def run_concurrent(validator: Ed25519Validator, requests: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(validator.verify(headers, body) for headers, body in requests))
+        assert all(results)
+    return rounds * len(requests) / (time.perf_counter() - start)
+
+
+async def main(rounds: int, threads: int):
+    inline = Ed25519Validator(SECRET, offload_threshold=None)
+    requests = load_requests(inline)
+    print(f"请求 {len(requests)} 个，重复 {rounds} 轮")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for headers, body in requests:
+            verify_uncached(headers, body)
+    print(f"{'每次派生密钥':<18}{rounds * len(requests) / (time.perf_counter() - start):>12,.0f} 次/秒")
+    print(f"{'缓存密钥（事件循环）':<18}{await run_inline(inline, requests, rounds):>12,.0f} 次/秒")
+    with ThreadPoolExecutor(threads) as executor:
+        offloaded = Ed25519Validator(SECRET, executor=executor, offload_threshold=0)
+        print(f"{f'缓存密钥（{threads} 线程）':<18}{await run_concurrent(offloaded, requests, rounds):>12,.0f} 次/秒")
+    print(f"平均单次验签耗时 {inline.stats()['average_cost'] * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.threads))
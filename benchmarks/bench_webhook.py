@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""WebHook 服务压测
+
+在本机启动 core.server.WebHookServer，用若干条 keep-alive 连接循环发送 data/event_mix.jsonl 中的事件，
+统计吞吐量与请求延迟分位数。事件会完整走一遍分发表解码，处理函数只计数。
+--handler-delay 模拟慢处理函数，--immediate-ack 对比入队后立即 ACK 时的投递延迟。
+压测客户端与服务端运行在同一个事件循环中，结果偏保守。
+
+用法：python benchmarks/bench_webhook.py [--connections 32] [--requests 20000] [--workers 0]
+                                       [--handler-delay 0] [--immediate-ack] [--queue-workers 4]"""
+import argparse
+import asyncio
+import os
+import time
+import warnings
+
+from SuperQQBot.core.server import WebHookServer
+from SuperQQBot.old_core.client import Client, Intents
+
+EVENT_MIX = os.path.join(os.path.dirname(__file__), "data", "event_mix.jsonl")
+
+
+class CountingClient(Client):
+
+    def __init__(self, *args, handler_delay: float = 0, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            super().__init__(*args, **kwargs)
+        self.handled = 0
+        self.handler_delay = handler_delay
+
+    async def dispatch_event(self, event_type: str, about_event: dict):
+        if self.dispatcher.decode(event_type, about_event) is not None:
+            if self.handler_delay:
+                await asyncio.sleep(self.handler_delay)
+            self.handled += 1
+
+
+def load_requests() -> list[bytes]:
+    with open(EVENT_MIX, "rb") as f:
+        bodies = [line.strip() for line in f if line.strip()]
+    return [(f"POST / HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+             f"Content-Length: {len(body)}\r\n\r\n").encode() + body for body in bodies]
+
+
+async def connection(port: int, requests: list[bytes], count: int, offset: int, latencies: list[float]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            writer.write(requests[(offset + i) % len(requests)])
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def main(connections: int, total: int, workers: int, handler_delay: float, immediate_ack: bool,
+               queue_workers: int):
+    client = CountingClient(Intents.none(), workers=workers, handler_delay=handler_delay)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        server = WebHookServer(client, host="127.0.0.1", port=0, immediate_ack=immediate_ack,
+                               queue_size=total, queue_workers=queue_workers)
+    await server.start()
+    port = server.sockets[0].getsockname()[1]
+    requests = load_requests()
+    latencies: list[float] = []
+    per_connection = total // connections
+    start = time.perf_counter()
+    await asyncio.gather(*(connection(port, requests, per_connection, i * 7, latencies) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    await server.close(drain=True)
+    drained = time.perf_counter() - start
+    if client.worker_pool is not None:
+        await client.worker_pool.close()
+
+    latencies.sort()
+    n = len(latencies)
+    print(f"连接数 {connections}，请求 {n}，worker {workers}，处理事件 {client.handled}")
+    print(f"吞吐量 {n / elapsed:,.0f} req/s，全部处理完耗时 {drained:.2f}s")
+    print(f"延迟 p50 {latencies[n // 2] * 1e3:.3f}ms  p99 {latencies[int(n * 0.99)] * 1e3:.3f}ms  "
+          f"max {latencies[-1] * 1e3:.3f}ms")
+    stats = server.stats()
+    if stats["queue"] is not None:
+        print(f"队列最大深度 {stats['queue']['max_depth']}，最长等待 {stats['queue']['max_age'] * 1e3:.1f}ms")
+    print(stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--handler-delay", type=float, default=0, help="处理函数耗时（毫秒）")
+    parser.add_argument("--immediate-ack", action="store_true")
+    parser.add_argument("--queue-workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.requests, args.workers, args.handler_delay / 1000, args.immediate_ack,
+                     args.queue_workers))
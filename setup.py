@@ -20,10 +20,6 @@ setup(
         'Intended Audience :: Developers',  # 目标受众
         'License :: OSI Approved :: GNU General Public License v2 (GPLv2)',  # 许可证
         'Programming Language :: Python :: 3',  # 支持的 Python 版本
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
-        'Programming Language :: Python :: 3.8',
-        'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10',
     ],
     install_requires=[
@@ -38,6 +34,11 @@ setup(
         'datetime~=5.5',
         'bottle~=0.13.2'
     ],
+    extras_require={
+        'http2': ['h2>=4,<5'],  # BotAPI(http2=True) 所需
+        'fast-json': ['orjson>=3'],  # 自动替换标准库 json
+        'webhook': ['cryptography>=41'],  # WebHook 回调 Ed25519 验签
+    },
     include_package_data=True,  # 包含包中的数据文件
-    python_requires='>=3.8',  # 最低 Python 版本要求
+    python_requires='>=3.10',  # 最低 Python 版本要求（dataclass slots、X | None 注解）
 )
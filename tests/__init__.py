@@ -4,5 +4,8 @@ import os
 
 from SuperQQBot import read
 
-# github下修改 .test(demo).yaml 为 .test.yaml
-test_config = read(os.path.join(os.path.dirname(__file__), ".test.yaml"))
\ No newline at end of file
+# github下修改 .test(demo).yaml 为 .test.yaml，没有时使用示例配置（只有需要真实账号的测试会失败）
+_config_path = os.path.join(os.path.dirname(__file__), ".test.yaml")
+if not os.path.exists(_config_path):
+    _config_path = os.path.join(os.path.dirname(__file__), ".test(demo).yaml")
+test_config = read(_config_path)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+
+from SuperQQBot.api_clients.connection import DeleteRequests, GetConnect, SessionManager
+from SuperQQBot.api_clients.exceptions import IPNotInWhiteList, UnknownException
+from SuperQQBot.utils import codec
+
+BASE_URL = "https://api.sgroup.qq.com"
+
+
+class ApiResponseTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.response = httpx.Response(200, json={})
+        self.session = SessionManager(transport=httpx.MockTransport(lambda request: self.response))
+
+    async def asyncTearDown(self):
+        await self.session.aclose()
+
+    async def request(self, response: httpx.Response, connect=GetConnect):
+        self.response = response
+        connect = connect("/gateway", "token", BASE_URL, session=self.session)
+        await connect.apply()
+        return connect
+
+    async def test_body_decoded_once(self):
+        connect = await self.request(httpx.Response(200, json={"url": "wss://example"}))
+        with patch.object(codec, "loads", wraps=codec.loads) as loads:
+            self.assertFalse(connect.is_error())
+            self.assertIsNone(connect.error_code())
+            self.assertEqual(connect.json(), {"url": "wss://example"})
+            self.assertEqual(connect.json(), {"url": "wss://example"})
+        self.assertEqual(loads.call_count, 1)
+
+    async def test_empty_body_is_not_an_error(self):
+        for response in (httpx.Response(204), httpx.Response(200, content=b"")):
+            connect = await self.request(response, DeleteRequests)
+            self.assertFalse(connect.is_error())
+            connect.verify_data()
+            self.assertIsNone(connect.json())
+
+    async def test_err_code_in_success_body_is_an_error(self):
+        connect = await self.request(httpx.Response(200, json={"code": 304003, "message": "url not allowed",
+                                                               "err_code": 304003}))
+        self.assertTrue(connect.is_error())
+        self.assertEqual((connect.error_code(), connect.error_reason()), (304003, "url not allowed"))
+        with self.assertRaises(UnknownException):
+            connect.json()
+
+    async def test_non_json_error_body(self):
+        connect = await self.request(httpx.Response(502, content=b"<html>Bad Gateway</html>"))
+        self.assertTrue(connect.is_error())
+        self.assertIsNone(connect.error_code())
+        with self.assertRaises(UnknownException):
+            connect.verify_data()
+
+    async def test_ip_not_in_white_list(self):
+        connect = await self.request(httpx.Response(401, json={"code": 11298, "message": "ip not in whitelist"}))
+        with patch("SuperQQBot.api_clients.connection.my_ipaddress", return_value="1.2.3.4"):
+            with self.assertRaises(IPNotInWhiteList) as context:
+                connect.verify_data()
+        self.assertEqual(context.exception.ipaddress, "1.2.3.4")
+
+    async def test_invalid_appid_passes_through(self):
+        body = {"code": 100007, "message": "appid invalid"}
+        connect = await self.request(httpx.Response(401, json=body))
+        self.assertTrue(connect.is_error())
+        self.assertEqual(connect.json(), body)
+        connect = await self.request(httpx.Response(401, json={"code": 100007, "message": "other"}))
+        with self.assertRaises(UnknownException):
+            connect.verify_data()
+
+    async def test_timestamps_converted_once(self):
+        timestamp = "2024-11-05T12:00:00+08:00"
+        connect = await self.request(httpx.Response(200, json={"id": "1", "timestamp": timestamp}))
+        data = connect.json()
+        self.assertIsInstance(data["timestamp"], datetime)
+        self.assertEqual(data["timestamp"].isoformat(), timestamp)
+        self.assertIs(connect.json(), data)
+
+        connect = await self.request(httpx.Response(200, json=[{"id": "1", "timestamp": timestamp},
+                                                               {"id": "2"}, "other"]))
+        data = connect.json()
+        self.assertIsInstance(data[0]["timestamp"], datetime)
+        self.assertEqual(data[1:], [{"id": "2"}, "other"])
+        self.assertIs(connect.json(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
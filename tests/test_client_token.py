@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+import warnings
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from SuperQQBot.api_clients.openapi_client import Token
+from SuperQQBot.old_core.client import Client, Intents
+from SuperQQBot.old_core.shard import ShardedClient
+
+
+class FakeToken(Token):
+    """每次请求返回 token-1、token-2……，不访问网络"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = 0
+
+    async def _request_access_token(self) -> str:
+        self.requests += 1
+        self.access_token, self.active_time, self.start = f"token-{self.requests}", 7200, time.time()
+        return self.access_token
+
+
+def make_client(cls=Client):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return cls(Intents.none())
+
+
+class ClientTokenTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_refreshed_token_reaches_api(self):
+        client = make_client()
+        token = FakeToken("appid", "secret")
+        await client.use_token(token)
+        try:
+            self.assertEqual(client.token, "token-1")
+            self.assertEqual(client.api.access_token, "token-1")
+            self.assertFalse(token._auto_refresh_task.done())
+            await token.renew_access_token()
+            self.assertEqual(client.token, "token-2")
+            self.assertEqual(client.api.access_token, "token-2")
+        finally:
+            await token.close()
+
+    async def test_sharded_client_updates_shards(self):
+        client = make_client(ShardedClient)
+        client.shards = [SimpleNamespace(token=None), SimpleNamespace(token=None)]
+        token = FakeToken("appid", "secret")
+        await client.use_token(token)
+        try:
+            await token.renew_access_token()
+        finally:
+            await token.close()
+        self.assertEqual([shard.token for shard in client.shards], ["token-2", "token-2"])
+
+
+class ClientRunTestCase(unittest.TestCase):
+
+    def test_run_uses_one_token_manager_and_closes_it(self):
+        client = make_client()
+        seen = []
+
+        async def main():
+            seen.append((client.token, client.websocket_api.access_token, asyncio.get_running_loop()))
+
+        with patch("SuperQQBot.old_core.client.Token", FakeToken), \
+                patch.object(client, "main", AsyncMock(side_effect=main)):
+            client.run("appid", "secret")
+        self.assertEqual(seen[0][:2], ("token-1", "token-1"))
+        self.assertIsInstance(client.token_manager, FakeToken)
+        self.assertEqual(client.token_manager.requests, 1)
+        # 退出时停止了后台刷新
+        self.assertIsNone(client.token_manager._auto_refresh_task)
+
+
+if __name__ == "__main__":
+    unittest.main()
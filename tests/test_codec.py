@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+import unittest
+from unittest.mock import patch
+
+from SuperQQBot.utils import codec
+
+PAYLOAD = {"op": 0, "t": "AT_MESSAGE_CREATE", "d": {"content": "你好", "mentions": [1, 2]}}
+
+
+def installed(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+class CodecTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.original = codec.backend
+        self.addCleanup(codec.use, self.original)
+
+    def check_backend(self, name: str):
+        codec.use(name)
+        self.assertEqual(codec.backend, name)
+        data = codec.dumps(PAYLOAD)
+        self.assertIsInstance(data, bytes)
+        self.assertIn("你好".encode("utf-8"), data)
+        self.assertNotIn(b" ", data)
+        self.assertEqual(codec.loads(data), PAYLOAD)
+        self.assertEqual(codec.loads(data.decode("utf-8")), PAYLOAD)
+        for broken in (b'{"op": ', "{bad", b"", b'"\xff"'):
+            with self.assertRaises(codec.DecodeError):
+                codec.loads(broken)
+
+    def test_stdlib(self):
+        self.check_backend("json")
+
+    @unittest.skipUnless(installed("orjson"), "未安装 orjson")
+    def test_orjson(self):
+        self.check_backend("orjson")
+
+    @unittest.skipUnless(installed("msgspec"), "未安装 msgspec")
+    def test_msgspec(self):
+        self.check_backend("msgspec")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            codec.use("simdjson")
+        self.assertEqual(codec.backend, self.original)
+
+    def test_missing_backend_raises_import_error(self):
+        with patch.dict("sys.modules", {"orjson": None}):
+            with self.assertRaises(ImportError):
+                codec.use("orjson")
+        self.assertEqual(codec.backend, self.original)
+
+    def test_fallback_to_stdlib(self):
+        with patch.dict("sys.modules", {"orjson": None, "msgspec": None}):
+            codec._auto_select()
+        self.assertEqual(codec.backend, "json")
+        self.check_backend("json")
+
+    @unittest.skipUnless(installed("msgspec"), "未安装 msgspec")
+    def test_fallback_to_msgspec(self):
+        with patch.dict("sys.modules", {"orjson": None}):
+            codec._auto_select()
+        self.assertEqual(codec.backend, "msgspec")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+import functools
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from SuperQQBot.api_clients.types import LazyGroupMessage, LazyMessage, Member, Message, User
+from SuperQQBot.utils.decoder import compile_decoder, decoder_for
+from SuperQQBot.utils.models import frozen
+from SuperQQBot.utils.timestamp import parse_timestamp
+
+PAYLOAD = {
+    "id": "message", "channel_id": "channel", "guild_id": "guild", "content": "hello",
+    "timestamp": "2024-11-05T12:00:00+08:00",
+    "author": {"id": "1", "username": "user", "avatar": "avatar", "unknown": True},
+    "mentions": [{"id": "2", "username": "bot", "avatar": "", "bot": True}],
+    "seq": 10,
+}
+
+
+class DecoderTestCase(unittest.TestCase):
+
+    def test_nested_objects_and_datetime(self):
+        message = decoder_for(Message)(PAYLOAD)
+        self.assertIsInstance(message.author, User)
+        self.assertEqual(message.author.id, "1")
+        self.assertTrue(message.mentions[0].bot)
+        self.assertEqual(message.timestamp, datetime(2024, 11, 5, 12, tzinfo=timezone(timedelta(hours=8))))
+
+    def test_missing_fields_use_defaults(self):
+        message = decoder_for(Message)({"id": "message"})
+        self.assertEqual(message.content, "")
+        self.assertEqual(message.author.username, "")
+        self.assertIsNone(message.timestamp)
+        self.assertEqual(message.attachments, [])
+        self.assertIsNot(message.attachments, decoder_for(Message)({}).attachments)
+
+    def test_bytes_payload(self):
+        self.assertEqual(decoder_for(Message)(json.dumps(PAYLOAD).encode()), decoder_for(Message)(PAYLOAD))
+
+    def test_member_user_is_decoded(self):
+        member = decoder_for(Member)({"user": {"id": "1", "username": "user", "avatar": ""}, "roles": ["4"]})
+        self.assertEqual(member.user.id, "1")
+        self.assertEqual(member.roles, ["4"])
+
+    def test_overrides(self):
+        decode = compile_decoder(Message, overrides={"content": str.upper})
+        self.assertEqual(decode(PAYLOAD).content, "HELLO")
+
+
+def is_decoded(message, name: str) -> bool:
+    # 已解码的字段缓存在实例的 __dict__ 中
+    return name in message.__dict__
+
+
+class LazyMessageTestCase(unittest.TestCase):
+
+    def test_fields_are_decoded_on_first_access(self):
+        message = LazyMessage(PAYLOAD)
+        self.assertIsInstance(message, Message)
+        self.assertFalse(is_decoded(message, "content"))
+        self.assertEqual(message.content, "hello")
+        self.assertIs(message.author, message.author)
+        self.assertTrue(is_decoded(message, "content"))
+        self.assertFalse(is_decoded(message, "timestamp"))
+        self.assertEqual(message.timestamp.year, 2024)
+
+    def test_equal_to_eager_message(self):
+        eager, lazy = decoder_for(Message)(PAYLOAD), LazyMessage(PAYLOAD)
+        names = [f.name for f in dataclasses.fields(Message)]
+        self.assertEqual([getattr(lazy, name) for name in names], [getattr(eager, name) for name in names])
+
+    def test_group_author_placeholder(self):
+        message = LazyGroupMessage({"id": "1", "author": {"id": "member"}})
+        self.assertEqual(message.author.id, "member")
+        self.assertEqual(message.author.username, "群聊暂不支持获取用户名")
+
+
+class ModelTestCase(unittest.TestCase):
+
+    def test_models_are_slotted(self):
+        self.assertFalse(hasattr(User("1", "user", "avatar"), "__dict__"))
+
+    def test_frozen_variant(self):
+        frozen_user = frozen(User)
+        self.assertIs(frozen(User), frozen_user)
+        user = frozen_user("1", "user", "avatar")
+        self.assertEqual(hash(user), hash(frozen_user("1", "user", "avatar")))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            user.username = "other"
+
+    def test_frozen_keeps_descriptors(self):
+        @dataclasses.dataclass(slots=True)
+        class Profile:
+            name: str
+            age: int = 0
+
+            @property
+            def label(self):
+                return f"{self.name}({self.age})"
+
+            @functools.cached_property
+            def upper(self):
+                return self.name.upper()
+
+            @classmethod
+            def anonymous(cls):
+                return cls("anonymous")
+
+            @staticmethod
+            def adult_age():
+                return 18
+
+        frozen_profile = frozen(Profile)
+        profile = frozen_profile.anonymous()
+        self.assertIsInstance(profile, frozen_profile)
+        self.assertEqual(profile.label, "anonymous(0)")
+        self.assertEqual(profile.upper, "ANONYMOUS")
+        self.assertEqual(profile.adult_age(), 18)
+
+    def test_reply_uses_bound_api(self):
+        class API:
+            def post_channel_messages(self, **kwargs):
+                return kwargs
+
+        message = decoder_for(Message)(PAYLOAD)
+        message.api = API()
+        self.assertEqual(message.reply(content="hi"), {"channel_id": "channel", "msg_id": "message", "content": "hi"})
+
+
+class TimestampTestCase(unittest.TestCase):
+
+    def test_platform_format(self):
+        self.assertEqual(parse_timestamp("2024-11-05T12:01:07+08:00"),
+                         datetime(2024, 11, 5, 12, 1, 7, tzinfo=timezone(timedelta(hours=8))))
+
+    def test_repeated_timestamp_is_cached(self):
+        self.assertIs(parse_timestamp("2024-11-05T12:01:08+08:00"), parse_timestamp("2024-11-05T12:01:08+08:00"))
+
+    def test_fallback_formats(self):
+        self.assertEqual(parse_timestamp("2024-11-05T04:01:07.5Z"),
+                         datetime(2024, 11, 5, 4, 1, 7, 500000, tzinfo=timezone.utc))
+        with self.assertRaises(ValueError):
+            parse_timestamp("not a timestamp")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+
+from SuperQQBot.middleware.dedup import EventDeduplicator, SQLiteDedupBackend, event_key
+
+
+class EventKeyTestCase(unittest.TestCase):
+
+    def test_event_id_then_message_id(self):
+        self.assertEqual(event_key({"id": "AT_MESSAGE_CREATE:1", "t": "AT_MESSAGE_CREATE", "d": {"id": "m"}}),
+                         "AT_MESSAGE_CREATE:1")
+        self.assertEqual(event_key({"t": "AT_MESSAGE_CREATE", "d": {"id": "m"}}), "AT_MESSAGE_CREATE:m")
+        self.assertIsNone(event_key({"t": "GUILD_CREATE", "d": {}}))
+
+
+class EventDeduplicatorTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_duplicates_within_window(self):
+        dedup = EventDeduplicator(window=0.2, slots=4)
+        self.assertFalse(await dedup.is_duplicate("a"))
+        self.assertTrue(await dedup.is_duplicate("a"))
+        self.assertFalse(await dedup.is_duplicate(None))
+        await asyncio.sleep(0.3)
+        self.assertFalse(await dedup.is_duplicate("a"))
+        await dedup.forget("a")
+        self.assertFalse(await dedup.is_duplicate("a"))
+        self.assertEqual(dedup.stats()["duplicates"], 1)
+
+    def test_memory_is_bounded(self):
+        dedup = EventDeduplicator(window=300, slots=4, max_entries=100)
+        for index in range(1000):
+            dedup.check(str(index))
+        self.assertLessEqual(len(dedup), 100)
+        self.assertIn("999", dedup)
+        self.assertGreater(dedup.stats()["early_rotations"], 0)
+
+    async def test_shared_backend(self):
+        path = os.path.join(tempfile.mkdtemp(), "dedup.db")
+        backends = [SQLiteDedupBackend(path), SQLiteDedupBackend(path)]
+        # 两个去重器共用同一个文件，相当于两个进程
+        first, second = (EventDeduplicator(window=0.2, backend=backend) for backend in backends)
+        self.assertFalse(await first.is_duplicate("a"))
+        self.assertTrue(await second.is_duplicate("a"))
+        self.assertEqual(second.stats()["shared_duplicates"], 1)
+        await asyncio.sleep(0.3)
+        self.assertFalse(await second.is_duplicate("a"))
+        for backend in backends:
+            backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
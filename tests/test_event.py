@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+
+from SuperQQBot.core.event import EventDispatcher, EventQueue, EventWorkerPool
+
+
+class EventDispatcherTestCase(unittest.TestCase):
+
+    def test_decode_registered_event(self):
+        dispatcher = EventDispatcher()
+        dispatcher.register("AT_MESSAGE_CREATE", lambda d: d["content"], "on_at_message_create")
+        self.assertEqual(dispatcher.decode("AT_MESSAGE_CREATE", {"content": "hi"}),
+                         ("on_at_message_create", "hi"))
+
+    def test_unknown_event_is_not_decoded(self):
+        calls = []
+        dispatcher = EventDispatcher()
+        dispatcher.register("AT_MESSAGE_CREATE", calls.append, "on_at_message_create")
+        self.assertIsNone(dispatcher.decode("MESSAGE_REACTION_ADD", {}))
+        self.assertEqual(calls, [])
+
+
+class EventWorkerPoolTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_same_key_is_processed_in_order(self):
+        pool = EventWorkerPool(workers=4, queue_size=2)
+        handled = {}
+
+        async def handle(key, index):
+            await asyncio.sleep(0.001 * (index % 3))
+            handled.setdefault(key, []).append(index)
+
+        for index in range(30):
+            key = f"channel{index % 3}"
+            await pool.submit(key, handle, key, index)
+        await pool.close()
+        for key, indexes in handled.items():
+            self.assertEqual(indexes, sorted(indexes))
+        self.assertEqual(pool.processed, 30)
+        self.assertGreater(pool.blocked, 0)
+
+    async def test_failed_handler_does_not_stop_worker(self):
+        pool = EventWorkerPool(workers=1)
+        handled = []
+
+        async def handle(index):
+            if index == 0:
+                raise RuntimeError("boom")
+            handled.append(index)
+
+        for index in range(3):
+            await pool.submit(None, handle, index)
+        await pool.close()
+        self.assertEqual(handled, [1, 2])
+        self.assertEqual(pool.failed, 1)
+
+
+class EventQueueTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.handled = []
+        self.spill_path = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+
+    async def handle(self, event_type, data):
+        await asyncio.sleep(0)
+        self.handled.append(data["index"])
+
+    async def test_full_queue_rejects_without_spill(self):
+        queue = EventQueue(self.handle, workers=1, maxsize=2)
+        self.assertEqual([queue.put("E", {"index": i}) for i in range(3)], [True, True, False])
+        queue.start()
+        await queue.close()
+        self.assertEqual(self.handled, [0, 1])
+        self.assertEqual(queue.stats()["rejected"], 1)
+
+    async def test_spilled_events_keep_order(self):
+        queue = EventQueue(self.handle, workers=1, maxsize=2, spill_path=self.spill_path)
+        for index in range(5):
+            self.assertTrue(queue.put("E", {"index": index}))
+        self.assertEqual((queue.stats()["memory_depth"], queue.stats()["spilled_depth"]), (2, 3))
+        queue.start()
+        queue.put("E", {"index": 5})
+        await queue.close()
+        self.assertEqual(self.handled, list(range(6)))
+        self.assertEqual(os.path.getsize(self.spill_path), 0)
+
+    async def test_close_without_drain_persists_events(self):
+        queue = EventQueue(self.handle, workers=1, maxsize=2, spill_path=self.spill_path)
+        for index in range(4):
+            queue.put("E", {"index": index})
+        await queue.close(drain=False)
+        self.assertEqual(self.handled, [])
+        queue = EventQueue(self.handle, workers=1, maxsize=2, spill_path=self.spill_path)
+        queue.start()
+        self.assertEqual(len(queue), 4)
+        await queue.close()
+        self.assertEqual(self.handled, [0, 1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
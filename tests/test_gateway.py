@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import random
+import unittest
+import warnings
+
+import websockets
+
+from SuperQQBot.core.connection_state import ConnectionState, DecorrelatedJitterBackoff
+from SuperQQBot.middleware.reply_window import ReplyWindow
+from SuperQQBot.old_core.Error import ReconnectFailedError
+from SuperQQBot.old_core.client import Client, Intents
+
+
+def at_message(seq: int) -> dict:
+    return {"op": 0, "s": seq, "t": "AT_MESSAGE_CREATE", "d": {
+        "id": f"message-{seq}", "channel_id": "channel", "guild_id": "guild", "content": "hello",
+        "timestamp": "2024-11-05T12:00:00+08:00", "author": {"id": "1", "username": "user", "avatar": ""}}}
+
+
+class ScriptedGateway:
+    """按连接序号执行不同脚本的本地网关，第一条连接发送两条事件后以 4009（可恢复）断开"""
+
+    def __init__(self, resume_accepted: bool = True):
+        self.resume_accepted = resume_accepted
+        self.connections = 0
+        self.received = []
+        self.server = None
+
+    async def handler(self, ws, *args):
+        self.connections += 1
+        await ws.send(json.dumps({"op": 10, "d": {"heartbeat_interval": 45000}}))
+        payload = json.loads(await ws.recv())
+        self.received.append(payload)
+        if self.connections == 1:
+            await ws.send(json.dumps({"op": 0, "s": 1, "t": "READY", "d": {"session_id": "session"}}))
+            await ws.send(json.dumps(at_message(2)))
+            await ws.send(json.dumps(at_message(3)))
+            await ws.close(4009, "session timed out")
+            return
+        if payload["op"] == 6 and self.resume_accepted:
+            await ws.send(json.dumps({"op": 0, "s": 4, "t": "RESUMED", "d": ""}))
+        else:
+            if payload["op"] == 6:
+                await ws.send(json.dumps({"op": 9, "d": False}))
+                self.received.append(json.loads(await ws.recv()))
+            await ws.send(json.dumps({"op": 0, "s": 1, "t": "READY", "d": {"session_id": "new-session"}}))
+        await ws.send(json.dumps(at_message(5)))
+        await ws.wait_closed()
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class RecordingClient(Client):
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("reconnect_backoff", DecorrelatedJitterBackoff(0.01, 0.05))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            super().__init__(*args, **kwargs)
+        self.message_ids = []
+        self.done = asyncio.Event()
+        self.states = []
+        self.ready_event = asyncio.Event()
+
+    async def on_state_change(self, old_state, new_state):
+        self.states.append(new_state)
+        if new_state is ConnectionState.READY:
+            self.ready_event.set()
+
+    async def on_at_message_create(self, message):
+        self.message_ids.append(message.id)
+        if message.id == "message-5":
+            self.done.set()
+
+
+class ResumeTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def run_client(self, gateway: ScriptedGateway) -> RecordingClient:
+        async with gateway as url:
+            client = RecordingClient(Intents.default())
+            client.token = "token"
+            client.wss_url = url
+            task = asyncio.create_task(client.connect())
+            await asyncio.wait_for(client.done.wait(), 5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await client.close()
+        return client
+
+    async def test_resume_after_disconnect(self):
+        gateway = ScriptedGateway()
+        client = await self.run_client(gateway)
+        resume = gateway.received[1]
+        self.assertEqual(resume["op"], 6)
+        self.assertEqual(resume["d"]["session_id"], "session")
+        self.assertEqual(resume["d"]["seq"], 3)
+        self.assertEqual(client.message_ids, ["message-2", "message-3", "message-5"])
+        self.assertEqual(client.session_stats, {"identify": 1, "resume": 1, "resumed": 1, "reidentify": 0})
+
+    async def test_invalid_session_falls_back_to_identify(self):
+        gateway = ScriptedGateway(resume_accepted=False)
+        client = await self.run_client(gateway)
+        self.assertEqual([payload["op"] for payload in gateway.received], [2, 6, 2])
+        self.assertEqual(client.session_id, "new-session")
+        self.assertEqual(client.session_stats, {"identify": 2, "resume": 1, "resumed": 0, "reidentify": 1})
+
+
+class DroppingGateway:
+    """收到命令时断开所有连接的本地网关，Resume 总是成功"""
+
+    def __init__(self):
+        self.connections = set()
+        self.server = None
+        self.port = None
+        self.resumes = []
+        self.close_codes = []
+
+    async def handler(self, ws, *args):
+        self.connections.add(ws)
+        try:
+            await ws.send(json.dumps({"op": 10, "d": {"heartbeat_interval": 45000}}))
+            payload = json.loads(await ws.recv())
+            if payload["op"] == 6:
+                self.resumes.append(payload["d"])
+                await ws.send(json.dumps({"op": 0, "s": payload["d"]["seq"] + 1, "t": "RESUMED", "d": ""}))
+            else:
+                await ws.send(json.dumps({"op": 0, "s": 1, "t": "READY", "d": {"session_id": "session"}}))
+            await ws.wait_closed()
+            self.close_codes.append(ws.close_code)
+        finally:
+            self.connections.discard(ws)
+
+    async def request_reconnect(self):
+        await asyncio.gather(*(ws.send(json.dumps({"op": 7, "d": None})) for ws in list(self.connections)))
+
+    async def drop(self, code: int = 4009):
+        await asyncio.gather(*(ws.close(code) for ws in list(self.connections)))
+
+    async def start(self) -> str:
+        self.server = await websockets.serve(self.handler, "127.0.0.1", self.port or 0)
+        self.port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def stop(self):
+        await self.drop(1001)
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class ConnectionStateTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.gateway = DroppingGateway()
+        url = await self.gateway.start()
+        self.client = RecordingClient(Intents.default(), max_reconnect_attempts=3)
+        self.client.token = "token"
+        self.client.wss_url = url
+        self.task = asyncio.create_task(self.client.connect())
+        await asyncio.wait_for(self.client.ready_event.wait(), 5)
+        self.client.ready_event.clear()
+
+    async def asyncTearDown(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        await self.client.close()
+        if self.gateway.server.is_serving():
+            await self.gateway.stop()
+
+    async def test_drop_goes_through_backoff_and_resumes(self):
+        await self.gateway.drop()
+        await asyncio.wait_for(self.client.ready_event.wait(), 5)
+        self.assertEqual(self.client.states, [
+            ConnectionState.CONNECTING, ConnectionState.IDENTIFYING, ConnectionState.READY,
+            ConnectionState.BACKOFF, ConnectionState.CONNECTING, ConnectionState.RESUMING, ConnectionState.READY])
+        stats = self.client.state.stats()
+        self.assertEqual(stats["reconnect_attempts"], 1)
+        self.assertEqual(stats["transitions"]["ready->backoff"], 1)
+        self.assertEqual(self.client.failed_attempts, 0)
+
+    async def test_requested_reconnect_resumes_without_backoff(self):
+        await self.gateway.request_reconnect()
+        await asyncio.wait_for(self.client.ready_event.wait(), 5)
+        # 以 4000 关闭，Session 保留，重连后用原 session_id Resume
+        self.assertEqual(self.gateway.close_codes, [4000])
+        self.assertEqual(self.gateway.resumes[0]["session_id"], "session")
+        self.assertEqual(self.client.states[-3:],
+                         [ConnectionState.CONNECTING, ConnectionState.RESUMING, ConnectionState.READY])
+        self.assertEqual(self.client.state.stats()["reconnect_attempts"], 0)
+        self.assertEqual(self.client.state.stats()["backoff_time"], 0)
+
+    async def test_gives_up_after_max_attempts(self):
+        await self.gateway.stop()
+        with self.assertRaises(ReconnectFailedError):
+            await asyncio.wait_for(self.task, 5)
+        self.assertEqual(self.client.state.state, ConnectionState.CLOSED)
+        self.assertEqual(self.client.failed_attempts, 3)
+
+
+class HeartbeatGateway:
+    """心跳间隔 50ms 的本地网关，第一条连接之后的连接才回复心跳确认"""
+
+    def __init__(self, ack_delay: float = 0.01, ack_first_connection: bool = True):
+        self.ack_delay = ack_delay
+        self.ack_first_connection = ack_first_connection
+        self.connections = 0
+        self.close_codes = []
+        self.heartbeat_seqs = []
+        self.server = None
+
+    async def handler(self, ws, *args):
+        self.connections += 1
+        ack = self.ack_first_connection or self.connections > 1
+        await ws.send(json.dumps({"op": 10, "d": {"heartbeat_interval": 50}}))
+        try:
+            async for message in ws:
+                payload = json.loads(message)
+                if payload["op"] == 2:
+                    await ws.send(json.dumps({"op": 0, "s": 1, "t": "READY", "d": {"session_id": "session"}}))
+                elif payload["op"] == 6:
+                    await ws.send(json.dumps({"op": 0, "s": 2, "t": "RESUMED", "d": ""}))
+                elif payload["op"] == 1:
+                    self.heartbeat_seqs.append(payload["d"])
+                    if ack:
+                        await asyncio.sleep(self.ack_delay)
+                        await ws.send(json.dumps({"op": 11}))
+        finally:
+            self.close_codes.append(ws.close_code)
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class HeartbeatTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def start_client(self, url: str) -> tuple[RecordingClient, asyncio.Task]:
+        client = RecordingClient(Intents.default())
+        client.token = "token"
+        client.wss_url = url
+        return client, asyncio.create_task(client.connect())
+
+    async def stop_client(self, client: RecordingClient, task: asyncio.Task):
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await client.close()
+
+    async def test_latency_from_heartbeat_ack(self):
+        gateway = HeartbeatGateway(ack_delay=0.02)
+        async with gateway as url:
+            client, task = await self.start_client(url)
+            await asyncio.sleep(0.3)
+            await self.stop_client(client, task)
+        self.assertGreaterEqual(client.latency, 0.02)
+        self.assertLess(client.latency, 0.05)
+        self.assertGreaterEqual(client.heartbeat.acked, 3)
+        self.assertEqual(client.heartbeat.missed, 0)
+        self.assertEqual(gateway.heartbeat_seqs[-1], 1)
+
+    async def test_missed_ack_triggers_resume(self):
+        gateway = HeartbeatGateway(ack_first_connection=False)
+        async with gateway as url:
+            client, task = await self.start_client(url)
+            await asyncio.wait_for(client.ready_event.wait(), 5)
+            client.ready_event.clear()
+            await asyncio.wait_for(client.ready_event.wait(), 5)
+            await self.stop_client(client, task)
+        self.assertEqual(client.heartbeat_timeouts, 1)
+        self.assertEqual(gateway.close_codes[0], 4000)
+        self.assertEqual(client.session_stats["resumed"], 1)
+
+
+class SharedApiTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_events_share_client_api(self):
+        client = RecordingClient(Intents.default(), reply_window=ReplyWindow())
+        client.token = "token"
+        apis = []
+
+        async def on_at_message_create(message):
+            apis.append(message.api)
+
+        client.on_at_message_create = on_at_message_create
+        for seq in (1, 2):
+            await client.dispatch_event("AT_MESSAGE_CREATE", at_message(seq)["d"])
+        self.assertIs(apis[0], apis[1])
+        self.assertIs(apis[0], client.api)
+        self.assertGreater(client.reply_window.expires_in("message-1"), 0)
+        client.token = "new-token"
+        self.assertEqual(client.api.access_token, "new-token")
+
+
+class BackoffTestCase(unittest.TestCase):
+
+    def test_decorrelated_jitter_is_bounded_and_resets(self):
+        backoff = DecorrelatedJitterBackoff(1, 10, rng=random.Random(0))
+        delays = [backoff.next() for _ in range(50)]
+        self.assertTrue(all(1 <= delay <= 10 for delay in delays))
+        self.assertEqual(max(delays), 10)
+        backoff.reset()
+        self.assertLessEqual(backoff.next(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
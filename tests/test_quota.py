@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import threading
+import unittest
+
+from SuperQQBot.api_clients.exceptions import ActiveQuotaExceeded
+from SuperQQBot.middleware.quota import ActiveMessageQuota
+
+
+class ActiveMessageQuotaTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "quota.db")
+        self.quota = ActiveMessageQuota(self.path, per_channel=3)
+
+    def tearDown(self):
+        self.quota.close()
+        self.directory.cleanup()
+
+    async def test_channel_limit(self):
+        for _ in range(3):
+            await self.quota.acquire("channel")
+        self.assertEqual(await self.quota.remaining("channel"), 0)
+        with self.assertRaises(ActiveQuotaExceeded):
+            await self.quota.acquire("channel")
+
+    async def test_guild_channel_limit(self):
+        await self.quota.acquire("a", "guild")
+        await self.quota.acquire("b", "guild")
+        self.assertEqual(await self.quota.remaining("c", "guild"), 0)
+        with self.assertRaises(ActiveQuotaExceeded) as context:
+            await self.quota.acquire("c", "guild")
+        self.assertEqual(context.exception.reason, "guild")
+        # 已经推送过的子频道不受影响
+        self.assertEqual(await self.quota.remaining("a", "guild"), 2)
+
+    async def test_failed_send_releases_quota(self):
+        with self.assertRaises(RuntimeError):
+            async with self.quota.reserve("channel"):
+                raise RuntimeError
+        self.assertEqual(await self.quota.remaining("channel"), 3)
+
+    async def test_persists_across_restarts(self):
+        await self.quota.acquire("channel", "guild")
+        self.quota.close()
+        self.quota = ActiveMessageQuota(self.path, per_channel=3)
+        self.assertEqual(await self.quota.remaining("channel"), 2)
+        self.assertEqual(await self.quota.stats(), {"guild": {"channel": 1}})
+
+    async def test_queries_run_off_the_event_loop(self):
+        await self.quota.acquire("channel", "guild")
+        threads = []
+        used = self.quota._used
+
+        def record(*args):
+            threads.append(threading.get_ident())
+            return used(*args)
+
+        self.quota._used = record
+        self.assertEqual(await self.quota.remaining("channel", "guild"), 2)
+        self.assertEqual(await self.quota.stats(), {"guild": {"channel": 1}})
+        await self.quota.purge()
+        self.assertEqual(await self.quota.stats(), {"guild": {"channel": 1}})
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
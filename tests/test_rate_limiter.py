@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+
+from SuperQQBot.middleware.rate_limiter import CONSERVATIVE_RULES, RateLimiter, TokenBucket
+
+
+class TokenBucketTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_burst_then_queue(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.monotonic()
+        delays = await asyncio.gather(*(bucket.acquire() for _ in range(10)))
+        elapsed = time.monotonic() - start
+        self.assertEqual(delays[:5], [0.0] * 5)
+        # 后 5 个按到达顺序依次多等一个令牌的时间
+        self.assertEqual(delays[5:], sorted(delays[5:]))
+        self.assertGreaterEqual(elapsed, 5 / 50 * 0.9)
+        self.assertEqual(bucket.delayed, 5)
+        self.assertEqual(bucket.waiting, 0)
+
+    async def test_cancelled_waiter_returns_token(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        self.assertEqual(bucket.waiting, 1)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(bucket.waiting, 0)
+        self.assertEqual(bucket.acquired, 1)
+
+
+class RateLimiterTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_buckets_are_per_target(self):
+        limiter = RateLimiter({"channel": (1, 1)})
+        await limiter.acquire("channel", "a")
+        self.assertEqual(await limiter.acquire("channel", "b"), 0.0)
+        self.assertLess(limiter.headroom("channel", "a"), 1)
+        self.assertEqual(limiter.headroom("channel", "c"), 1)
+
+    async def test_route_without_rule_is_unlimited(self):
+        limiter = RateLimiter({})
+        for _ in range(100):
+            self.assertEqual(await limiter.acquire("group", "g"), 0.0)
+        self.assertIsNone(limiter.headroom("group", "g"))
+
+    def test_only_channel_is_limited_by_default(self):
+        limiter = RateLimiter()
+        self.assertEqual(limiter.headroom("channel", "c"), 5)
+        self.assertIsNone(limiter.headroom("group", "g"))
+        self.assertIsNone(limiter.headroom("c2c", "u"))
+        self.assertEqual(RateLimiter(CONSERVATIVE_RULES).headroom("group", "g"), 5)
+
+    async def test_stats_survive_eviction(self):
+        limiter = RateLimiter({"c2c": (1000, 1)}, max_buckets=2)
+        for key in ("a", "b"):
+            await limiter.acquire("c2c", key)
+        await asyncio.sleep(0.01)
+        await limiter.acquire("c2c", "c")
+        stats = limiter.stats()["c2c"]
+        self.assertEqual(stats["buckets"], 1)
+        self.assertEqual(stats["acquired"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
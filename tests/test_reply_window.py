@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import time
+import unittest
+import warnings
+from unittest.mock import patch
+
+import httpx
+
+from SuperQQBot.api_clients.bot_client import MessageSendReceiveAPI
+from SuperQQBot.api_clients.exceptions import ReplyWindowExpired
+from SuperQQBot.api_clients.connection import SessionManager
+from SuperQQBot.middleware.reply_window import ReplyWindow
+from SuperQQBot.old_core.client import Client, Intents
+from SuperQQBot.old_core.decoders import default_dispatcher
+from SuperQQBot.old_core.types import GroupMessage
+
+GROUP_EVENT = {
+    "id": "group-message", "group_id": "group", "group_openid": "group-openid", "content": " hi",
+    "timestamp": "2024-11-05T12:00:00+08:00", "author": {"id": "member", "member_openid": "member"},
+}
+
+
+class ReplyWindowTestCase(unittest.TestCase):
+
+    def test_seq_is_increasing_per_msg_id(self):
+        window = ReplyWindow()
+        window.track("a")
+        window.track("b")
+        self.assertEqual([window.next_seq("a") for _ in range(3)], [1, 2, 3])
+        self.assertEqual(window.next_seq("b"), 1)
+
+    def test_concurrent_replies_get_distinct_seq(self):
+        window = ReplyWindow()
+        window.track("a")
+
+        async def reply():
+            await asyncio.sleep(0)
+            return window.resolve("a")
+
+        async def main():
+            return await asyncio.gather(*(reply() for _ in range(50)))
+
+        seqs = [seq for _, seq in asyncio.run(main())]
+        self.assertEqual(sorted(seqs), list(range(1, 51)))
+
+    def test_expired_falls_back(self):
+        window = ReplyWindow(ttl=300)
+        window.track("a")
+        later = time.monotonic() + 300
+        with patch("SuperQQBot.middleware.reply_window.time.monotonic", return_value=later):
+            self.assertEqual(window.resolve("a"), (None, None))
+            self.assertEqual(window.resolve("a", msg_seq=5), (None, None))
+            window.fallback = "drop"
+            self.assertIsNone(window.resolve("a"))
+        self.assertEqual(window.stats()["expired"], 3)
+
+    def test_check_without_allocating(self):
+        window = ReplyWindow()
+        window.track("a")
+        self.assertEqual(window.resolve("a", allocate=False), ("a", None))
+        self.assertEqual(window.stats()["allocated"], 0)
+        self.assertEqual(window.resolve("a"), ("a", 1))
+
+    def test_dropped_reply_raises(self):
+        window = ReplyWindow(fallback="drop")
+        window.track("a")
+        api = MessageSendReceiveAPI("token", reply_window=window)
+        later = time.monotonic() + 300
+        with patch("SuperQQBot.middleware.reply_window.time.monotonic", return_value=later):
+            with self.assertRaises(ReplyWindowExpired):
+                asyncio.run(api.post_channel_messages("channel", content="hi", msg_id="a"))
+
+    def test_old_entries_are_purged(self):
+        window = ReplyWindow(max_entries=2)
+        for msg_id in ("a", "b", "c"):
+            window.track(msg_id)
+        self.assertEqual(len(window), 2)
+        self.assertIsNone(window.expires_in("a"))
+
+
+class GroupClient(Client):
+
+    def __init__(self, *args, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            super().__init__(*args, **kwargs)
+        self.messages = []
+
+    async def on_group_at_message_create(self, message):
+        self.messages.append(message)
+
+
+class GroupReplyTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"id": "reply", "timestamp": "2024-11-05T12:00:01+08:00"})
+
+    async def test_reply_to_group_event(self):
+        for lazy in (False, True):
+            self.requests = []
+            session = SessionManager(transport=httpx.MockTransport(self.handle))
+            client = GroupClient(Intents.none(), reply_window=ReplyWindow(), session=session)
+            client.dispatcher = default_dispatcher(lazy=lazy)
+            client.token = "token"
+            await client.dispatch_event("GROUP_AT_MESSAGE_CREATE", GROUP_EVENT)
+            message = client.messages[0]
+            self.assertIsInstance(message, GroupMessage)
+            self.assertEqual(message.group_openid, "group-openid")
+            for _ in range(2):
+                await message.reply(content="hello", msg_type=0)
+            await session.aclose()
+            self.assertEqual([path for path, _ in self.requests], ["/v2/groups/group-openid/messages"] * 2)
+            self.assertEqual([(body["msg_id"], body["msg_seq"]) for _, body in self.requests],
+                             [("group-message", 1), ("group-message", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
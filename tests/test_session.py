@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+import warnings
+
+import httpx
+
+from SuperQQBot import BotAPI, Client, Intents
+from SuperQQBot.api_clients.connection import SessionManager, get_session
+
+BASE_URL = "https://api.sgroup.qq.com"
+SANDBOX_URL = "https://sandbox.api.sgroup.qq.com"
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"ok": True, "url": "wss://api.sgroup.qq.com/websocket"})
+
+
+class SessionManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.session = SessionManager(transport=httpx.MockTransport(ok))
+
+    def test_client_reused_per_base_url(self):
+        async def main():
+            first = self.session.get_client(BASE_URL)
+            second = self.session.get_client(BASE_URL)
+            other = self.session.get_client(SANDBOX_URL)
+            await self.session.aclose()
+            return first, second, other
+
+        first, second, other = asyncio.run(main())
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(self.session.clients_created, 2)
+
+    def test_client_rebuilt_when_loop_changes(self):
+        async def get():
+            return self.session.get_client(BASE_URL)
+
+        first = asyncio.run(get())
+        with self.assertLogs(level="WARNING"):
+            second = asyncio.run(get())
+        self.assertIsNot(first, second)
+        self.assertEqual(self.session.clients_created, 2)
+
+    def test_aclose_closes_clients(self):
+        async def main():
+            client = self.session.get_client(BASE_URL)
+            await self.session.aclose()
+            return client, self.session.get_client(BASE_URL)
+
+        closed, rebuilt = asyncio.run(main())
+        self.assertTrue(closed.is_closed)
+        self.assertIsNot(closed, rebuilt)
+
+    def test_stats_counts_requests(self):
+        async def main():
+            async with self.session:
+                client = self.session.get_client(BASE_URL)
+                for _ in range(3):
+                    await client.get(f"{BASE_URL}/gateway")
+
+        asyncio.run(main())
+        self.assertEqual(self.session.stats(), {BASE_URL: {"http2": False, "requests": 3, "responses": 3}})
+
+
+class BotAPISessionTestCase(unittest.TestCase):
+
+    def test_requests_go_through_given_session(self):
+        session = SessionManager(transport=httpx.MockTransport(ok))
+        api = BotAPI("token", session=session)
+
+        async def main():
+            async with session:
+                return await api.get_wss_url()
+
+        self.assertEqual(asyncio.run(main()), "wss://api.sgroup.qq.com/websocket")
+        self.assertEqual([stats["requests"] for stats in session.stats().values()], [1])
+
+    def test_http2_session(self):
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            self.skipTest("未安装 h2")
+        self.assertIs(BotAPI("token", http2=True).session, get_session(http2=True))
+        self.assertIs(BotAPI("token").session, get_session())
+
+    def test_client_passes_session_to_api(self):
+        session = SessionManager()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            client = Client(Intents.none(), session=session)
+        client.token = "token"
+        self.assertIs(client.api.session, session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import queue
+import unittest
+import warnings
+
+import websockets
+
+from SuperQQBot.core.connection_state import DecorrelatedJitterBackoff
+from SuperQQBot.old_core.client import Client, Intents
+from SuperQQBot.old_core.launcher import ShardLauncher, _split_shards
+from SuperQQBot.old_core.shard import ShardedClient
+
+
+class FakeGateway:
+    """本地假网关：Hello -> Identify -> READY -> 每个分片推送一条 @消息"""
+
+    def __init__(self):
+        self.identified = []
+        self.server = None
+
+    async def handler(self, ws, *args):
+        await ws.send(json.dumps({"op": 10, "d": {"heartbeat_interval": 45000}}))
+        identify = json.loads(await ws.recv())
+        shard_id, shard_count = identify["d"]["shard"]
+        self.identified.append((shard_id, shard_count))
+        await ws.send(json.dumps({"op": 0, "s": 1, "t": "READY",
+                                  "d": {"session_id": f"session-{shard_id}", "shard": [shard_id, shard_count]}}))
+        await ws.send(json.dumps({"op": 0, "s": 2, "t": "AT_MESSAGE_CREATE", "d": {
+            "id": f"message-{shard_id}", "channel_id": f"channel-{shard_id}", "guild_id": "1",
+            "content": "hello", "timestamp": "2024-11-05T12:00:00+08:00",
+            "author": {"id": "1", "username": "user", "avatar": ""}}}))
+        await ws.wait_closed()
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class RecordingClient(ShardedClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.channels = []
+        self.all_received = asyncio.Event()
+        self.ready_called = 0
+
+    async def on_ready(self):
+        self.ready_called += 1
+
+    async def on_at_message_create(self, message):
+        self.channels.append(message.channel_id)
+        if len(self.channels) == self.shard_count:
+            self.all_received.set()
+
+
+class ShardedClientTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_events_from_all_shards_reach_one_dispatcher(self):
+        gateway = FakeGateway()
+        async with gateway as url:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                client = RecordingClient(Intents.default(), shard_count=3, identify_interval=0.01)
+            client.token = "token"
+            client.wss_url = url
+            task = asyncio.create_task(client.connect())
+            await asyncio.wait_for(client.all_received.wait(), 5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await client.close()
+        self.assertEqual(sorted(client.channels), ["channel-0", "channel-1", "channel-2"])
+        self.assertEqual(sorted(gateway.identified), [(0, 3), (1, 3), (2, 3)])
+        self.assertEqual(client.ready_called, 1)
+
+
+class SplitShardsTestCase(unittest.TestCase):
+
+    def test_contiguous_and_balanced(self):
+        self.assertEqual(_split_shards(10, 4), [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]])
+
+    def test_no_more_processes_than_shards(self):
+        self.assertEqual(_split_shards(2, 16), [[0], [1]])
+
+
+class FlakyToken:
+    """第一次刷新失败的 AccessToken 管理器"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_access_token(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("token endpoint unavailable")
+        return "new-token"
+
+
+class SuperviseTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_token_failure_is_retried(self):
+        launcher = ShardLauncher(Client, Intents.default(), processes=1)
+        launcher.token = FlakyToken()
+        launcher.token_backoff = DecorrelatedJitterBackoff(0.01, 0.02)
+        launcher._supervise_interval = 0.01
+        control = queue.Queue()
+        launcher._controls = [control]
+        supervisor = asyncio.create_task(launcher._supervise("old-token"))
+        try:
+            self.assertEqual(await asyncio.wait_for(asyncio.to_thread(control.get, True, 5), 5), "new-token")
+            self.assertFalse(supervisor.done())
+        finally:
+            launcher.stop()
+            await asyncio.wait_for(supervisor, 5)
+        self.assertEqual(launcher.token_failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
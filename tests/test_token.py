@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import time
 import unittest
 from unittest.mock import patch
 
@@ -17,6 +19,7 @@ class TokenTestCase(unittest.TestCase):
 
     def setUp(self):
         self.token = Token(APP_ID, CLIENT_SECRET)
+        asyncio.run(self.token.renew_access_token())
 
     def test_init(self):
         self.assertEqual(self.token.appId, APP_ID)
@@ -49,5 +52,36 @@ class TokenTestCase(unittest.TestCase):
             self.assertGreater(len(new_access_token), 0)
 
 
+class TokenRefreshTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.token = Token(APP_ID, CLIENT_SECRET, refresh_ahead=1)
+        self.calls = 0
+
+        async def fake_fetch():
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            self.token.access_token = f"token{self.calls}"
+            self.token.active_time = 7200
+            self.token.start = time.time()
+            return self.token.access_token
+
+        self.token._fetch_access_token = fake_fetch
+
+    async def test_concurrent_refresh_is_single_flight(self):
+        tokens = await asyncio.gather(*(self.token.get_access_token() for _ in range(50)))
+        self.assertEqual(set(tokens), {"token1"})
+        self.assertEqual(self.calls, 1)
+
+    async def test_refresh_ahead_does_not_block(self):
+        await self.token.get_access_token()
+        self.token.start = time.time() - 7200 + 0.5
+        # 进入提前刷新窗口时立即返回旧的 AccessToken，刷新在后台完成
+        self.assertEqual(await self.token.get_access_token(), "token1")
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.token.access_token, "token2")
+        await self.token.close()
+
+
 if __name__ == "__main__":
     unittest.main()
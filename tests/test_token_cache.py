@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+from SuperQQBot.api_clients.openapi_client import Token
+from SuperQQBot.api_clients.token_cache import TokenCache
+
+
+def refresh_in_process(cache_path: str, counter_path: str) -> str:
+    """在子进程中通过共享缓存获取 AccessToken，请求只记录次数并返回固定值"""
+    token = Token("appid", "secret", cache=TokenCache(cache_path))
+
+    async def request_access_token():
+        with open(counter_path, "a") as f:
+            f.write("x")
+        # 留出时间让另一个进程在锁上等待
+        await asyncio.sleep(0.3)
+        token.access_token, token.active_time, token.start = "fetched", 7200, time.time()
+        return token.access_token
+
+    token._request_access_token = request_access_token
+    return asyncio.run(token.get_access_token())
+
+
+class TokenCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "token_cache.json")
+        self.cache = TokenCache(self.path)
+
+    def test_app_ids_are_kept_apart(self):
+        expires_at = time.time() + 7200
+        self.cache.save("1", "token-1", expires_at)
+        self.cache.save("2", "token-2", expires_at)
+        self.assertEqual(self.cache.load("1"), ("token-1", expires_at))
+        self.assertEqual(self.cache.load("2"), ("token-2", expires_at))
+        self.assertIsNone(self.cache.load("3"))
+        # 原子替换不留下临时文件
+        self.assertEqual(sorted(os.listdir(self.directory)), ["token_cache.json"])
+
+    def test_corrupt_cache_is_a_miss(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertIsNone(self.cache.load("1"))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"access_token": "token", "expires_at": "soon"}, "2": "broken"}, f)
+        self.assertIsNone(self.cache.load("1"))
+        self.assertIsNone(self.cache.load("2"))
+        self.cache.save("3", "token-3", time.time() + 7200)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f)), ["3"])
+
+    def test_two_processes_fetch_once(self):
+        counter_path = os.path.join(self.directory, "requests")
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            results = pool.starmap(refresh_in_process, [(self.path, counter_path)] * 2)
+        self.assertEqual(results, ["fetched", "fetched"])
+        with open(counter_path) as f:
+            self.assertEqual(f.read(), "x")
+
+
+class FileLockTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_cancelled_waiter_does_not_keep_lock(self):
+        cache = TokenCache(os.path.join(tempfile.mkdtemp(), "token_cache.json"))
+        holder = cache.lock()
+        await holder.__aenter__()
+        waiter = asyncio.create_task(cache.lock().__aenter__())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await holder.__aexit__(None, None, None)
+        # 被取消的等待者拿到锁后会立即释放
+        lock = cache.lock()
+        await asyncio.wait_for(lock.__aenter__(), 5)
+        await lock.__aexit__(None, None, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
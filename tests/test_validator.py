@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+
+try:
+    import cryptography
+except ImportError:
+    cryptography = None
+
+from SuperQQBot.interfaces.validator import Ed25519Validator, derive_seed
+
+SECRET = "naOC0ocQE3shWLAfffVLB1rhYPG7"
+BODY = b'{"op":0,"t":"AT_MESSAGE_CREATE","d":{}}'
+
+
+def signed_headers(validator: Ed25519Validator, body: bytes, app_id: str | None = None,
+                   timestamp: int | None = None) -> dict[str, str]:
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    headers = {"x-signature-timestamp": timestamp,
+               "x-signature-ed25519": validator.sign(timestamp.encode() + body, app_id)}
+    if app_id is not None:
+        headers["x-bot-appid"] = app_id
+    return headers
+
+
+class DeriveSeedTestCase(unittest.TestCase):
+
+    def test_secret_is_repeated_to_32_bytes(self):
+        self.assertEqual(derive_seed(SECRET), (SECRET * 2)[:32].encode())
+        self.assertEqual(derive_seed("abc"), ("abc" * 16)[:32].encode())
+
+
+@unittest.skipIf(cryptography is None, "需要安装 cryptography")
+class Ed25519ValidatorTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_verify_signed_request(self):
+        validator = Ed25519Validator(SECRET)
+        self.assertTrue(await validator.verify(signed_headers(validator, BODY), BODY))
+        self.assertFalse(await validator.verify(signed_headers(validator, BODY), BODY + b" "))
+        self.assertFalse(await validator.verify({}, BODY))
+        self.assertEqual(validator.stats()["verified"], 1)
+
+    async def test_stale_timestamp_is_rejected(self):
+        validator = Ed25519Validator(SECRET, max_age=60)
+        self.assertFalse(await validator.verify(signed_headers(validator, BODY, timestamp=int(time.time()) - 120), BODY))
+        self.assertEqual(validator.stats()["expired"], 1)
+        validator.max_age = None
+        self.assertTrue(await validator.verify(signed_headers(validator, BODY, timestamp=1725442341), BODY))
+
+    async def test_keys_are_cached_per_app_id(self):
+        validator = Ed25519Validator(SECRET, app_id="1")
+        validator.add_bot("2", "another-secret")
+        self.assertIs(validator.keys("1"), validator.keys("1"))
+        headers = signed_headers(validator, BODY, "2")
+        self.assertTrue(await validator.verify(headers, BODY))
+        headers["x-bot-appid"] = "1"
+        self.assertFalse(await validator.verify(headers, BODY))
+        headers["x-bot-appid"] = "unknown"
+        self.assertFalse(await validator.verify(headers, BODY))
+
+    async def test_offload_to_thread_pool(self):
+        validator = Ed25519Validator(SECRET, offload_threshold=0)
+        for _ in range(2):
+            self.assertTrue(await validator.verify(signed_headers(validator, BODY), BODY))
+        self.assertGreaterEqual(validator.stats()["offloaded"], 1)
+
+    def test_callback_validation_known_answer(self):
+        # 平台文档给出的示例
+        validator = Ed25519Validator("DG5g3B4j9X2KOErG")
+        response = validator.sign_challenge({}, {"plain_token": "Arq0D5A61EgUu4OxUvOp", "event_ts": "1725442341"})
+        self.assertEqual(response["signature"],
+                         "87befc99c42c651b3aac0278e71ada338433ae26fcb24307bdc5ad38c1adc2d0"
+                         "1bcfcadc0842edac85e85205028a1132afe09280305f13aa6909ffc2d652c706")
+
+    def test_callback_validation_signature(self):
+        validator = Ed25519Validator(SECRET)
+        response = validator.sign_challenge({}, {"plain_token": "Arq0D5A61EgUu4OxUvOp", "event_ts": "1725442341"})
+        self.assertEqual(response["plain_token"], "Arq0D5A61EgUu4OxUvOp")
+        self.assertTrue(validator.verify_signature(response["signature"], "1725442341", b"Arq0D5A61EgUu4OxUvOp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
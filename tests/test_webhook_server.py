@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import time
+import unittest
+import warnings
+from unittest.mock import AsyncMock, patch
+
+from SuperQQBot.api_clients.exceptions import MissingDependency
+from SuperQQBot.core.server import WebHookServer
+from SuperQQBot.interfaces.validator import Ed25519Validator
+from SuperQQBot.middleware.dedup import EventDeduplicator
+from SuperQQBot.old_core.client import Client, Intents
+
+
+class WebHookClient(Client):
+
+    def __init__(self, *args, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            super().__init__(*args, **kwargs)
+        self.messages = []
+
+    async def on_at_message_create(self, message):
+        self.messages.append(message)
+
+
+def at_message(index: int) -> bytes:
+    return json.dumps({"op": 0, "id": f"AT_MESSAGE_CREATE:{index}", "t": "AT_MESSAGE_CREATE", "d": {
+        "id": f"message-{index}", "channel_id": "channel", "guild_id": "guild", "content": "hello",
+        "timestamp": "2024-11-05T12:00:00+08:00", "author": {"id": "1", "username": "user", "avatar": ""}}}).encode()
+
+
+async def post(reader, writer, body: bytes, path: str = "/", headers: dict | None = None) -> tuple[int, bytes]:
+    extra = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n{extra}"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    length = next(int(line.split(":")[1]) for line in lines if line.lower().startswith("content-length"))
+    return int(lines[0].split(" ")[1]), await reader.readexactly(length)
+
+
+class ServerTestCase(unittest.IsolatedAsyncioTestCase):
+    client_class = WebHookClient
+    validator = None
+
+    async def asyncSetUp(self):
+        self.client = self.client_class(Intents.none())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.server = WebHookServer(self.client, host="127.0.0.1", port=0, validator=self.validator)
+        await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.sockets[0].getsockname()[1])
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.close()
+
+
+class WebHookServerTestCase(ServerTestCase):
+
+    async def test_events_are_dispatched_and_acked(self):
+        # 同一条 keep-alive 连接上连续发送
+        for index in range(3):
+            status, body = await post(self.reader, self.writer, at_message(index))
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(body), {"op": 12})
+        self.assertEqual([message.id for message in self.client.messages], ["message-0", "message-1", "message-2"])
+        self.assertIs(self.client.messages[0].api, self.client.api)
+
+    async def test_invalid_requests(self):
+        self.assertEqual((await post(self.reader, self.writer, b"not json"))[0], 400)
+        self.assertEqual((await post(self.reader, self.writer, at_message(0), path="/other"))[0], 404)
+        # 没有配置 validator 时无法完成回调地址验证
+        validation = json.dumps({"op": 13, "d": {"plain_token": "token", "event_ts": "1"}}).encode()
+        self.assertEqual((await post(self.reader, self.writer, validation))[0], 501)
+        self.assertEqual(self.server.stats()["invalid"], 1)
+
+    async def test_unexpected_error_returns_500(self):
+        with patch.object(self.server, "handle_request", AsyncMock(side_effect=RuntimeError("boom"))):
+            with self.assertLogs(level="ERROR"):
+                status, body = await post(self.reader, self.writer, at_message(0))
+        self.assertEqual((status, body), (500, b""))
+        self.assertEqual(self.server.stats()["errors"], 1)
+        # 出错后关闭连接，不再复用
+        self.assertEqual(await self.reader.read(), b"")
+
+
+class FlakyWebHookClient(WebHookClient):
+    """前 failures 次处理失败"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, dedup=EventDeduplicator(), **kwargs)
+        self.failures = 0
+
+    async def on_at_message_create(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("boom")
+        self.messages.append(message)
+
+
+class DedupTestCase(ServerTestCase):
+    client_class = FlakyWebHookClient
+
+    async def test_retried_event_is_handled_once(self):
+        for _ in range(2):
+            self.assertEqual((await post(self.reader, self.writer, at_message(0)))[0], 200)
+        self.assertEqual(len(self.client.messages), 1)
+        self.assertEqual(self.server.stats()["duplicates"], 1)
+
+    async def test_failed_event_can_be_retried(self):
+        self.client.failures = 1
+        self.assertEqual((await post(self.reader, self.writer, at_message(0)))[0], 500)
+        self.assertEqual((await post(self.reader, self.writer, at_message(0)))[0], 200)
+        self.assertEqual([message.id for message in self.client.messages], ["message-0"])
+
+
+class SlowWebHookClient(WebHookClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = asyncio.Event()
+
+    async def on_at_message_create(self, message):
+        await self.release.wait()
+        self.messages.append(message)
+
+
+class CloseTestCase(ServerTestCase):
+    client_class = SlowWebHookClient
+
+    async def test_close_ends_busy_keep_alive_connection(self):
+        request = asyncio.create_task(post(self.reader, self.writer, at_message(0)))
+        while not any(self.server._connections.values()):
+            await asyncio.sleep(0.01)
+        closing = asyncio.create_task(self.server.close())
+        await asyncio.sleep(0.05)
+        self.assertFalse(closing.done())
+        self.client.release.set()
+        self.assertEqual((await request)[0], 200)
+        # 响应后连接即被关闭，close() 不用等到 keep-alive 超时
+        self.assertEqual(await asyncio.wait_for(self.reader.read(), 1), b"")
+        await asyncio.wait_for(closing, 1)
+
+
+class ImmediateAckTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = SlowWebHookClient(Intents.none())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.server = WebHookServer(self.client, host="127.0.0.1", port=0, immediate_ack=True,
+                                        queue_size=2, queue_workers=1)
+        await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.sockets[0].getsockname()[1])
+
+    async def asyncTearDown(self):
+        self.writer.close()
+
+    async def test_ack_does_not_wait_for_handler(self):
+        statuses = [(await post(self.reader, self.writer, at_message(index)))[0] for index in range(4)]
+        # 第一个事件正在处理，两个在队列中，第四个因队列已满被拒绝
+        self.assertEqual(statuses, [200, 200, 200, 503])
+        stats = self.server.stats()["queue"]
+        self.assertEqual((stats["depth"], stats["rejected"]), (2, 1))
+        self.client.release.set()
+        await self.server.close(drain=True)
+        self.assertEqual([message.id for message in self.client.messages], ["message-0", "message-1", "message-2"])
+
+
+class WorkerPoolClient(WebHookClient):
+
+    async def on_at_message_create(self, message):
+        await asyncio.sleep(0.05)
+        self.messages.append(message)
+
+
+class WorkerPoolCloseTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def start(self, client):
+        self.client = client
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.server = WebHookServer(client, host="127.0.0.1", port=0, immediate_ack=True)
+        await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.sockets[0].getsockname()[1])
+        self.addCleanup(self.writer.close)
+
+    async def test_close_drains_client_worker_pool(self):
+        await self.start(WorkerPoolClient(Intents.none(), workers=2))
+        for index in range(3):
+            self.assertEqual((await post(self.reader, self.writer, at_message(index)))[0], 200)
+        await self.server.close(drain=True)
+        self.assertEqual(sorted(message.id for message in self.client.messages),
+                         ["message-0", "message-1", "message-2"])
+        self.assertFalse(self.client.worker_pool.running)
+
+    async def test_drain_timeout_covers_worker_pool(self):
+        await self.start(SlowWebHookClient(Intents.none(), workers=1))
+        self.assertEqual((await post(self.reader, self.writer, at_message(0)))[0], 200)
+        with self.assertLogs(level="WARNING"):
+            await asyncio.wait_for(self.server.close(drain=True, drain_timeout=0.1), 1)
+        self.assertEqual(self.client.messages, [])
+
+
+class SignedWebHookServerTestCase(ServerTestCase):
+
+    async def asyncSetUp(self):
+        try:
+            self.validator = Ed25519Validator("secret")
+        except MissingDependency as e:
+            self.skipTest(str(e))
+        await super().asyncSetUp()
+
+    def sign(self, body: bytes) -> dict:
+        timestamp = str(int(time.time()))
+        return {"X-Signature-Timestamp": timestamp,
+                "X-Signature-Ed25519": self.validator.sign(timestamp.encode() + body)}
+
+    async def test_unsigned_request_is_rejected(self):
+        body = at_message(0)
+        self.assertEqual((await post(self.reader, self.writer, body))[0], 401)
+        self.assertEqual((await post(self.reader, self.writer, body, headers=self.sign(body)))[0], 200)
+        self.assertEqual(len(self.client.messages), 1)
+
+    async def test_callback_validation(self):
+        validation = json.dumps({"op": 13, "d": {"plain_token": "token", "event_ts": "1"}}).encode()
+        status, body = await post(self.reader, self.writer, validation, headers=self.sign(validation))
+        self.assertEqual(status, 200)
+        self.assertTrue(self.validator.verify_signature(json.loads(body)["signature"], "1", b"token"))
+
+
+class RunTestCase(unittest.TestCase):
+
+    def test_run_verifies_signatures_with_secret(self):
+        try:
+            expected = Ed25519Validator("secret", app_id="appid")
+        except MissingDependency as e:
+            self.skipTest(str(e))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            server = WebHookServer(WebHookClient(Intents.none()), port=0)
+        with patch.object(WebHookServer, "serve_forever", AsyncMock()):
+            server.run("appid", "secret")
+        self.assertIsInstance(server.validator, Ed25519Validator)
+        self.assertEqual(server.validator.sign(b"message"), expected.sign(b"message"))
+
+
+if __name__ == "__main__":
+    unittest.main()